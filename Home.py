@@ -1,25 +1,11 @@
 import streamlit as st
 from datetime import date, timedelta
-from utils import apply_sidebar_style, get_local_date, show_ai_limit_message
-from database import check_and_increment_quota
-from constants import AI_DAILY_LIMIT
-from database import (
-    initialize_db,
-    get_ingredients,
-    get_recipes,
-    get_cookable_recipes,
-    get_forgotten_ingredients,
-    get_most_cooked_recipes,
-    get_most_used_ingredients,
-    get_meals_for_date,
-    get_meal_entries,
-    get_shopping_plan,
-    save_meal_entry,
-    get_expiring_soon_ingredients,
-)
+from utils import apply_sidebar_style, get_local_date
+from database import save_meal_entry
+from data_cache import initialize_db, get_dashboard_snapshot
 
 initialize_db()
-from gemini_client import generate_home_insight
+from insights import RETRY_SECONDS, get_home_insight, request_home_insight_refresh
 
 st.set_page_config(page_title="CoPantry · Home", page_icon="🏠", layout="wide")
 apply_sidebar_style()
@@ -57,9 +43,8 @@ if "date_override" not in st.session_state:
     st.session_state["date_override"] = get_local_date()
 today = st.session_state["date_override"]
 
-ingredients = get_ingredients()
-recipes = get_recipes()
-recipe_map = {r["name"]: r for r in recipes}
+# Everything below renders from one snapshot, read in a single transaction
+snapshot = get_dashboard_snapshot(today)
 
 # ---------------------------------------------------------------------------
 # Section 1: Today
@@ -77,7 +62,7 @@ with col_picker:
 with col_caption:
     st.caption("Not the right date for your timezone? Feel free to correct it.")
 
-today_meals = get_meals_for_date(today.isoformat())
+today_meals = snapshot["meals"][today.isoformat()]
 
 UNPLANNED = "— Unplanned —"
 EATING_OUT = "🍽️ Eating Out"
@@ -139,9 +124,8 @@ thaw_reminders = []
 expiry_warnings = []
 
 # Build expiry warnings
-for item in get_expiring_soon_ingredients(days=3):
-    expiry = date.fromisoformat(item["expiry_date"])
-    days_left = (expiry - today).days
+for item in snapshot["expiring"]:
+    days_left = item["days_left"]
     name = _ing(item["name"])
     if days_left < 0:
         expiry_warnings.append(("error", f"🗑️ {name} expired {abs(days_left)} day{'s' if abs(days_left) != 1 else ''} ago — check if it's still usable"))
@@ -150,48 +134,24 @@ for item in get_expiring_soon_ingredients(days=3):
     elif days_left == 1:
         expiry_warnings.append(("warning", f"⏰ {name} expires tomorrow — consider cooking with it soon"))
     else:
-        expiry_warnings.append(("info", f"📅 {name} expires in {days_left} days ({_dt(expiry.strftime('%A, %b %-d'))})"))
-
-# Build freezer ingredient map from pantry
-freezer_items = {i["name"].lower(): i["name"] for i in ingredients if (i.get("location") or "Fridge") == "Freezer"}
-
-if freezer_items and recipes:
-    # Check tomorrow and day after for planned meals needing frozen ingredients
-    for days_ahead in [1, 2]:
-        check_date = today + timedelta(days=days_ahead)
-        check_meals = get_meals_for_date(check_date.isoformat())
-        check_date_label = check_date.strftime("%A, %b %-d")
-
-        for meal_type, meal_name in check_meals.items():
-            if meal_name == UNPLANNED or meal_name.startswith("🍽️") or meal_name.startswith("🏖️"):
-                continue
-            recipe = recipe_map.get(meal_name)
-            if not recipe:
-                continue
-            for ing in recipe["ingredients"]:
-                ing_key = ing["name"].lower()
-                if ing_key in freezer_items:
-                    display_name = freezer_items[ing_key]
-                    if days_ahead == 1:
-                        thaw_reminders.append(
-                            f"❄️ Take {_ing(display_name)} out of the freezer today — needed for {meal_name} tomorrow ({_dt(check_date_label)})"
-                        )
-                    else:
-                        thaw_reminders.append(
-                            f"❄️ Take {_ing(display_name)} out tomorrow — needed for {meal_name} on {_dt(check_date_label)}"
-                        )
+        expiry_warnings.append(("info", f"📅 {name} expires in {days_left} days ({_dt(date.fromordinal(item['expiry_day']).strftime('%A, %b %-d'))})"))
+
+# Planned meals in the next two days that need frozen ingredients
+for thaw in snapshot["thaw"]:
+    check_date_label = date.fromisoformat(thaw["date"]).strftime("%A, %b %-d")
+    meal_name = thaw["meal"]
+    for display_name in thaw["ingredients"]:
+        if thaw["days_ahead"] == 1:
+            thaw_reminders.append(
+                f"❄️ Take {_ing(display_name)} out of the freezer today — needed for {meal_name} tomorrow ({_dt(check_date_label)})"
+            )
+        else:
+            thaw_reminders.append(
+                f"❄️ Take {_ing(display_name)} out tomorrow — needed for {meal_name} on {_dt(check_date_label)}"
+            )
 
 # Shopping reminder — use next 7 days of planned meals
-next7_entries = get_meal_entries(today.isoformat(), (today + timedelta(days=6)).isoformat())
-home_meals_flat = {}
-for day_str, day_meals in next7_entries.items():
-    for mt, val in day_meals.items():
-        if val != UNPLANNED and not val.startswith("🍽️") and not val.startswith("🏖️"):
-            home_meals_flat[f"{day_str}_{mt}"] = val
-
-shop_plan = None
-if home_meals_flat:
-    shop_plan = get_shopping_plan(home_meals_flat, recipes)
+shop_plan = snapshot["shopping_plan"]
 
 shopping_reminder = None
 if shop_plan and not shop_plan["fully_covered"]:
@@ -241,7 +201,7 @@ with h_l:
 with h_d:
     st.markdown("**🌙 Dinner**")
 
-week_entries = get_meal_entries(today.isoformat(), (today + timedelta(days=6)).isoformat())
+week_entries = snapshot["meals"]
 
 for i in range(7):
     d = today + timedelta(days=i)
@@ -270,7 +230,7 @@ for i in range(7):
 
 # Pantry alerts
 st.write("")
-forgotten = get_forgotten_ingredients()
+forgotten = snapshot["forgotten"]
 if forgotten:
     forgotten_names = ", ".join(i["name"] for i in forgotten)
     st.warning(f"⚠️ **{forgotten_names}** aren't used in any saved recipe")
@@ -290,7 +250,7 @@ with st.expander("📊 Cooking Stats"):
 
     with stat_col1:
         st.subheader("🍳 Most Cooked Recipes")
-        most_cooked = get_most_cooked_recipes()
+        most_cooked = snapshot["most_cooked"]
         if not most_cooked:
             st.info("No cooking history yet.")
             st.page_link("pages/2_Recipes.py", label="Mark a recipe as cooked →")
@@ -300,7 +260,7 @@ with st.expander("📊 Cooking Stats"):
 
     with stat_col2:
         st.subheader("🥕 Most Used Ingredients")
-        most_used = get_most_used_ingredients()
+        most_used = snapshot["most_used"]
         if not most_used:
             st.info("No cooking history yet.")
         else:
@@ -315,30 +275,43 @@ with st.expander("📊 Cooking Stats"):
 st.divider()
 st.subheader("💡 AI Insight")
 
-if "home_insight" not in st.session_state:
-    if not ingredients:
-        st.session_state["home_insight"] = "Add some ingredients to your pantry to get personalised insights."
-    elif not recipes:
-        st.session_state["home_insight"] = "Add some recipes to get personalised insights based on your pantry."
-    else:
-        if not check_and_increment_quota(AI_DAILY_LIMIT):
-            st.session_state["home_insight"] = (
-                "⚠️ **Daily AI limit reached.** Insights will be available again tomorrow."
-            )
-        else:
-            with st.spinner("Generating insight based on your pantry..."):
-                try:
-                    cookable = get_cookable_recipes()
-                    forgotten = get_forgotten_ingredients()
-                    st.session_state["home_insight"] = generate_home_insight(
-                        ingredients, recipes, cookable, forgotten
-                    )
-                except Exception as e:
-                    st.session_state["home_insight"] = f"Could not generate insight: {e}"
-
-st.markdown(st.session_state["home_insight"])
+INSIGHT_POLL_SECONDS = 3
+
+
+def _insight_poll_seconds(insight):
+    """How often to poll while an insight is on its way; slower after a failed refresh, which waits for its retry time."""
+    if insight["refreshing"] or (insight["stale"] and insight["error"] is None):
+        return INSIGHT_POLL_SECONDS
+    if insight["stale"]:
+        return RETRY_SECONDS
+    return None
+
+
+def _current_insight():
+    insight = get_home_insight()
+    if insight["stale"] and not insight["refreshing"]:
+        request_home_insight_refresh()  # no-op before a failed refresh's retry time
+        insight = get_home_insight()
+    return insight
+
+
+def _render_insight(poll_seconds):
+    current = _current_insight()
+    if _insight_poll_seconds(current) != poll_seconds:
+        st.rerun()  # insight landed, failed or restarted — rerun once to change the polling interval
+    if current["content"]:
+        st.markdown(current["content"])
+    elif current["error"] is None:
+        st.info("Generating your first insight based on your pantry...")
+    if current["error"]:
+        st.warning(current["error"])
+    elif current["stale"] or current["refreshing"]:
+        st.caption("🔄 Updating for your latest pantry and recipe changes...")
+
+
+insight_poll_seconds = _insight_poll_seconds(_current_insight())
+st.fragment(_render_insight, run_every=insight_poll_seconds)(insight_poll_seconds)
 
 if st.button("Refresh Insight"):
-    del st.session_state["home_insight"]
+    request_home_insight_refresh(force=True)
     st.rerun()
-
@@ -0,0 +1,115 @@
+"""Temporary on-disk store for large upload payloads.
+
+Photos and PDFs waiting for recipe extraction are kept here instead of in
+st.session_state, which lives in server memory for as long as the session does.
+Sessions hold only the handle put() returns (the SHA-256 of the content), so a
+session's footprint doesn't grow with what it uploads. Blobs are evicted once
+unused for BLOB_TTL_SECONDS, and the least recently used go first when the store
+exceeds BLOB_MAX_BYTES, so get() returns None for a handle that has expired.
+Thumbnails for on-page previews are cached next to the blob they came from.
+"""
+import hashlib
+import io
+import os
+import re
+import tempfile
+import time
+
+BLOB_DIR = os.environ.get("BLOB_DIR", os.path.join(tempfile.gettempdir(), "copantry-blobs"))
+BLOB_MAX_BYTES = int(os.environ.get("BLOB_MAX_BYTES", 256 * 1024 * 1024))
+BLOB_TTL_SECONDS = int(os.environ.get("BLOB_TTL_SECONDS", 6 * 60 * 60))
+THUMBNAIL_SIZE = 640  # longest side, in pixels
+
+_HANDLE = re.compile(r"[0-9a-f]{64}")
+
+
+def _path(handle, suffix=""):
+    if not isinstance(handle, str) or not _HANDLE.fullmatch(handle):
+        raise ValueError(f"Invalid blob handle: {handle!r}")
+    return os.path.join(BLOB_DIR, handle + suffix)
+
+
+def _write(path, data):
+    """Write atomically, so a concurrent reader never sees a partial file."""
+    fd, tmp = tempfile.mkstemp(dir=BLOB_DIR, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _read(path):
+    """Return the file's bytes and mark it recently used, or None if it was evicted."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return data
+
+
+def put(data):
+    """Store bytes and return their handle. Storing the same content again reuses the existing blob."""
+    os.makedirs(BLOB_DIR, exist_ok=True)
+    handle = hashlib.sha256(data).hexdigest()
+    path = _path(handle)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        _write(path, data)
+    evict()
+    return handle
+
+
+def get(handle):
+    """Return the bytes stored under handle, or None if they have been evicted."""
+    return _read(_path(handle))
+
+
+def thumbnail(handle, size=THUMBNAIL_SIZE):
+    """
+    Return a JPEG preview of an image blob, at most size pixels on its longest side,
+    or None if the blob has been evicted. Generated on first use and cached.
+    """
+    path = _path(handle, f".thumb{size}.jpg")
+    data = _read(path)
+    if data is not None:
+        return data
+    original = get(handle)
+    if original is None:
+        return None
+    from PIL import Image, ImageOps  # deferred: Pillow is slow to import and only needed for previews
+    image = ImageOps.exif_transpose(Image.open(io.BytesIO(original)))
+    image.thumbnail((size, size))
+    out = io.BytesIO()
+    image.convert("RGB").save(out, format="JPEG", quality=80)
+    data = out.getvalue()
+    _write(path, data)
+    return data
+
+
+def evict(now=None):
+    """Delete blobs unused for BLOB_TTL_SECONDS, then the least recently used until under BLOB_MAX_BYTES."""
+    now = time.time() if now is None else now
+    entries = []
+    try:
+        names = os.listdir(BLOB_DIR)
+    except FileNotFoundError:
+        return
+    for name in names:
+        path = os.path.join(BLOB_DIR, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue  # removed by another process
+        entries.append((stat.st_mtime, stat.st_size, path))
+    entries.sort()
+    total = sum(size for _, size, _ in entries)
+    for mtime, size, path in entries:
+        if now - mtime <= BLOB_TTL_SECONDS and total <= BLOB_MAX_BYTES:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
@@ -1,4 +1,5 @@
-AI_DAILY_LIMIT = 200
+AI_DAILY_LIMIT = 200  # per household
+AI_GLOBAL_DAILY_LIMIT = 1000  # all households together
 
 UNITS = [
     # Whole items
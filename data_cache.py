@@ -0,0 +1,308 @@
+"""Streamlit caching for database reads.
+
+Pages import read functions from here instead of from database. Each one is an
+st.cache_data entry keyed on the data version of the scopes it reads, which
+database write functions bump. database.get_data_version() only touches SQLite
+after a commit, so reruns driven purely by UI state (expanders, tabs, form
+rows) are answered from the cache without any database work. Writes still go
+through database directly.
+
+Data versions are per household, so every cache key below is implicitly
+scoped to the session's household (see initialize_db()).
+"""
+from datetime import date
+import streamlit as st
+import database as db
+import planner
+
+
+def _session_household():
+    try:
+        return st.session_state.get("household_id")
+    except Exception:
+        return None  # outside a script run (background threads set their household explicitly)
+
+
+db.set_household_resolver(_session_household)
+
+
+@st.cache_resource(show_spinner=False)
+def _initialize_shared_db(path):
+    db.initialize_shared_db()
+
+
+@st.cache_resource(show_spinner=False)
+def _initialize_db(household_id, path):
+    db.initialize_db()
+
+
+def initialize_db(keep_shopping_changes=False):
+    """
+    Pick the session's household — ?household=<id> in the URL, else the one already chosen,
+    else the default — and create/migrate/seed its database once per process rather than on every rerun.
+    Only registered households open (see database.create_household()); an unknown id stops the page.
+
+    Checklist edits the Shopping List page buffers are written here, so leaving that page makes them
+    visible to other pages and sessions; the Shopping List page itself passes keep_shopping_changes.
+    """
+    _initialize_shared_db(db.DB_PATH)
+    household_id = st.query_params.get("household") or st.session_state.get("household_id") or db.DEFAULT_HOUSEHOLD
+    if household_id != st.session_state.get("household_id"):
+        try:
+            db.validate_household_id(household_id)
+        except ValueError as e:
+            st.error(str(e))
+            st.stop()
+        if not db.household_exists(household_id):
+            st.error("This household link isn't valid. Ask whoever runs CoPantry for your household's link.")
+            st.stop()
+    st.session_state["household_id"] = household_id
+    _initialize_db(household_id, db.household_db_path(household_id))
+    if not keep_shopping_changes:
+        flush_shopping_changes()
+
+
+def flush_shopping_changes():
+    """Write the Shopping List's buffered checklist edits (session state "shopping_pending") in one batch."""
+    pending = st.session_state.pop("shopping_pending", None)
+    if pending and (pending["checked"] or pending["deleted"]):
+        db.apply_shopping_list_changes(pending["checked"], pending["deleted"])
+
+
+# Pantry
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _ingredients(version):
+    return db.get_ingredients()
+
+
+def get_ingredients():
+    return _ingredients(db.get_data_version("pantry"))
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _ingredient_lots(version):
+    return db.get_ingredient_lots()
+
+
+def get_ingredient_lots():
+    return _ingredient_lots(db.get_data_version("pantry"))
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _ingredient_lot_page(name, location, expiring_within, limit, offset, today, version):
+    return db.get_ingredient_lot_page(name, location, expiring_within, limit, offset)
+
+
+def get_ingredient_lot_page(name=None, location=None, expiring_within=None, limit=50, offset=0):
+    return _ingredient_lot_page(
+        name, location, expiring_within, limit, offset, date.today().toordinal(), db.get_data_version("pantry")
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _count_ingredient_lots(name, location, expiring_within, today, version):
+    return db.count_ingredient_lots(name, location, expiring_within)
+
+
+def count_ingredient_lots(name=None, location=None, expiring_within=None):
+    return _count_ingredient_lots(name, location, expiring_within, date.today().toordinal(), db.get_data_version("pantry"))
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _expiring_soon_ingredients(days, today, version):
+    return db.get_expiring_soon_ingredients(days)
+
+
+def get_expiring_soon_ingredients(days=3):
+    return _expiring_soon_ingredients(days, date.today().toordinal(), db.get_data_version("pantry"))
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _forgotten_ingredients(version):
+    return db.get_forgotten_ingredients()
+
+
+def get_forgotten_ingredients():
+    return _forgotten_ingredients(db.get_data_version("pantry", "recipes", "settings"))
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _ingredient_aliases(version):
+    return db.get_ingredient_aliases()
+
+
+def get_ingredient_aliases():
+    return _ingredient_aliases(db.get_data_version("pantry", "aliases"))
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _alias_suggestions(version):
+    return db.get_alias_suggestions()
+
+
+def get_alias_suggestions():
+    return _alias_suggestions(db.get_data_version("pantry", "aliases"))
+
+
+# Recipes
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _recipes(version):
+    return db.get_recipes()
+
+
+def get_recipes():
+    return _recipes(db.get_data_version("recipes"))
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _recipe(recipe_id, version):
+    return db.get_recipe(recipe_id)
+
+
+def get_recipe(recipe_id):
+    return _recipe(recipe_id, db.get_data_version("recipes"))
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _search_recipes(query, limit, offset, version):
+    return db.search_recipes(query, limit, offset)
+
+
+def search_recipes(query, limit=20, offset=0):
+    return _search_recipes(query, limit, offset, db.get_data_version("recipes"))
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _count_recipe_matches(query, version):
+    return db.count_recipe_matches(query)
+
+
+def count_recipe_matches(query):
+    return _count_recipe_matches(query, db.get_data_version("recipes"))
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _ranked_recipes(k, cookable, today, version):
+    return planner.rank_recipes_now(k, cookable)
+
+
+def rank_recipes_now(k=10, cookable=None):
+    """planner.rank_recipes_now(), recomputed only when pantry, recipes, settings or the date change."""
+    return _ranked_recipes(k, cookable, date.today().toordinal(), db.get_data_version("pantry", "recipes", "settings"))
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _recipe_names_by_cook_count(version):
+    counts = db.get_recipe_cook_counts()
+    recipes = sorted(db.get_recipes(), key=lambda r: counts.get(r["name"], 0), reverse=True)
+    return [r["name"] for r in recipes]
+
+
+def get_recipe_names_by_cook_count():
+    """Recipe names, most-cooked first — the Meal Planner's option list, built once per version."""
+    return _recipe_names_by_cook_count(db.get_data_version("recipes", "usage"))
+
+
+# Cooking history
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _recipe_cook_counts(version):
+    return db.get_recipe_cook_counts()
+
+
+def get_recipe_cook_counts():
+    return _recipe_cook_counts(db.get_data_version("recipes", "usage"))
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _most_cooked_recipes(limit, version):
+    return db.get_most_cooked_recipes(limit)
+
+
+def get_most_cooked_recipes(limit=5):
+    return _most_cooked_recipes(limit, db.get_data_version("recipes", "usage"))
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _most_used_ingredients(limit, version):
+    return db.get_most_used_ingredients(limit)
+
+
+def get_most_used_ingredients(limit=5):
+    return _most_used_ingredients(limit, db.get_data_version("recipes", "usage"))
+
+
+# Meal plan
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _meal_entries(start_date_str, end_date_str, version):
+    return db.get_meal_entries(start_date_str, end_date_str)
+
+
+def get_meal_entries(start_date_str, end_date_str):
+    return _meal_entries(start_date_str, end_date_str, db.get_data_version("meal_plan"))
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _meals_for_date(date_str, version):
+    return db.get_meals_for_date(date_str)
+
+
+def get_meals_for_date(date_str):
+    return _meals_for_date(date_str, db.get_data_version("meal_plan"))
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _slot_servings(meal_plan, version):
+    return db.get_slot_servings(meal_plan)
+
+
+def get_slot_servings(meal_plan):
+    return _slot_servings(meal_plan, db.get_data_version("meal_plan", "settings"))
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _shopping_plan(meal_plan, servings, version):
+    return db.get_shopping_plan(meal_plan, get_recipes(), servings)
+
+
+def get_shopping_plan(meal_plan, servings=None):
+    """database.get_shopping_plan() against all saved recipes; servings default to get_slot_servings()."""
+    if servings is None:
+        servings = get_slot_servings(meal_plan)
+    return _shopping_plan(meal_plan, servings, db.get_data_version("pantry", "recipes"))
+
+
+# Dashboard
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _dashboard_snapshot(today, horizon_days, version):
+    return db.get_dashboard_snapshot(today, horizon_days)
+
+
+def get_dashboard_snapshot(today, horizon_days=7):
+    return _dashboard_snapshot(
+        today, horizon_days, db.get_data_version("pantry", "recipes", "meal_plan", "usage", "aliases", "settings")
+    )
+
+
+# Settings and shopping list
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _household_size(version):
+    return db.get_household_size()
+
+
+def get_household_size():
+    return _household_size(db.get_data_version("settings"))
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _shopping_list_items(version):
+    return db.get_shopping_list_items()
+
+
+def get_shopping_list_items():
+    return _shopping_list_items(db.get_data_version("shopping"))
@@ -1,9 +1,18 @@
+import contextvars
+import itertools
 import os
+import re
+import secrets
 import sqlite3
 import json
+import time
 from datetime import datetime, timedelta, date
+from constants import AI_GLOBAL_DAILY_LIMIT
 
 DB_PATH = os.environ.get("DB_PATH", "recipes.db")
+# When set, every household gets its own SQLite file in this directory instead of sharing DB_PATH
+HOUSEHOLD_DB_DIR = os.environ.get("HOUSEHOLD_DB_DIR")
+DEFAULT_HOUSEHOLD = "default"
 
 # ---------------------------------------------------------------------------
 # Unit conversion helpers
@@ -15,7 +24,9 @@ UNIT_TO_ML = {"ml": 1, "liters": 1000, "cups": 240, "tablespoons": 14.787, "teas
 
 def _to_base(amount, unit):
     """Convert amount to a base unit (grams or ml). Returns (base_amount, base_unit).
-    Countable/packaged units are returned unchanged."""
+    Countable/packaged units are returned unchanged; without an amount there is nothing to compare, (None, None)."""
+    if amount is None:
+        return None, None
     if unit in UNIT_TO_GRAMS:
         return amount * UNIT_TO_GRAMS[unit], "grams"
     if unit in UNIT_TO_ML:
@@ -41,11 +52,185 @@ def _has_enough(fridge_amount, fridge_unit, need_amount, need_unit):
     return f_base >= n_base
 
 
+# Lot priority within one ingredient: earliest expiry first (undated lots last), then oldest
+_LOT_ORDER = "COALESCE(expiry_date, '9999-12-31'), added_date, id"
+_LOT_COLUMNS = "id, name, amount, unit, added_date, updated_date, location, expiry_date, expiry_estimated, added_day, expiry_day"
+_RECIPE_COLUMNS = "recipes.id, recipes.name, recipes.cooking_time, recipes.ingredients, recipes.instructions, recipes.servings, COALESCE(recipes.updated_at, recipes.created_at)"
+
+
+# Day numbers are proleptic Gregorian ordinals, the same numbering as date.toordinal()
+_DAY_NUMBER = "CAST(julianday({}) - 1721424.5 AS INTEGER)"
+
+
+def day_number(value):
+    """Return the day number of a date, datetime or ISO date string (None stays None)."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    return value.toordinal()
+
+
+class _Connection(sqlite3.Connection):
+    """Connection that counts commits made by this process, so get_data_version() knows when to re-read."""
+
+    def commit(self):
+        global _write_generation
+        super().commit()
+        _write_generation = next(_commits)
+
+
+_commits = itertools.count(1)
+_write_generation = 0
+
+
+# Households
+#
+# Every table carries a household_id, every query filters on it, and every index leads on it, so a
+# request only touches its own household's rows however many households share the file. Which
+# household a call belongs to is a context variable: set_household() for threads and scripts, or a
+# resolver registered by the app (the Streamlit session) where nothing was set.
+
+_HOUSEHOLD_ID = re.compile(r"[A-Za-z0-9_-]{1,64}")
+_household = contextvars.ContextVar("household_id", default=None)
+_household_resolver = None
+
+
+def validate_household_id(household_id):
+    """Return household_id, or raise ValueError unless it is 1-64 letters, digits, '-' or '_'."""
+    if not isinstance(household_id, str) or not _HOUSEHOLD_ID.fullmatch(household_id):
+        raise ValueError(f"Invalid household id: {household_id!r}")
+    return household_id
+
+
+def set_household(household_id):
+    """Scope database calls made in the current context (thread or script run) to one household."""
+    _household.set(validate_household_id(household_id))
+
+
+def set_household_resolver(resolver):
+    """Register a callable returning the household for contexts where set_household() wasn't called."""
+    global _household_resolver
+    _household_resolver = resolver
+
+
+def household_exists(household_id):
+    """True if household_id is registered (see create_household()); the default household always is."""
+    if household_id == DEFAULT_HOUSEHOLD:
+        return True
+    conn = get_shared_connection()
+    try:
+        row = conn.execute("SELECT 1 FROM households WHERE household_id = ?", (household_id,)).fetchone()
+    except sqlite3.OperationalError:
+        row = None  # registry not created yet
+    conn.close()
+    return row is not None
+
+
+def create_household():
+    """Register a new household under a random, unguessable id and return the id. Its data is seeded on first open."""
+    initialize_shared_db()
+    household_id = secrets.token_urlsafe(12)
+    conn = get_shared_connection()
+    conn.execute(
+        "INSERT INTO households (household_id, created_at) VALUES (?, ?)", (household_id, datetime.now().isoformat())
+    )
+    conn.commit()
+    conn.close()
+    return household_id
+
+
+def current_household():
+    household_id = _household.get()
+    if household_id is None and _household_resolver is not None:
+        household_id = _household_resolver()
+    return household_id or DEFAULT_HOUSEHOLD
+
+
+def household_db_path(household_id=None):
+    """The SQLite file holding a household's data: its own file under HOUSEHOLD_DB_DIR, else DB_PATH."""
+    if not HOUSEHOLD_DB_DIR:
+        return DB_PATH
+    return os.path.join(HOUSEHOLD_DB_DIR, f"{household_id or current_household()}.db")
+
+
 def get_connection():
-    return sqlite3.connect(DB_PATH)
+    return sqlite3.connect(household_db_path(), factory=_Connection)
+
+
+def get_shared_connection():
+    """Connection to DB_PATH for the few tables shared by every household (the extraction cache)."""
+    return sqlite3.connect(DB_PATH, factory=_Connection)
+
+
+# Tables whose key is a natural key (a date, a setting name, ...) lead that key with household_id
+_HOUSEHOLD_KEYED_TABLES = {
+    "meal_plan": f"""
+        CREATE TABLE {{name}} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            household_id TEXT NOT NULL DEFAULT '{DEFAULT_HOUSEHOLD}',
+            plan_date TEXT NOT NULL,
+            meal_type TEXT NOT NULL,
+            meal TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            servings INTEGER,
+            plan_day INTEGER GENERATED ALWAYS AS ({_DAY_NUMBER.format("plan_date")}) VIRTUAL,
+            UNIQUE(household_id, plan_date, meal_type)
+        )
+    """,
+    "ai_usage": f"""
+        CREATE TABLE {{name}} (
+            household_id TEXT NOT NULL DEFAULT '{DEFAULT_HOUSEHOLD}',
+            date TEXT NOT NULL,
+            call_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (household_id, date)
+        )
+    """,
+    "settings": f"""
+        CREATE TABLE {{name}} (
+            household_id TEXT NOT NULL DEFAULT '{DEFAULT_HOUSEHOLD}',
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            PRIMARY KEY (household_id, key)
+        )
+    """,
+    "data_versions": f"""
+        CREATE TABLE {{name}} (
+            household_id TEXT NOT NULL DEFAULT '{DEFAULT_HOUSEHOLD}',
+            scope TEXT NOT NULL,
+            version INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (household_id, scope)
+        )
+    """,
+    "insights": f"""
+        CREATE TABLE {{name}} (
+            household_id TEXT NOT NULL DEFAULT '{DEFAULT_HOUSEHOLD}',
+            name TEXT NOT NULL,
+            content TEXT NOT NULL,
+            data_version TEXT NOT NULL,
+            generated_at TEXT NOT NULL,
+            PRIMARY KEY (household_id, name)
+        )
+    """,
+    "ingredient_aliases": f"""
+        CREATE TABLE {{name}} (
+            household_id TEXT NOT NULL DEFAULT '{DEFAULT_HOUSEHOLD}',
+            alias TEXT NOT NULL,
+            canonical TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'suggested',
+            score REAL,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (household_id, alias)
+        )
+    """,
+}
 
 
 def initialize_db():
+    """Create/migrate the schema of the current household's database and seed the household's sample data."""
+    if HOUSEHOLD_DB_DIR:
+        os.makedirs(HOUSEHOLD_DB_DIR, exist_ok=True)
+    household_id = current_household()
     conn = get_connection()
     c = conn.cursor()
 
@@ -81,17 +266,6 @@ def initialize_db():
         )
     """)
 
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS meal_plan (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            plan_date TEXT NOT NULL,
-            meal_type TEXT NOT NULL,
-            meal TEXT NOT NULL,
-            updated_at TEXT NOT NULL,
-            UNIQUE(plan_date, meal_type)
-        )
-    """)
-
     c.execute("""
         CREATE TABLE IF NOT EXISTS shopping_list_items (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -101,32 +275,23 @@ def initialize_db():
         )
     """)
 
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS ai_usage (
-            date TEXT PRIMARY KEY,
-            call_count INTEGER NOT NULL DEFAULT 0
-        )
-    """)
+    for table, schema in _HOUSEHOLD_KEYED_TABLES.items():
+        c.execute(schema.format(name=f"IF NOT EXISTS {table}"))
 
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS settings (
-            key TEXT PRIMARY KEY,
-            value TEXT NOT NULL
-        )
-    """)
+    _partition_by_household(c)
 
     now = datetime.now()
     ago = lambda days: (now - timedelta(days=days)).isoformat()
 
-    c.execute("SELECT value FROM settings WHERE key = 'seeded'")
+    c.execute("SELECT value FROM settings WHERE household_id = ? AND key = 'seeded'", (household_id,))
     already_seeded = c.fetchone() is not None
 
     # If the settings table was just created but data already exists (existing deployment),
     # mark as seeded without re-inserting to avoid duplicates
     if not already_seeded:
-        c.execute("SELECT COUNT(*) FROM ingredients")
+        c.execute("SELECT COUNT(*) FROM ingredients WHERE household_id = ?", (household_id,))
         if c.fetchone()[0] > 0:
-            c.execute("INSERT INTO settings (key, value) VALUES ('seeded', 'true')")
+            c.execute("INSERT INTO settings (household_id, key, value) VALUES (?, 'seeded', 'true')", (household_id,))
             already_seeded = True
 
     if not already_seeded:
@@ -159,8 +324,8 @@ def initialize_db():
             ("Fish Sauce", 0.25, "cups", ago(21), "Pantry"),
         ]
         c.executemany(
-            "INSERT INTO ingredients (name, amount, unit, added_date, location) VALUES (?, ?, ?, ?, ?)",
-            sample_ingredients,
+            "INSERT INTO ingredients (household_id, name, amount, unit, added_date, location) VALUES (?, ?, ?, ?, ?, ?)",
+            [(household_id, *row) for row in sample_ingredients],
         )
 
         sample_recipes = [
@@ -274,12 +439,12 @@ def initialize_db():
             ),
         ]
         c.executemany(
-            "INSERT INTO recipes (name, cooking_time, ingredients, instructions, created_at) VALUES (?, ?, ?, ?, ?)",
-            sample_recipes,
+            "INSERT INTO recipes (household_id, name, cooking_time, ingredients, instructions, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            [(household_id, *row) for row in sample_recipes],
         )
 
         # Seed cooking history using the inserted recipe IDs
-        c.execute("SELECT id, name FROM recipes")
+        c.execute("SELECT id, name FROM recipes WHERE household_id = ?", (household_id,))
         recipe_map = {name: rid for rid, name in c.fetchall()}
 
         usage_entries = [
@@ -315,8 +480,8 @@ def initialize_db():
             (recipe_map["Cheesy Omelette"], ago(6)),
         ]
         c.executemany(
-            "INSERT INTO recipe_usage (recipe_id, cooked_at) VALUES (?, ?)",
-            usage_entries,
+            "INSERT INTO recipe_usage (household_id, recipe_id, cooked_at) VALUES (?, ?, ?)",
+            [(household_id, *row) for row in usage_entries],
         )
 
         today = date.today()
@@ -352,11 +517,11 @@ def initialize_db():
             (fwd(6), "Dinner",    "Garlic Butter Chicken"),
         ]
         c.executemany(
-            "INSERT OR IGNORE INTO meal_plan (plan_date, meal_type, meal, updated_at) VALUES (?, ?, ?, ?)",
-            [(d, t, m, datetime.now().isoformat()) for d, t, m in sample_plan],
+            "INSERT OR IGNORE INTO meal_plan (household_id, plan_date, meal_type, meal, updated_at) VALUES (?, ?, ?, ?, ?)",
+            [(household_id, d, t, m, datetime.now().isoformat()) for d, t, m in sample_plan],
         )
 
-        c.execute("INSERT INTO settings (key, value) VALUES ('seeded', 'true')")
+        c.execute("INSERT INTO settings (household_id, key, value) VALUES (?, 'seeded', 'true')", (household_id,))
 
     # Migrate: add updated_date column if it doesn't exist yet
     try:
@@ -383,10 +548,221 @@ def initialize_db():
     except sqlite3.OperationalError:
         pass  # column already exists
 
+    # Migrate: recipe yield, recipe edit time (keys the scaled-ingredient memo) and per-slot servings
+    for statement in (
+        "ALTER TABLE recipes ADD COLUMN servings INTEGER",
+        "ALTER TABLE recipes ADD COLUMN updated_at TEXT",
+        "ALTER TABLE meal_plan ADD COLUMN servings INTEGER",
+    ):
+        try:
+            c.execute(statement)
+        except sqlite3.OperationalError:
+            pass  # column already exists
+
+    # Migrate: integer day numbers derived from the ISO date columns, so range filters are integer
+    # index seeks and render loops compare ints instead of parsing dates row by row
+    for table, column, source in (
+        ("ingredients", "added_day", "added_date"),
+        ("ingredients", "expiry_day", "expiry_date"),
+        ("meal_plan", "plan_day", "plan_date"),
+        ("recipe_usage", "cooked_day", "cooked_at"),
+    ):
+        try:
+            c.execute(
+                f"ALTER TABLE {table} ADD COLUMN {column} INTEGER "
+                f"GENERATED ALWAYS AS ({_DAY_NUMBER.format(source)}) VIRTUAL"
+            )
+        except sqlite3.OperationalError:
+            pass  # column already exists
+
+    # Every query filters on household_id, so every index leads on it (replacing the single-household ones)
+    for index in ("idx_ingredients_expiry", "idx_meal_plan_day", "idx_recipe_usage_day", "idx_recipes_name", "idx_ingredient_lots"):
+        c.execute(f"DROP INDEX IF EXISTS {index}")
+    c.execute(
+        "CREATE INDEX IF NOT EXISTS idx_ingredients_household_expiry ON ingredients (household_id, expiry_day) "
+        "WHERE expiry_day IS NOT NULL"
+    )
+    c.execute("CREATE INDEX IF NOT EXISTS idx_meal_plan_household_day ON meal_plan (household_id, plan_day)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_recipe_usage_household_day ON recipe_usage (household_id, cooked_day)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_recipe_usage_household_recipe ON recipe_usage (household_id, recipe_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_recipes_household_name ON recipes (household_id, name)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_shopping_items_household ON shopping_list_items (household_id, added_at)")
+    _create_recipe_search_index(c)
+
+    # Each ingredients row is a lot; this orders an ingredient's lots earliest-expiring first
+    c.execute(
+        f"CREATE INDEX IF NOT EXISTS idx_ingredient_lots_household ON ingredients (household_id, LOWER(name), {_LOT_ORDER})"
+    )
+
+    conn.commit()
+    conn.close()
+    initialize_shared_db()
+
+
+def initialize_shared_db():
+    """Create the tables in DB_PATH shared by every household, and register households that predate the registry."""
+    # Not partitioned: the same recipe card extracts to the same recipe whichever household uploads it
+    conn = get_shared_connection()
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS extraction_cache (
+            key TEXT PRIMARY KEY,
+            extractor TEXT NOT NULL,
+            image_hashes TEXT,
+            result TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            used_at TEXT NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_extraction_cache_used ON extraction_cache (used_at)")
+
+    # Households a session may open; rows are only added by create_household(), never by a URL
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS households (
+            household_id TEXT PRIMARY KEY,
+            created_at TEXT NOT NULL
+        )
+    """)
+    existing = {DEFAULT_HOUSEHOLD}
+    if HOUSEHOLD_DB_DIR and os.path.isdir(HOUSEHOLD_DB_DIR):
+        existing.update(name[:-3] for name in os.listdir(HOUSEHOLD_DB_DIR) if name.endswith(".db"))
+    elif "household_id" in _columns(conn.cursor(), "settings"):
+        existing.update(row[0] for row in conn.execute("SELECT DISTINCT household_id FROM settings"))
+    conn.executemany(
+        "INSERT OR IGNORE INTO households (household_id, created_at) VALUES (?, ?)",
+        [(household_id, datetime.now().isoformat()) for household_id in existing if _HOUSEHOLD_ID.fullmatch(household_id)],
+    )
+
+    # AI calls made by every household together, capped by the global_limit of check_and_increment_quota()
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS ai_usage_total (
+            date TEXT PRIMARY KEY,
+            call_count INTEGER NOT NULL DEFAULT 0
+        )
+    """)
     conn.commit()
     conn.close()
 
 
+def _columns(c, table):
+    c.execute(f"PRAGMA table_info({table})")
+    return [row[1] for row in c.fetchall()]
+
+
+def _partition_by_household(c):
+    """
+    Migrate a single-household database: add household_id to the row tables and rebuild the
+    tables in _HOUSEHOLD_KEYED_TABLES around their household-leading keys. Existing rows belong
+    to DEFAULT_HOUSEHOLD.
+    """
+    for table in ("ingredients", "recipes", "recipe_usage", "shopping_list_items"):
+        try:
+            c.execute(f"ALTER TABLE {table} ADD COLUMN household_id TEXT NOT NULL DEFAULT '{DEFAULT_HOUSEHOLD}'")
+        except sqlite3.OperationalError:
+            pass  # column already exists
+
+    for table, schema in _HOUSEHOLD_KEYED_TABLES.items():
+        old_columns = _columns(c, table)
+        if "household_id" in old_columns:
+            continue
+        c.execute(schema.format(name=f"{table}_partitioned"))
+        copied = ", ".join(col for col in _columns(c, f"{table}_partitioned") if col in old_columns)
+        c.execute(f"INSERT INTO {table}_partitioned ({copied}) SELECT {copied} FROM {table}")
+        c.execute(f"DROP TABLE {table}")
+        c.execute(f"ALTER TABLE {table}_partitioned RENAME TO {table}")
+
+
+def _create_recipe_search_index(c):
+    """
+    Create the FTS5 index over recipe name, instructions and ingredient names, kept in sync by
+    triggers on recipes. Skipped when this SQLite build lacks FTS5; search_recipes() then falls
+    back to LIKE.
+    """
+    try:
+        c.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS recipes_fts USING fts5(
+                name, instructions, ingredient_names,
+                tokenize = 'porter unicode61 remove_diacritics 2'
+            )
+        """)
+    except sqlite3.OperationalError:
+        return  # no FTS5 in this build
+
+    ingredient_names = "(SELECT group_concat(json_extract(value, '$.name'), ' ') FROM json_each({}.ingredients))"
+    c.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS recipes_fts_insert AFTER INSERT ON recipes BEGIN
+            INSERT INTO recipes_fts (rowid, name, instructions, ingredient_names)
+            VALUES (new.id, new.name, new.instructions, {ingredient_names.format("new")});
+        END
+    """)
+    c.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS recipes_fts_update AFTER UPDATE ON recipes BEGIN
+            DELETE FROM recipes_fts WHERE rowid = old.id;
+            INSERT INTO recipes_fts (rowid, name, instructions, ingredient_names)
+            VALUES (new.id, new.name, new.instructions, {ingredient_names.format("new")});
+        END
+    """)
+    c.execute("""
+        CREATE TRIGGER IF NOT EXISTS recipes_fts_delete AFTER DELETE ON recipes BEGIN
+            DELETE FROM recipes_fts WHERE rowid = old.id;
+        END
+    """)
+
+    # Backfill recipes saved before the index existed
+    c.execute("SELECT (SELECT COUNT(*) FROM recipes), (SELECT COUNT(*) FROM recipes_fts)")
+    recipe_count, indexed_count = c.fetchone()
+    if recipe_count != indexed_count:
+        c.execute("DELETE FROM recipes_fts")
+        c.execute(f"""
+            INSERT INTO recipes_fts (rowid, name, instructions, ingredient_names)
+            SELECT id, name, instructions, {ingredient_names.format("recipes")} FROM recipes
+        """)
+
+
+# Data versions
+
+def _bump_data_version(c, scope):
+    """Increment the version counter for a data scope inside the caller's transaction."""
+    c.execute(
+        """
+        INSERT INTO data_versions (household_id, scope, version) VALUES (?, ?, 1)
+        ON CONFLICT(household_id, scope) DO UPDATE SET version = version + 1
+        """,
+        (current_household(), scope),
+    )
+
+
+# {household_id: ((write generation, db file mtime), {scope: version})} as of the last read of data_versions
+_versions_snapshot = {}
+
+
+def _db_stamp():
+    """Cheap change marker: commits made by this process, plus the file mtime for writes from other processes."""
+    try:
+        mtime = os.stat(household_db_path()).st_mtime_ns
+    except OSError:
+        mtime = None
+    return _write_generation, mtime
+
+
+def get_data_version(*scopes):
+    """
+    Return a token like 'default:pantry=3,recipes=7' that changes whenever any of the scopes is written
+    for the current household, and differs between households.
+    The data_versions table is only re-read after a commit, so repeated calls between writes cost a stat().
+    """
+    household_id = current_household()
+    stamp = _db_stamp()
+    snapshot_stamp, versions = _versions_snapshot.get(household_id, (None, {}))
+    if snapshot_stamp != stamp:
+        conn = get_connection()
+        c = conn.cursor()
+        c.execute("SELECT scope, version FROM data_versions WHERE household_id = ?", (household_id,))
+        versions = dict(c.fetchall())
+        conn.close()
+        _versions_snapshot[household_id] = (stamp, versions)
+    return f"{household_id}:" + ",".join(f"{scope}={versions.get(scope, 0)}" for scope in scopes)
+
+
 # Ingredient operations
 
 def add_ingredient(name, amount, unit, location="Fridge", expiry_date=None, expiry_estimated=False):
@@ -395,54 +771,163 @@ def add_ingredient(name, amount, unit, location="Fridge", expiry_date=None, expi
     c = conn.cursor()
     now = datetime.now().isoformat()
     c.execute(
-        "INSERT INTO ingredients (name, amount, unit, added_date, updated_date, location, expiry_date, expiry_estimated) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-        (name, amount, unit, now, now, location, expiry_date, 1 if expiry_estimated else 0),
+        "INSERT INTO ingredients (household_id, name, amount, unit, added_date, updated_date, location, expiry_date, expiry_estimated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (current_household(), name, amount, unit, now, now, location, expiry_date, 1 if expiry_estimated else 0),
     )
+    _bump_data_version(c, "pantry")
     conn.commit()
     conn.close()
 
 
-def get_ingredients():
+def get_ingredient_lots():
+    """Return every lot, grouped by ingredient name and ordered earliest-expiring first within each."""
     conn = get_connection()
     c = conn.cursor()
-    c.execute("SELECT id, name, amount, unit, added_date, updated_date, location, expiry_date, expiry_estimated FROM ingredients ORDER BY name")
+    c.execute(
+        f"SELECT {_LOT_COLUMNS} FROM ingredients WHERE household_id = ? ORDER BY LOWER(name), {_LOT_ORDER}",
+        (current_household(),),
+    )
     rows = c.fetchall()
     conn.close()
-    return [
-        {
-            "id": r[0],
-            "name": r[1],
-            "amount": r[2],
-            "unit": r[3],
-            "added_date": r[4],
-            "updated_date": r[5],
-            "location": r[6] if r[6] else "Fridge",
-            "expiry_date": r[7],
-            "expiry_estimated": bool(r[8]),
-        }
-        for r in rows
-    ]
+    return [_lot_from_row(r) for r in rows]
+
+
+def _lot_filter(name=None, location=None, expiring_within=None):
+    """WHERE clause and params for the Pantry table filters (name substring, location, expiring within N days)."""
+    clauses, params = ["household_id = ?"], [current_household()]
+    if name and name.strip():
+        clauses.append("LOWER(name) LIKE ?")
+        params.append(f"%{name.strip().lower()}%")
+    if location:
+        clauses.append("COALESCE(location, 'Fridge') = ?")
+        params.append(location)
+    if expiring_within is not None:
+        clauses.append("expiry_day IS NOT NULL AND expiry_day <= ?")
+        params.append(date.today().toordinal() + expiring_within)
+    return " WHERE " + " AND ".join(clauses), params
+
+
+def get_ingredient_lot_page(name=None, location=None, expiring_within=None, limit=50, offset=0):
+    """Return one page of lots matching the filters, in get_ingredient_lots() order."""
+    where, params = _lot_filter(name, location, expiring_within)
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(
+        f"SELECT {_LOT_COLUMNS} FROM ingredients{where} ORDER BY LOWER(name), {_LOT_ORDER} LIMIT ? OFFSET ?",
+        params + [limit, offset],
+    )
+    rows = c.fetchall()
+    conn.close()
+    return [_lot_from_row(r) for r in rows]
+
+
+def count_ingredient_lots(name=None, location=None, expiring_within=None):
+    """Return how many lots get_ingredient_lot_page() would return without a limit."""
+    where, params = _lot_filter(name, location, expiring_within)
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(f"SELECT COUNT(*) FROM ingredients{where}", params)
+    count = c.fetchone()[0]
+    conn.close()
+    return count
+
+
+def _lot_from_row(r):
+    return {
+        "id": r[0],
+        "name": r[1],
+        "amount": r[2],
+        "unit": r[3],
+        "added_date": r[4],
+        "updated_date": r[5],
+        "location": r[6] if r[6] else "Fridge",
+        "expiry_date": r[7],
+        "expiry_estimated": bool(r[8]),
+        "added_day": r[9],
+        "expiry_day": r[10],
+    }
+
+
+def _aggregate_lots(lots):
+    """
+    Collapse lots (in get_ingredient_lots() order) into one entry per ingredient and unit family.
+
+    The total is expressed in the unit of the first lot, which also supplies id, location and
+    expiry_date — i.e. the entry describes the lot that will be used first.
+    """
+    totals = {}
+    for lot in lots:
+        base_amount, base_unit = _to_base(lot["amount"], lot["unit"])
+        key = (lot["name"].lower(), base_unit)
+        entry = totals.get(key)
+        if entry is None:
+            totals[key] = dict(lot, base_amount=base_amount, lot_count=1)
+            continue
+        entry["base_amount"] += base_amount
+        entry["lot_count"] += 1
+        entry["added_date"] = min(entry["added_date"], lot["added_date"])
+        entry["added_day"] = min(entry["added_day"], lot["added_day"])
+        entry["updated_date"] = max(entry["updated_date"] or "", lot["updated_date"] or "") or None
+
+    result = []
+    for entry in totals.values():
+        entry["amount"] = round(_from_base(entry.pop("base_amount"), entry["unit"]), 3)
+        result.append(entry)
+    return result
+
+
+def get_ingredients():
+    """Return one entry per ingredient (and unit family) with the total across its lots."""
+    return _aggregate_lots(get_ingredient_lots())
 
 
 def get_ingredient_by_name(name):
-    """Return the first ingredient matching name (case-insensitive), or None."""
+    """Return the aggregated ingredient matching name (case-insensitive), or None."""
     conn = get_connection()
     c = conn.cursor()
     c.execute(
-        "SELECT id, name, amount, unit, location FROM ingredients WHERE LOWER(name) = LOWER(?)",
-        (name,),
+        f"SELECT {_LOT_COLUMNS} FROM ingredients WHERE household_id = ? AND LOWER(name) = LOWER(?) ORDER BY {_LOT_ORDER}",
+        (current_household(), name),
     )
-    row = c.fetchone()
+    rows = c.fetchall()
     conn.close()
-    if row:
-        return {"id": row[0], "name": row[1], "amount": row[2], "unit": row[3], "location": row[4]}
-    return None
+    if not rows:
+        return None
+    return _aggregate_lots([_lot_from_row(r) for r in rows])[0]
 
 
 def delete_ingredient(ingredient_id):
     conn = get_connection()
     c = conn.cursor()
-    c.execute("DELETE FROM ingredients WHERE id = ?", (ingredient_id,))
+    c.execute("DELETE FROM ingredients WHERE id = ? AND household_id = ?", (ingredient_id, current_household()))
+    _bump_data_version(c, "pantry")
+    conn.commit()
+    conn.close()
+
+
+def apply_ingredient_changes(updates, deleted_ids):
+    """
+    Write a batch of Pantry table edits in one transaction.
+
+    updates:     dicts with "id", "amount", "location", "expiry_date", "expiry_estimated"
+    deleted_ids: lot ids to remove
+    """
+    if not updates and not deleted_ids:
+        return
+    conn = get_connection()
+    c = conn.cursor()
+    now = datetime.now().isoformat()
+    household_id = current_household()
+    c.executemany(
+        "UPDATE ingredients SET amount = ?, location = ?, expiry_date = ?, expiry_estimated = ?, updated_date = ? "
+        "WHERE id = ? AND household_id = ?",
+        [
+            (u["amount"], u["location"], u["expiry_date"], 1 if u["expiry_estimated"] else 0, now, u["id"], household_id)
+            for u in updates
+        ],
+    )
+    c.executemany("DELETE FROM ingredients WHERE id = ? AND household_id = ?", [(i, household_id) for i in deleted_ids])
+    _bump_data_version(c, "pantry")
     conn.commit()
     conn.close()
 
@@ -450,7 +935,8 @@ def delete_ingredient(ingredient_id):
 def clear_all_ingredients():
     conn = get_connection()
     c = conn.cursor()
-    c.execute("DELETE FROM ingredients")
+    c.execute("DELETE FROM ingredients WHERE household_id = ?", (current_household(),))
+    _bump_data_version(c, "pantry")
     conn.commit()
     conn.close()
 
@@ -459,9 +945,11 @@ def update_ingredient(ingredient_id, amount, location, expiry_date=None, expiry_
     conn = get_connection()
     c = conn.cursor()
     c.execute(
-        "UPDATE ingredients SET amount = ?, location = ?, expiry_date = ?, expiry_estimated = ?, updated_date = ? WHERE id = ?",
-        (amount, location, expiry_date, 1 if expiry_estimated else 0, datetime.now().isoformat(), ingredient_id),
+        "UPDATE ingredients SET amount = ?, location = ?, expiry_date = ?, expiry_estimated = ?, updated_date = ? "
+        "WHERE id = ? AND household_id = ?",
+        (amount, location, expiry_date, 1 if expiry_estimated else 0, datetime.now().isoformat(), ingredient_id, current_household()),
     )
+    _bump_data_version(c, "pantry")
     conn.commit()
     conn.close()
 
@@ -471,9 +959,10 @@ def update_ingredient_expiry(ingredient_id, expiry_date, expiry_estimated=False)
     conn = get_connection()
     c = conn.cursor()
     c.execute(
-        "UPDATE ingredients SET expiry_date = ?, expiry_estimated = ?, updated_date = ? WHERE id = ?",
-        (expiry_date, 1 if expiry_estimated else 0, datetime.now().isoformat(), ingredient_id),
+        "UPDATE ingredients SET expiry_date = ?, expiry_estimated = ?, updated_date = ? WHERE id = ? AND household_id = ?",
+        (expiry_date, 1 if expiry_estimated else 0, datetime.now().isoformat(), ingredient_id, current_household()),
     )
+    _bump_data_version(c, "pantry")
     conn.commit()
     conn.close()
 
@@ -483,22 +972,43 @@ def update_ingredient_amount(ingredient_id, amount):
     conn = get_connection()
     c = conn.cursor()
     c.execute(
-        "UPDATE ingredients SET amount = ?, updated_date = ? WHERE id = ?",
-        (amount, datetime.now().isoformat(), ingredient_id),
+        "UPDATE ingredients SET amount = ?, updated_date = ? WHERE id = ? AND household_id = ?",
+        (amount, datetime.now().isoformat(), ingredient_id, current_household()),
     )
+    _bump_data_version(c, "pantry")
     conn.commit()
     conn.close()
 
 
 # Recipe operations
 
-def add_recipe(name, cooking_time, ingredients, instructions):
+def add_recipe(name, cooking_time, ingredients, instructions, servings=None):
+    add_recipes([{
+        "name": name, "cooking_time": cooking_time, "ingredients": ingredients,
+        "instructions": instructions, "servings": servings,
+    }])
+
+
+def add_recipes(recipes):
+    """
+    Insert several recipes in one transaction (one version bump, one commit).
+
+    recipes: [{"name", "cooking_time", "ingredients", "instructions", "servings" (optional)}]
+    """
+    if not recipes:
+        return
     conn = get_connection()
     c = conn.cursor()
-    c.execute(
-        "INSERT INTO recipes (name, cooking_time, ingredients, instructions, created_at) VALUES (?, ?, ?, ?, ?)",
-        (name, cooking_time, json.dumps(ingredients), instructions, datetime.now().isoformat()),
+    now = datetime.now().isoformat()
+    household_id = current_household()
+    c.executemany(
+        "INSERT INTO recipes (household_id, name, cooking_time, ingredients, instructions, servings, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            (household_id, r["name"], r["cooking_time"], json.dumps(r["ingredients"]), r["instructions"], r.get("servings"), now, now)
+            for r in recipes
+        ],
     )
+    _bump_data_version(c, "recipes")
     conn.commit()
     conn.close()
 
@@ -506,28 +1016,122 @@ def add_recipe(name, cooking_time, ingredients, instructions):
 def get_recipes():
     conn = get_connection()
     c = conn.cursor()
-    c.execute("SELECT id, name, cooking_time, ingredients, instructions FROM recipes ORDER BY name")
+    c.execute(f"SELECT {_RECIPE_COLUMNS} FROM recipes WHERE household_id = ? ORDER BY name", (current_household(),))
     rows = c.fetchall()
     conn.close()
-    return [
-        {
-            "id": r[0],
-            "name": r[1],
-            "cooking_time": r[2],
-            "ingredients": json.loads(r[3]),
-            "instructions": r[4],
-        }
-        for r in rows
-    ]
+    return [_recipe_from_row(r) for r in rows]
+
+
+def _recipe_from_row(r):
+    return {
+        "id": r[0],
+        "name": r[1],
+        "cooking_time": r[2],
+        "ingredients": json.loads(r[3]),
+        "instructions": r[4],
+        "servings": r[5],
+        "updated_at": r[6],
+    }
+
+
+def get_recipe(recipe_id):
+    """Return one recipe by id, or None."""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(f"SELECT {_RECIPE_COLUMNS} FROM recipes WHERE id = ? AND household_id = ?", (recipe_id, current_household()))
+    row = c.fetchone()
+    conn.close()
+    return _recipe_from_row(row) if row else None
+
+
+def _fts_query(query):
+    """Turn free text into an FTS5 query: every word must match, as a prefix."""
+    terms = re.findall(r"\w+", query.lower())
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def search_recipes(query, limit=20, offset=0):
+    """
+    Full-text search over recipe name, instructions and ingredient names.
+
+    Every word must match (as a prefix, so "tom" finds "tomato"); results are ranked by BM25
+    with name matches weighted above ingredients and instructions. An empty query lists all
+    recipes by name. Returns recipe dicts as in get_recipes().
+    """
+    conn = get_connection()
+    c = conn.cursor()
+    household_id = current_household()
+    match = _fts_query(query or "")
+    if not match:
+        c.execute(
+            f"SELECT {_RECIPE_COLUMNS} FROM recipes WHERE household_id = ? ORDER BY name LIMIT ? OFFSET ?",
+            (household_id, limit, offset),
+        )
+    elif _has_table(c, "recipes_fts"):
+        c.execute(
+            f"""SELECT {_RECIPE_COLUMNS} FROM recipes_fts
+                JOIN recipes ON recipes.id = recipes_fts.rowid
+                WHERE recipes_fts MATCH ? AND recipes.household_id = ?
+                ORDER BY bm25(recipes_fts, 10.0, 1.0, 4.0), recipes.name
+                LIMIT ? OFFSET ?""",
+            (match, household_id, limit, offset),
+        )
+    else:
+        where, params = _like_filter(query)
+        c.execute(
+            f"SELECT {_RECIPE_COLUMNS} FROM recipes WHERE household_id = ? AND {where} ORDER BY name LIMIT ? OFFSET ?",
+            (household_id, *params, limit, offset),
+        )
+    rows = c.fetchall()
+    conn.close()
+    return [_recipe_from_row(r) for r in rows]
+
+
+def count_recipe_matches(query):
+    """Return how many recipes search_recipes(query) would return without a limit."""
+    conn = get_connection()
+    c = conn.cursor()
+    household_id = current_household()
+    match = _fts_query(query or "")
+    if not match:
+        c.execute("SELECT COUNT(*) FROM recipes WHERE household_id = ?", (household_id,))
+    elif _has_table(c, "recipes_fts"):
+        # As a join SQLite re-runs the MATCH for every household recipe; the subquery runs it once
+        c.execute(
+            """SELECT COUNT(*) FROM recipes
+               WHERE household_id = ? AND id IN (SELECT rowid FROM recipes_fts WHERE recipes_fts MATCH ?)""",
+            (household_id, match),
+        )
+    else:
+        where, params = _like_filter(query)
+        c.execute(f"SELECT COUNT(*) FROM recipes WHERE household_id = ? AND {where}", (household_id, *params))
+    count = c.fetchone()[0]
+    conn.close()
+    return count
+
+
+def _has_table(c, name):
+    c.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,))
+    return c.fetchone() is not None
 
 
-def update_recipe(recipe_id, name, cooking_time, ingredients, instructions):
+def _like_filter(query):
+    """WHERE clause for the no-FTS5 fallback: every word appears in name, instructions or ingredients."""
+    terms = re.findall(r"\w+", query.lower())
+    clause = "(LOWER(name) LIKE ? OR LOWER(instructions) LIKE ? OR LOWER(ingredients) LIKE ?)"
+    params = [f"%{term}%" for term in terms for _ in range(3)]
+    return " AND ".join([clause] * len(terms)), params
+
+
+def update_recipe(recipe_id, name, cooking_time, ingredients, instructions, servings=None):
     conn = get_connection()
     c = conn.cursor()
     c.execute(
-        "UPDATE recipes SET name = ?, cooking_time = ?, ingredients = ?, instructions = ? WHERE id = ?",
-        (name, cooking_time, json.dumps(ingredients), instructions, recipe_id),
+        "UPDATE recipes SET name = ?, cooking_time = ?, ingredients = ?, instructions = ?, servings = ?, updated_at = ? "
+        "WHERE id = ? AND household_id = ?",
+        (name, cooking_time, json.dumps(ingredients), instructions, servings, datetime.now().isoformat(), recipe_id, current_household()),
     )
+    _bump_data_version(c, "recipes")
     conn.commit()
     conn.close()
 
@@ -535,21 +1139,67 @@ def update_recipe(recipe_id, name, cooking_time, ingredients, instructions):
 def delete_recipe(recipe_id):
     conn = get_connection()
     c = conn.cursor()
-    c.execute("DELETE FROM recipes WHERE id = ?", (recipe_id,))
-    c.execute("DELETE FROM recipe_usage WHERE recipe_id = ?", (recipe_id,))
+    household_id = current_household()
+    c.execute("DELETE FROM recipes WHERE id = ? AND household_id = ?", (recipe_id, household_id))
+    c.execute("DELETE FROM recipe_usage WHERE household_id = ? AND recipe_id = ?", (household_id, recipe_id))
+    _bump_data_version(c, "recipes")
+    _bump_data_version(c, "usage")
     conn.commit()
     conn.close()
 
 
+# Recipe scaling
+
+_scaled_ingredients = {}
+_SCALED_CACHE_SIZE = 512
+
+
+def servings_factor(recipe, servings):
+    """Multiplier to cook recipe for `servings` people; 1 when the recipe's yield or servings is unknown."""
+    if not servings or not recipe.get("servings"):
+        return 1
+    return servings / recipe["servings"]
+
+
+def scaled_ingredients(recipe, servings=None):
+    """
+    Return the recipe's ingredient list scaled to `servings`.
+
+    Scaled lists are memoized per (household, recipe id, updated_at, factor), so repeated projections over the
+    same plan reuse them. An ingredient without an amount keeps None. The returned list is shared — callers
+    must not modify it.
+    """
+    factor = servings_factor(recipe, servings)
+    if factor == 1:
+        return recipe["ingredients"]
+    key = (current_household(), recipe.get("id"), recipe.get("updated_at"), factor)
+    cached = _scaled_ingredients.get(key)
+    if cached is None:
+        if len(_scaled_ingredients) >= _SCALED_CACHE_SIZE:
+            _scaled_ingredients.clear()
+        cached = [
+            dict(ing, amount=round(ing["amount"] * factor, 3) if ing["amount"] is not None else None)
+            for ing in recipe["ingredients"]
+        ]
+        _scaled_ingredients[key] = cached
+    return cached
+
+
+def scale_recipes(recipes, servings):
+    """Return copies of recipes whose ingredient lists are scaled to `servings`."""
+    return [dict(r, ingredients=scaled_ingredients(r, servings)) for r in recipes]
+
+
 # Usage tracking
 
 def log_recipe_cooked(recipe_id):
     conn = get_connection()
     c = conn.cursor()
     c.execute(
-        "INSERT INTO recipe_usage (recipe_id, cooked_at) VALUES (?, ?)",
-        (recipe_id, datetime.now().isoformat()),
+        "INSERT INTO recipe_usage (household_id, recipe_id, cooked_at) VALUES (?, ?, ?)",
+        (current_household(), recipe_id, datetime.now().isoformat()),
     )
+    _bump_data_version(c, "usage")
     conn.commit()
     conn.close()
 
@@ -560,11 +1210,12 @@ def get_most_cooked_recipes(limit=5):
     c.execute("""
         SELECT r.name, COUNT(ru.id) as cook_count
         FROM recipes r
-        JOIN recipe_usage ru ON r.id = ru.recipe_id
+        JOIN recipe_usage ru ON ru.household_id = r.household_id AND ru.recipe_id = r.id
+        WHERE r.household_id = ?
         GROUP BY r.id, r.name
         ORDER BY cook_count DESC
         LIMIT ?
-    """, (limit,))
+    """, (current_household(), limit))
     rows = c.fetchall()
     conn.close()
     return [{"name": r[0], "count": r[1]} for r in rows]
@@ -577,9 +1228,10 @@ def get_most_used_ingredients(limit=5):
     c.execute("""
         SELECT r.ingredients, COUNT(ru.id) as cook_count
         FROM recipes r
-        JOIN recipe_usage ru ON r.id = ru.recipe_id
+        JOIN recipe_usage ru ON ru.household_id = r.household_id AND ru.recipe_id = r.id
+        WHERE r.household_id = ?
         GROUP BY r.id
-    """)
+    """, (current_household(),))
     rows = c.fetchall()
     conn.close()
 
@@ -595,17 +1247,22 @@ def get_most_used_ingredients(limit=5):
     return [{"name": name.title(), "count": count} for name, count in sorted_ingredients[:limit]]
 
 
-def get_cookable_recipes():
-    """Return recipes where all ingredients are present in sufficient quantity."""
-    fridge = get_ingredients()
+def get_cookable_recipes(servings=None):
+    """Return recipes where all ingredients are present in sufficient quantity.
+    Amounts are scaled to `servings` (default: the household size)."""
+    if servings is None:
+        from pantry_index import get_coverage_index
+        return get_coverage_index().cookable_recipes()
+
     recipes = get_recipes()
-    fridge_map = {i["name"].lower(): i for i in fridge}
+    aliases = get_ingredient_aliases()
+    fridge_map = canonical_pantry(get_ingredients(), aliases)
 
     cookable = []
     for recipe in recipes:
         can_cook = True
-        for ing in recipe["ingredients"]:
-            fridge_item = fridge_map.get(ing["name"].lower())
+        for ing in scaled_ingredients(recipe, servings):
+            fridge_item = fridge_map.get(canonical_name(ing["name"], aliases))
             if not fridge_item:
                 can_cook = False
                 break
@@ -618,48 +1275,161 @@ def get_cookable_recipes():
     return cookable
 
 
-def deduct_recipe_ingredients(recipe_id):
-    """Subtract recipe ingredient amounts from the fridge after cooking."""
+def deduct_recipe_ingredients(recipe_id, servings=None):
+    """Subtract recipe ingredient amounts from the fridge after cooking.
+    Amounts are scaled to `servings` (default: the household size)."""
+    if servings is None:
+        servings = get_household_size()
+    household_id = current_household()
+    aliases = get_ingredient_aliases()
     conn = get_connection()
     c = conn.cursor()
-    c.execute("SELECT ingredients FROM recipes WHERE id = ?", (recipe_id,))
+    c.execute(
+        "SELECT id, ingredients, servings, COALESCE(updated_at, created_at) FROM recipes WHERE id = ? AND household_id = ?",
+        (recipe_id, household_id),
+    )
     row = c.fetchone()
     if not row:
         conn.close()
         return
-    ingredients = json.loads(row[0])
+    recipe = {"id": row[0], "ingredients": json.loads(row[1]), "servings": row[2], "updated_at": row[3]}
+    ingredients = scaled_ingredients(recipe, servings)
+    now = datetime.now().isoformat()
+    # Lots by canonical name, so stock under an alias is used for the canonical ingredient and vice versa
+    lots_by_name = {}
+    c.execute(f"SELECT id, name, amount, unit FROM ingredients WHERE household_id = ? ORDER BY {_LOT_ORDER}", (household_id,))
+    for lot_id, name, lot_amount, lot_unit in c.fetchall():
+        lots_by_name.setdefault(canonical_name(name, aliases), []).append([lot_id, lot_amount, lot_unit])
     for ing in ingredients:
-        c.execute(
-            "SELECT id, amount, unit FROM ingredients WHERE LOWER(name) = LOWER(?)",
-            (ing["name"],),
-        )
-        fridge_row = c.fetchone()
-        if not fridge_row:
-            continue
-        fridge_id, fridge_amount, fridge_unit = fridge_row
-        f_base, f_base_unit = _to_base(fridge_amount, fridge_unit)
         n_base, n_base_unit = _to_base(ing["amount"], ing["unit"])
-        if f_base_unit != n_base_unit:
-            continue  # incomparable units — skip
-        remaining = _from_base(max(0, f_base - n_base), fridge_unit)
-        if remaining <= 0:
-            c.execute("DELETE FROM ingredients WHERE id = ?", (fridge_id,))
-        else:
-            c.execute(
-                "UPDATE ingredients SET amount = ?, updated_date = ? WHERE id = ?",
-                (round(remaining, 3), datetime.now().isoformat(), fridge_id),
-            )
+        if n_base is None:
+            continue  # no amount to deduct
+        # Walk this ingredient's lots earliest-expiring first and stop once the need is met
+        for lot in lots_by_name.get(canonical_name(ing["name"], aliases), []):
+            lot_id, lot_amount, lot_unit = lot
+            if n_base <= 0:
+                break
+            f_base, f_base_unit = _to_base(lot_amount, lot_unit)
+            if f_base_unit != n_base_unit or f_base <= 0:
+                continue  # incomparable units, or used up by an earlier ingredient — skip this lot
+            used = min(f_base, n_base)
+            n_base -= used
+            remaining = _from_base(f_base - used, lot_unit)
+            lot[1] = max(remaining, 0)
+            if remaining <= 0:
+                c.execute("DELETE FROM ingredients WHERE id = ?", (lot_id,))
+            else:
+                c.execute(
+                    "UPDATE ingredients SET amount = ?, updated_date = ? WHERE id = ?",
+                    (round(remaining, 3), now, lot_id),
+                )
+    _bump_data_version(c, "pantry")
     conn.commit()
     conn.close()
 
 
-def get_shopping_plan(meal_plan, recipes):
+def build_inventory(fridge, aliases=None):
     """
-    Project ingredient depletion across a meal plan and return a shopping plan.
-
-    meal_plan: {key: recipe_name} where key is either a plain date_str ("2026-02-24")
-               or a date+meal composite ("2026-02-24_Dinner"). Only home meals (no special values).
-    recipes:   full recipe list from get_recipes()
+    Build a running inventory keyed by canonical lowercase name, storing amounts in base units.
+
+    With aliases (from get_ingredient_aliases()), stock listed under an alias is merged into its
+    canonical entry, and each alias key points at that same entry so both names share one balance.
+    """
+    inventory = {}
+    for item in fridge:
+        key = canonical_name(item["name"], aliases)
+        base_amt, base_unit = _to_base(item["amount"], item["unit"])
+        existing = inventory.get(key)
+        if existing is not None:
+            if existing["base_unit"] == base_unit:
+                existing["base_amount"] += base_amt
+                existing["original_amount"] = round(_from_base(existing["base_amount"], existing["original_unit"]), 3)
+            continue  # incomparable units under one name — keep the first
+        inventory[key] = {
+            "key": key,
+            "base_amount": base_amt,
+            "base_unit": base_unit,
+            "original_unit": item["unit"],
+            "display_name": item["name"],
+            "original_amount": item["amount"],
+        }
+    for alias, canonical in (aliases or {}).items():
+        if canonical in inventory:
+            inventory.setdefault(alias, inventory[canonical])
+    return inventory
+
+
+def consume_from_inventory(inventory, ing, dry_run=False):
+    """
+    Deduct one recipe ingredient from a running inventory built by build_inventory().
+
+    Returns (status, before_base) where status is "ok", "short", "missing" or
+    "incomparable" and before_base is the base amount on hand before the deduction.
+    With dry_run=True the inventory is left untouched.
+    """
+    item = inventory.get(ing["name"].lower())
+    if item is None:
+        return "missing", 0
+    n_base, n_base_unit = _to_base(ing["amount"], ing["unit"])
+    if item["base_unit"] != n_base_unit:
+        return "incomparable", item["base_amount"]  # e.g. grams vs cups — skip
+    before = item["base_amount"]
+    if not dry_run:
+        item["base_amount"] = max(0, before - n_base)
+    return ("short" if before < n_base else "ok"), before
+
+
+def make_shortage(ing, status, before, item, day_str, recipe_name):
+    """Build one get_shopping_plan() item for a "missing" or "short" result of consume_from_inventory()."""
+    if status == "missing":
+        return {
+            "name": ing["name"],
+            "need_amount": ing["amount"],
+            "need_unit": ing["unit"],
+            "have_amount": 0,
+            "have_unit": ing["unit"],
+            "runs_out_on": day_str,
+            "recipe": recipe_name,
+        }
+    return {  # had less than needed
+        "name": item["display_name"],
+        "need_amount": ing["amount"],
+        "need_unit": ing["unit"],
+        "have_amount": round(_from_base(before, item["original_unit"]), 3),
+        "have_unit": item["original_unit"],
+        "runs_out_on": day_str,
+        "recipe": recipe_name,
+    }
+
+
+def recipe_base_demand(recipe, inventory):
+    """
+    Total a recipe's demand in the base units of an inventory built by build_inventory().
+
+    Returns ({ingredient_key: base_amount}, missing_names). Ingredients absent from the
+    inventory are listed in missing_names; incomparable units are skipped, as in get_shopping_plan.
+    """
+    demand, missing = {}, []
+    for ing in recipe["ingredients"]:
+        item = inventory.get(ing["name"].lower())
+        if item is None:
+            missing.append(ing["name"])
+            continue
+        n_base, n_base_unit = _to_base(ing["amount"], ing["unit"])
+        if item["base_unit"] != n_base_unit:
+            continue
+        demand[item["key"]] = demand.get(item["key"], 0) + n_base
+    return demand, missing
+
+
+def get_shopping_plan(meal_plan, recipes, servings=None):
+    """
+    Project ingredient depletion across a meal plan and return a shopping plan.
+
+    meal_plan: {key: recipe_name} where key is either a plain date_str ("2026-02-24")
+               or a date+meal composite ("2026-02-24_Dinner"). Only home meals (no special values).
+    recipes:   full recipe list from get_recipes()
+    servings:  {key: people} per slot; defaults to get_slot_servings(meal_plan)
 
     Returns:
     {
@@ -668,7 +1438,7 @@ def get_shopping_plan(meal_plan, recipes):
         "items": [
             {
                 "name": str,
-                "need_amount": float, "need_unit": str,   # per recipe serving
+                "need_amount": float, "need_unit": str,   # scaled to the slot's servings
                 "have_amount": float, "have_unit": str,   # what was left before shortage
                 "runs_out_on": date_str,
                 "recipe": str,
@@ -676,25 +1446,19 @@ def get_shopping_plan(meal_plan, recipes):
         ]
     }
     """
-    fridge = get_ingredients()
+    if servings is None:
+        servings = get_slot_servings(meal_plan)
+    return _plan_shopping(meal_plan, recipes, servings, build_inventory(get_ingredients(), get_ingredient_aliases()))
+
+
+def _plan_shopping(meal_plan, recipes, servings, inventory):
+    """get_shopping_plan() against an already built inventory."""
     recipe_map = {r["name"]: r for r in recipes}
 
     def _extract_date(key):
         """Extract ISO date portion from a key that may be 'YYYY-MM-DD' or 'YYYY-MM-DD_MealType'."""
         return key[:10]
 
-    # Build running inventory keyed by lowercase name, storing base amounts
-    inventory = {}
-    for item in fridge:
-        base_amt, base_unit = _to_base(item["amount"], item["unit"])
-        inventory[item["name"].lower()] = {
-            "base_amount": base_amt,
-            "base_unit": base_unit,
-            "original_unit": item["unit"],
-            "display_name": item["name"],
-            "original_amount": item["amount"],
-        }
-
     shortages = []
 
     for key in sorted(meal_plan.keys()):
@@ -702,39 +1466,10 @@ def get_shopping_plan(meal_plan, recipes):
         recipe = recipe_map.get(meal_plan[key])
         if not recipe:
             continue
-        for ing in recipe["ingredients"]:
-            ing_key = ing["name"].lower()
-            n_base, n_base_unit = _to_base(ing["amount"], ing["unit"])
-
-            if ing_key not in inventory:
-                shortages.append({
-                    "name": ing["name"],
-                    "need_amount": ing["amount"],
-                    "need_unit": ing["unit"],
-                    "have_amount": 0,
-                    "have_unit": ing["unit"],
-                    "runs_out_on": day_str,
-                    "recipe": recipe["name"],
-                })
-                continue
-
-            item = inventory[ing_key]
-            if item["base_unit"] != n_base_unit:
-                continue  # incomparable — skip
-
-            before = item["base_amount"]
-            item["base_amount"] = max(0, item["base_amount"] - n_base)
-
-            if before < n_base:  # had less than needed
-                shortages.append({
-                    "name": item["display_name"],
-                    "need_amount": ing["amount"],
-                    "need_unit": ing["unit"],
-                    "have_amount": round(_from_base(before, item["original_unit"]), 3),
-                    "have_unit": item["original_unit"],
-                    "runs_out_on": day_str,
-                    "recipe": recipe["name"],
-                })
+        for ing in scaled_ingredients(recipe, servings.get(key)):
+            status, before = consume_from_inventory(inventory, ing)
+            if status in ("missing", "short"):
+                shortages.append(make_shortage(ing, status, before, inventory.get(ing["name"].lower()), day_str, recipe["name"]))
 
     if not shortages:
         return {"fully_covered": True, "shop_by": None, "items": []}
@@ -746,36 +1481,33 @@ def get_shopping_plan(meal_plan, recipes):
 
 
 def get_expiring_soon_ingredients(days=3):
-    """Return ingredients with expiry_date set that expire within `days` days (including already expired)."""
+    """
+    Return lots with expiry_date set that expire within `days` days (including already expired),
+    with "expiry_day" and "days_left" so callers don't parse dates.
+    """
     conn = get_connection()
     c = conn.cursor()
-    threshold = (date.today() + timedelta(days=days)).isoformat()
+    today = date.today().toordinal()
     c.execute(
-        """SELECT id, name, amount, unit, location, expiry_date
+        """SELECT id, name, amount, unit, location, expiry_date, expiry_day
            FROM ingredients
-           WHERE expiry_date IS NOT NULL AND expiry_date <= ?
-           ORDER BY expiry_date ASC""",
-        (threshold,),
+           WHERE household_id = ? AND expiry_day IS NOT NULL AND expiry_day <= ?
+           ORDER BY expiry_day ASC""",
+        (current_household(), today + days),
     )
     rows = c.fetchall()
     conn.close()
     return [
-        {"id": r[0], "name": r[1], "amount": r[2], "unit": r[3], "location": r[4], "expiry_date": r[5]}
+        {"id": r[0], "name": r[1], "amount": r[2], "unit": r[3], "location": r[4], "expiry_date": r[5],
+         "expiry_day": r[6], "days_left": r[6] - today}
         for r in rows
     ]
 
 
 def get_forgotten_ingredients():
-    """Return fridge ingredients not used in any saved recipe."""
-    fridge = get_ingredients()
-    recipes = get_recipes()
-
-    recipe_ingredient_names = set()
-    for recipe in recipes:
-        for ing in recipe["ingredients"]:
-            recipe_ingredient_names.add(ing["name"].lower())
-
-    return [ing for ing in fridge if ing["name"].lower() not in recipe_ingredient_names]
+    """Return fridge ingredients not used in any saved recipe (names resolved through confirmed aliases)."""
+    from pantry_index import get_coverage_index
+    return get_coverage_index().forgotten_ingredients()
 
 
 # Meal plan operations
@@ -786,12 +1518,13 @@ def save_meal_entry(date_str, meal_type, meal):
     c = conn.cursor()
     c.execute(
         """
-        INSERT INTO meal_plan (plan_date, meal_type, meal, updated_at)
-        VALUES (?, ?, ?, ?)
-        ON CONFLICT(plan_date, meal_type) DO UPDATE SET meal = excluded.meal, updated_at = excluded.updated_at
+        INSERT INTO meal_plan (household_id, plan_date, meal_type, meal, updated_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(household_id, plan_date, meal_type) DO UPDATE SET meal = excluded.meal, updated_at = excluded.updated_at
         """,
-        (date_str, meal_type, meal, datetime.now().isoformat()),
+        (current_household(), date_str, meal_type, meal, datetime.now().isoformat()),
     )
+    _bump_data_version(c, "meal_plan")
     conn.commit()
     conn.close()
 
@@ -801,8 +1534,9 @@ def get_meal_entries(start_date_str, end_date_str):
     conn = get_connection()
     c = conn.cursor()
     c.execute(
-        "SELECT plan_date, meal_type, meal FROM meal_plan WHERE plan_date BETWEEN ? AND ? ORDER BY plan_date, meal_type",
-        (start_date_str, end_date_str),
+        "SELECT plan_date, meal_type, meal FROM meal_plan WHERE household_id = ? AND plan_day BETWEEN ? AND ? "
+        "ORDER BY plan_day, meal_type",
+        (current_household(), day_number(start_date_str), day_number(end_date_str)),
     )
     rows = c.fetchall()
     conn.close()
@@ -815,14 +1549,54 @@ def get_meal_entries(start_date_str, end_date_str):
     return result
 
 
+def set_meal_servings(date_str, meal_type, servings):
+    """Set how many people a planned slot is cooked for (None falls back to the household size)."""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(
+        "UPDATE meal_plan SET servings = ?, updated_at = ? WHERE household_id = ? AND plan_date = ? AND meal_type = ?",
+        (servings, datetime.now().isoformat(), current_household(), date_str, meal_type),
+    )
+    _bump_data_version(c, "meal_plan")
+    conn.commit()
+    conn.close()
+
+
+def get_meal_servings(start_date_str, end_date_str):
+    """Return {"YYYY-MM-DD_MealType": servings} for slots in the range with an explicit servings count."""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(
+        "SELECT plan_date, meal_type, servings FROM meal_plan "
+        "WHERE household_id = ? AND plan_day BETWEEN ? AND ? AND servings IS NOT NULL",
+        (current_household(), day_number(start_date_str), day_number(end_date_str)),
+    )
+    rows = c.fetchall()
+    conn.close()
+    return {f"{plan_date}_{meal_type}": servings for plan_date, meal_type, servings in rows}
+
+
+def get_slot_servings(meal_plan):
+    """
+    Resolve servings for each "YYYY-MM-DD_MealType" key of meal_plan: the slot's own count,
+    else the household size, else None (cook the recipe as written).
+    """
+    if not meal_plan:
+        return {}
+    dates = [key[:10] for key in meal_plan]
+    explicit = get_meal_servings(min(dates), max(dates))
+    household = get_household_size()
+    return {key: explicit.get(key, household) for key in meal_plan}
+
+
 def get_meals_for_date(date_str):
     """Return {"Breakfast": meal, "Lunch": meal, "Dinner": meal} for one date. Missing types -> UNPLANNED."""
     UNPLANNED = "— Unplanned —"
     conn = get_connection()
     c = conn.cursor()
     c.execute(
-        "SELECT meal_type, meal FROM meal_plan WHERE plan_date = ?",
-        (date_str,),
+        "SELECT meal_type, meal FROM meal_plan WHERE household_id = ? AND plan_date = ?",
+        (current_household(), date_str),
     )
     rows = c.fetchall()
     conn.close()
@@ -841,28 +1615,81 @@ def get_recipe_cook_counts():
     c.execute("""
         SELECT r.name, COUNT(ru.id) as cook_count
         FROM recipes r
-        LEFT JOIN recipe_usage ru ON r.id = ru.recipe_id
+        LEFT JOIN recipe_usage ru ON ru.household_id = r.household_id AND ru.recipe_id = r.id
+        WHERE r.household_id = ?
         GROUP BY r.id, r.name
-    """)
+    """, (current_household(),))
     rows = c.fetchall()
     conn.close()
     return {name: count for name, count in rows}
 
 
-def get_recipe_pantry_status(recipe):
+def get_recipe_meal_type_counts():
+    """Return {recipe_name: {meal_type: count}} from how often each meal has been planned in each slot type."""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(
+        "SELECT meal, meal_type, COUNT(*) FROM meal_plan WHERE household_id = ? GROUP BY meal, meal_type",
+        (current_household(),),
+    )
+    rows = c.fetchall()
+    conn.close()
+
+    result = {}
+    for meal, meal_type, count in rows:
+        result.setdefault(meal, {})[meal_type] = count
+    return result
+
+
+def get_recipe_pantry_status(recipe, servings=None):
     """
-    Compare a recipe's ingredients against the current pantry.
+    Compare a recipe's ingredients, scaled to `servings` (default: the household size), against the current pantry.
     Returns a list of dicts:
       {"name", "amount", "unit", "status": "ok" | "short" | "missing",
        "have_amount", "have_unit"}
     """
-    pantry = get_ingredients()
-    pantry_map = {i["name"].lower(): i for i in pantry}
+    if servings is None:
+        from pantry_index import get_coverage_index
+        index = get_coverage_index()
+        if index.has_recipe(recipe):
+            return index.recipe_status(recipe["id"])
+        servings = get_household_size()
+
+    aliases = get_ingredient_aliases()
+    pantry_map = canonical_pantry(get_ingredients(), aliases)
+    return _pantry_status(recipe, servings, pantry_map, aliases)
+
+
+def get_pantry_status_for_recipes(recipe_ids, servings=None):
+    """
+    Batched get_recipe_pantry_status(): {recipe_id: status list} for several recipes, computed from
+    one pantry snapshot. Ids that no longer exist are left out.
+    """
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return {}
+    if servings is None:
+        from pantry_index import get_coverage_index
+        index = get_coverage_index()
+        return {rid: index.recipe_status(rid) for rid in recipe_ids if rid in index.recipes}
+
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(
+        f"SELECT {_RECIPE_COLUMNS} FROM recipes WHERE household_id = ? AND id IN ({','.join('?' * len(recipe_ids))})",
+        [current_household(), *recipe_ids],
+    )
+    recipes = [_recipe_from_row(r) for r in c.fetchall()]
+    conn.close()
+    aliases = get_ingredient_aliases()
+    pantry_map = canonical_pantry(get_ingredients(), aliases)
+    return {r["id"]: _pantry_status(r, servings, pantry_map, aliases) for r in recipes}
 
+
+def _pantry_status(recipe, servings, pantry_map, aliases):
     result = []
-    for ing in recipe["ingredients"]:
-        key = ing["name"].lower()
-        item = pantry_map.get(key)
+    for ing in scaled_ingredients(recipe, servings):
+        item = pantry_map.get(canonical_name(ing["name"], aliases))
         if not item:
             result.append({
                 "name": ing["name"], "amount": ing["amount"], "unit": ing["unit"],
@@ -878,13 +1705,313 @@ def get_recipe_pantry_status(recipe):
     return result
 
 
+# Ingredient name aliases
+
+def canonical_name(name, aliases=None):
+    """Resolve an ingredient name to its canonical lowercase key through a confirmed alias map."""
+    key = name.strip().lower()
+    return aliases.get(key, key) if aliases else key
+
+
+def canonical_pantry(pantry, aliases=None):
+    """
+    Key pantry entries (from get_ingredients()) by canonical name, summing the stock held under an alias
+    and under its canonical name. The first entry supplies the unit and other fields; entries in an
+    incomparable unit family are left out of the total, as in build_inventory().
+    """
+    merged = {}
+    for item in pantry:
+        key = canonical_name(item["name"], aliases)
+        entry = merged.get(key)
+        if entry is None:
+            merged[key] = dict(item)
+            continue
+        base_amount, base_unit = _to_base(item["amount"], item["unit"])
+        entry_base, entry_base_unit = _to_base(entry["amount"], entry["unit"])
+        if base_unit == entry_base_unit:
+            entry["amount"] = round(_from_base(entry_base + base_amount, entry["unit"]), 3)
+    return merged
+
+
+def get_ingredient_aliases():
+    """Return confirmed aliases as {alias: canonical}, both lowercase."""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(
+        "SELECT alias, canonical FROM ingredient_aliases WHERE household_id = ? AND status = 'confirmed'",
+        (current_household(),),
+    )
+    rows = c.fetchall()
+    conn.close()
+    return dict(rows)
+
+
+def get_alias_suggestions():
+    """Return pending alias suggestions, best match first."""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(
+        "SELECT alias, canonical, score FROM ingredient_aliases WHERE household_id = ? AND status = 'suggested' "
+        "ORDER BY score DESC, alias",
+        (current_household(),),
+    )
+    rows = c.fetchall()
+    conn.close()
+    return [{"alias": r[0], "canonical": r[1], "score": r[2]} for r in rows]
+
+
+def get_known_alias_names():
+    """Return every alias with a row in the table (suggested, confirmed or rejected)."""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("SELECT alias FROM ingredient_aliases WHERE household_id = ?", (current_household(),))
+    rows = c.fetchall()
+    conn.close()
+    return {r[0] for r in rows}
+
+
+def suggest_ingredient_aliases(suggestions):
+    """Store (alias, canonical, score) suggestions; names already suggested, confirmed or rejected are left alone."""
+    conn = get_connection()
+    c = conn.cursor()
+    now = datetime.now().isoformat()
+    household_id = current_household()
+    c.executemany(
+        "INSERT OR IGNORE INTO ingredient_aliases (household_id, alias, canonical, status, score, updated_at) "
+        "VALUES (?, ?, ?, 'suggested', ?, ?)",
+        [(household_id, alias.lower(), canonical.lower(), score, now) for alias, canonical, score in suggestions],
+    )
+    _bump_data_version(c, "aliases")
+    conn.commit()
+    conn.close()
+
+
+def set_ingredient_alias_status(alias, status, canonical=None):
+    """Confirm or reject an alias ('confirmed' / 'rejected'), optionally changing its canonical name."""
+    conn = get_connection()
+    c = conn.cursor()
+    now = datetime.now().isoformat()
+    household_id = current_household()
+    if canonical is None:
+        c.execute(
+            "UPDATE ingredient_aliases SET status = ?, updated_at = ? WHERE household_id = ? AND alias = ?",
+            (status, now, household_id, alias.lower()),
+        )
+    else:
+        c.execute(
+            """
+            INSERT INTO ingredient_aliases (household_id, alias, canonical, status, updated_at) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(household_id, alias) DO UPDATE SET
+                canonical = excluded.canonical, status = excluded.status, updated_at = excluded.updated_at
+            """,
+            (household_id, alias.lower(), canonical.lower(), status, now),
+        )
+    _bump_data_version(c, "pantry")  # matching changed, so every pantry projection is stale
+    _bump_data_version(c, "aliases")
+    conn.commit()
+    conn.close()
+
+
+def delete_ingredient_alias(alias):
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("DELETE FROM ingredient_aliases WHERE household_id = ? AND alias = ?", (current_household(), alias.lower()))
+    _bump_data_version(c, "pantry")
+    _bump_data_version(c, "aliases")
+    conn.commit()
+    conn.close()
+
+
+# Dashboard
+
+def get_dashboard_snapshot(today, horizon_days=7, expiring_days=3, thaw_days=2, stats_limit=5):
+    """
+    Everything the Home page shows, read in one transaction with six queries.
+
+    today:         the date the dashboard is for (may differ from date.today() when overridden)
+    horizon_days:  length of the meal-plan window starting today
+    expiring_days: lots expiring within this many days of today (including already expired)
+    thaw_days:     how many days ahead to look for planned meals that need frozen ingredients
+    stats_limit:   length of the most cooked / most used lists
+
+    Returns:
+    {
+        "meals": {date_str: {"Breakfast": meal, "Lunch": meal, "Dinner": meal}},  # every day, UNPLANNED filled in
+        "home_meals": {"YYYY-MM-DD_MealType": recipe_name},  # planned home meals in the window
+        "pantry": [...],         # get_ingredients() form
+        "expiring": [...],       # get_expiring_soon_ingredients() form, days_left relative to today
+        "forgotten": [...],      # get_forgotten_ingredients() form
+        "thaw": [{"date": date_str, "days_ahead": int, "meal": str, "ingredients": [name, ...]}],
+        "shopping_plan": {...} | None,  # get_shopping_plan() for home_meals, None if nothing is planned
+        "most_cooked": [...],    # get_most_cooked_recipes() form
+        "most_used": [...],      # get_most_used_ingredients() form
+    }
+    """
+    UNPLANNED = "— Unplanned —"
+    first_day = today.toordinal()
+    dates = [date.fromordinal(first_day + i).isoformat() for i in range(horizon_days)]
+
+    household_id = current_household()
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("BEGIN")
+    c.execute(
+        f"SELECT {_LOT_COLUMNS} FROM ingredients WHERE household_id = ? ORDER BY LOWER(name), {_LOT_ORDER}",
+        (household_id,),
+    )
+    lots = [_lot_from_row(r) for r in c.fetchall()]
+    c.execute(f"SELECT {_RECIPE_COLUMNS} FROM recipes WHERE household_id = ? ORDER BY name", (household_id,))
+    recipes = [_recipe_from_row(r) for r in c.fetchall()]
+    c.execute(
+        "SELECT plan_date, meal_type, meal, servings FROM meal_plan WHERE household_id = ? AND plan_day BETWEEN ? AND ?",
+        (household_id, first_day, first_day + horizon_days - 1),
+    )
+    plan_rows = c.fetchall()
+    c.execute(
+        "SELECT alias, canonical FROM ingredient_aliases WHERE household_id = ? AND status = 'confirmed'",
+        (household_id,),
+    )
+    aliases = dict(c.fetchall())
+    c.execute("SELECT value FROM settings WHERE household_id = ? AND key = 'household_size'", (household_id,))
+    row = c.fetchone()
+    household = int(row[0]) if row and row[0] else None
+    c.execute("""
+        SELECT r.name, r.ingredients, COUNT(ru.id) as cook_count
+        FROM recipes r
+        JOIN recipe_usage ru ON ru.household_id = r.household_id AND ru.recipe_id = r.id
+        WHERE r.household_id = ?
+        GROUP BY r.id, r.name
+    """, (household_id,))
+    usage_rows = c.fetchall()
+    conn.commit()
+    conn.close()
+
+    # Meal plan
+    meals = {d: {"Breakfast": UNPLANNED, "Lunch": UNPLANNED, "Dinner": UNPLANNED} for d in dates}
+    home_meals, servings = {}, {}
+    for plan_date, meal_type, meal, slot_servings in plan_rows:
+        if meal_type in meals[plan_date]:
+            meals[plan_date][meal_type] = meal
+        if meal != UNPLANNED and not meal.startswith("🍽️") and not meal.startswith("🏖️"):
+            key = f"{plan_date}_{meal_type}"
+            home_meals[key] = meal
+            servings[key] = slot_servings or household
+
+    # Pantry
+    pantry = _aggregate_lots(lots)
+    expiring = sorted(
+        (lot for lot in lots if lot["expiry_day"] is not None and lot["expiry_day"] <= first_day + expiring_days),
+        key=lambda lot: lot["expiry_day"],
+    )
+    expiring = [
+        {"id": lot["id"], "name": lot["name"], "amount": lot["amount"], "unit": lot["unit"], "location": lot["location"],
+         "expiry_date": lot["expiry_date"], "expiry_day": lot["expiry_day"], "days_left": lot["expiry_day"] - first_day}
+        for lot in expiring
+    ]
+    used = {canonical_name(ing["name"], aliases) for r in recipes for ing in r["ingredients"]}
+    forgotten = [item for item in pantry if canonical_name(item["name"], aliases) not in used]
+
+    # Thaw reminders: an ingredient is frozen if any of its stock, under its name or an alias, is in the freezer
+    frozen_names = {}
+    for item in pantry:
+        if item["location"] == "Freezer":
+            frozen_names.setdefault(canonical_name(item["name"], aliases), item["name"])
+    recipe_map = {r["name"]: r for r in recipes}
+    thaw = []
+    for days_ahead in range(1, thaw_days + 1):
+        if days_ahead >= horizon_days:
+            break
+        date_str = dates[days_ahead]
+        for meal_type, meal in meals[date_str].items():
+            recipe = recipe_map.get(meal)
+            if not recipe or f"{date_str}_{meal_type}" not in home_meals:
+                continue
+            keys = dict.fromkeys(canonical_name(ing["name"], aliases) for ing in recipe["ingredients"])
+            frozen = [frozen_names[k] for k in keys if k in frozen_names]
+            if frozen:
+                thaw.append({"date": date_str, "days_ahead": days_ahead, "meal": meal, "ingredients": frozen})
+
+    shopping_plan = None
+    if home_meals:
+        shopping_plan = _plan_shopping(home_meals, recipes, servings, build_inventory(pantry, aliases))
+
+    # Cooking stats
+    most_cooked = sorted(usage_rows, key=lambda r: r[2], reverse=True)[:stats_limit]
+    ingredient_counts = {}
+    for _, ingredients_json, cook_count in usage_rows:
+        for ing in json.loads(ingredients_json):
+            name = ing["name"].lower()
+            ingredient_counts[name] = ingredient_counts.get(name, 0) + cook_count
+    most_used = sorted(ingredient_counts.items(), key=lambda x: x[1], reverse=True)[:stats_limit]
+
+    return {
+        "meals": meals,
+        "home_meals": home_meals,
+        "pantry": pantry,
+        "expiring": expiring,
+        "forgotten": forgotten,
+        "thaw": thaw,
+        "shopping_plan": shopping_plan,
+        "most_cooked": [{"name": name, "count": count} for name, _, count in most_cooked],
+        "most_used": [{"name": name.title(), "count": count} for name, count in most_used],
+    }
+
+
+# Settings
+
+def get_setting(key):
+    """Return a value from the settings table, or None."""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute("SELECT value FROM settings WHERE household_id = ? AND key = ?", (current_household(), key))
+    row = c.fetchone()
+    conn.close()
+    return row[0] if row else None
+
+
+def set_setting(key, value, scope="settings"):
+    """
+    Store a settings value; None removes the key. scope is the data version to bump, or None for
+    bookkeeping values that no cached read depends on.
+    """
+    conn = get_connection()
+    c = conn.cursor()
+    household_id = current_household()
+    if value is None:
+        c.execute("DELETE FROM settings WHERE household_id = ? AND key = ?", (household_id, key))
+    else:
+        c.execute(
+            "INSERT INTO settings (household_id, key, value) VALUES (?, ?, ?) "
+            "ON CONFLICT(household_id, key) DO UPDATE SET value = excluded.value",
+            (household_id, key, str(value)),
+        )
+    if scope:
+        _bump_data_version(c, scope)
+    conn.commit()
+    conn.close()
+
+
+def get_household_size():
+    """Return how many people the household usually cooks for, or None if not set."""
+    value = get_setting("household_size")
+    return int(value) if value else None
+
+
+def set_household_size(size):
+    """Store the household size; None clears it so recipes are cooked as written."""
+    set_setting("household_size", int(size) if size else None)
+
+
 # Shopping list operations
 
 def get_shopping_list_items():
     """Return all manual shopping list items ordered by added_at."""
     conn = get_connection()
     c = conn.cursor()
-    c.execute("SELECT id, name, checked FROM shopping_list_items ORDER BY added_at")
+    c.execute(
+        "SELECT id, name, checked FROM shopping_list_items WHERE household_id = ? ORDER BY added_at",
+        (current_household(),),
+    )
     rows = c.fetchall()
     conn.close()
     return [{"id": r[0], "name": r[1], "checked": bool(r[2])} for r in rows]
@@ -894,17 +2021,43 @@ def add_shopping_list_item(name):
     conn = get_connection()
     c = conn.cursor()
     c.execute(
-        "INSERT INTO shopping_list_items (name, checked, added_at) VALUES (?, 0, ?)",
-        (name, datetime.now().isoformat()),
+        "INSERT INTO shopping_list_items (household_id, name, checked, added_at) VALUES (?, ?, 0, ?)",
+        (current_household(), name, datetime.now().isoformat()),
     )
+    _bump_data_version(c, "shopping")
     conn.commit()
     conn.close()
 
 
 def toggle_shopping_list_item(item_id, checked):
+    set_shopping_items_checked([item_id], checked)
+
+
+def set_shopping_items_checked(ids, checked):
+    """Check or uncheck several shopping list items in one transaction."""
+    apply_shopping_list_changes({item_id: checked for item_id in ids}, [])
+
+
+def apply_shopping_list_changes(checked, deleted_ids):
+    """
+    Write a batch of buffered checklist edits in one transaction.
+
+    checked:     {item_id: bool} new checked state per item
+    deleted_ids: item ids to remove
+    """
+    if not checked and not deleted_ids:
+        return
     conn = get_connection()
     c = conn.cursor()
-    c.execute("UPDATE shopping_list_items SET checked = ? WHERE id = ?", (int(checked), item_id))
+    household_id = current_household()
+    c.executemany(
+        "UPDATE shopping_list_items SET checked = ? WHERE id = ? AND household_id = ?",
+        [(int(state), item_id, household_id) for item_id, state in checked.items()],
+    )
+    c.executemany(
+        "DELETE FROM shopping_list_items WHERE id = ? AND household_id = ?", [(i, household_id) for i in deleted_ids]
+    )
+    _bump_data_version(c, "shopping")
     conn.commit()
     conn.close()
 
@@ -912,7 +2065,8 @@ def toggle_shopping_list_item(item_id, checked):
 def delete_shopping_list_item(item_id):
     conn = get_connection()
     c = conn.cursor()
-    c.execute("DELETE FROM shopping_list_items WHERE id = ?", (item_id,))
+    c.execute("DELETE FROM shopping_list_items WHERE id = ? AND household_id = ?", (item_id, current_household()))
+    _bump_data_version(c, "shopping")
     conn.commit()
     conn.close()
 
@@ -920,39 +2074,187 @@ def delete_shopping_list_item(item_id):
 def clear_checked_shopping_items():
     conn = get_connection()
     c = conn.cursor()
-    c.execute("DELETE FROM shopping_list_items WHERE checked = 1")
+    c.execute("DELETE FROM shopping_list_items WHERE household_id = ? AND checked = 1", (current_household(),))
+    _bump_data_version(c, "shopping")
     conn.commit()
     conn.close()
 
 
 # AI quota operations
 
+# {household_id: (date_str, call_count, time.monotonic() of the last read)} — check_and_increment_quota() keeps it current
+_usage_today = {}
+USAGE_REFRESH_SECONDS = 10
+
+
 def get_ai_usage_today():
     """Return the number of AI calls made today."""
     conn = get_connection()
     c = conn.cursor()
     today = date.today().isoformat()
-    c.execute("SELECT call_count FROM ai_usage WHERE date = ?", (today,))
+    c.execute("SELECT call_count FROM ai_usage WHERE household_id = ? AND date = ?", (current_household(), today))
     row = c.fetchone()
     conn.close()
     return row[0] if row else 0
 
 
-def check_and_increment_quota(limit=50):
-    """Atomically check quota and increment if available. Returns True if the call is allowed."""
+def get_cached_ai_usage_today(max_age=USAGE_REFRESH_SECONDS):
+    """
+    Return today's AI call count from the in-process counter, re-reading SQLite at most every max_age seconds.
+    Calls made by this process show up immediately; calls made by other processes within max_age.
+    """
+    household_id = current_household()
+    today = date.today().isoformat()
+    counted_date, count, read_at = _usage_today.get(household_id, (None, 0, 0.0))
+    if counted_date != today or time.monotonic() - read_at > max_age:
+        count = get_ai_usage_today()
+        _usage_today[household_id] = (today, count, time.monotonic())
+    return count
+
+
+def get_ai_usage_today_total():
+    """Return the number of AI calls made today by all households together."""
+    conn = get_shared_connection()
+    try:
+        row = conn.execute("SELECT call_count FROM ai_usage_total WHERE date = ?", (date.today().isoformat(),)).fetchone()
+    except sqlite3.OperationalError:
+        row = None  # shared tables not created yet
+    conn.close()
+    return row[0] if row else 0
+
+
+def check_and_increment_quota(limit=50, global_limit=AI_GLOBAL_DAILY_LIMIT):
+    """
+    Atomically check the household's quota and the all-household ceiling, and count the call against
+    both if neither is used up. Returns True if the call is allowed.
+    """
+    household_id = current_household()
+    today = date.today().isoformat()
+    # Each counter is bumped only while under its limit, so concurrent calls can't overshoot it. The two
+    # may live in the same file, so they're separate transactions and a refused household call refunds
+    # the ceiling.
+    shared = get_shared_connection()
+    cursor = shared.execute(
+        """
+        INSERT INTO ai_usage_total (date, call_count) VALUES (?, 1)
+        ON CONFLICT(date) DO UPDATE SET call_count = call_count + 1 WHERE call_count < ?
+        """,
+        (today, global_limit),
+    )
+    allowed = cursor.rowcount == 1 and global_limit > 0
+    if allowed:
+        shared.commit()
+    else:
+        shared.rollback()
+
+    conn = get_connection()
+    c = conn.cursor()
+    if allowed:
+        c.execute(
+            """
+            INSERT INTO ai_usage (household_id, date, call_count) VALUES (?, ?, 1)
+            ON CONFLICT(household_id, date) DO UPDATE SET call_count = call_count + 1 WHERE call_count < ?
+            """,
+            (household_id, today, limit),
+        )
+        if c.rowcount == 1 and limit > 0:
+            _bump_data_version(c, "quota")
+            conn.commit()
+        else:
+            conn.rollback()
+            shared.execute("UPDATE ai_usage_total SET call_count = call_count - 1 WHERE date = ?", (today,))
+            shared.commit()
+            allowed = False
+    shared.close()
+    c.execute("SELECT call_count FROM ai_usage WHERE household_id = ? AND date = ?", (household_id, today))
+    row = c.fetchone()
+    conn.close()
+    _usage_today[household_id] = (today, row[0] if row else 0, time.monotonic())
+    return allowed
+
+
+# Precomputed insight operations
+
+def get_insight(name):
+    """Return the stored insight {"content", "data_version", "generated_at"}, or None."""
     conn = get_connection()
     c = conn.cursor()
-    today = date.today().isoformat()
-    c.execute("SELECT call_count FROM ai_usage WHERE date = ?", (today,))
+    c.execute(
+        "SELECT content, data_version, generated_at FROM insights WHERE household_id = ? AND name = ?",
+        (current_household(), name),
+    )
     row = c.fetchone()
-    current = row[0] if row else 0
-    if current >= limit:
-        conn.close()
-        return False
+    conn.close()
     if row:
-        c.execute("UPDATE ai_usage SET call_count = call_count + 1 WHERE date = ?", (today,))
-    else:
-        c.execute("INSERT INTO ai_usage (date, call_count) VALUES (?, 1)", (today,))
+        return {"content": row[0], "data_version": row[1], "generated_at": row[2]}
+    return None
+
+
+def save_insight(name, content, data_version):
+    """Store an insight together with the data version it was computed for."""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(
+        """
+        INSERT INTO insights (household_id, name, content, data_version, generated_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(household_id, name) DO UPDATE SET
+            content = excluded.content,
+            data_version = excluded.data_version,
+            generated_at = excluded.generated_at
+        """,
+        (current_household(), name, content, data_version, datetime.now().isoformat()),
+    )
+    _bump_data_version(c, "insights")
+    conn.commit()
+    conn.close()
+
+
+# Recipe extraction cache (shared by all households)
+
+def get_cached_extraction(key):
+    """Return the stored extraction result for key and mark it recently used, or None."""
+    conn = get_shared_connection()
+    c = conn.cursor()
+    c.execute("SELECT result FROM extraction_cache WHERE key = ?", (key,))
+    row = c.fetchone()
+    if row:
+        c.execute("UPDATE extraction_cache SET used_at = ? WHERE key = ?", (datetime.now().isoformat(), key))
+        conn.commit()
+    conn.close()
+    return json.loads(row[0]) if row else None
+
+
+def get_extraction_image_hashes(extractor, page_count):
+    """Return [(key, [perceptual hash, ...])] for cached image extractions with page_count images."""
+    conn = get_shared_connection()
+    c = conn.cursor()
+    c.execute(
+        "SELECT key, image_hashes FROM extraction_cache WHERE extractor = ? AND image_hashes IS NOT NULL",
+        (extractor,),
+    )
+    rows = c.fetchall()
+    conn.close()
+    entries = [(key, json.loads(hashes)) for key, hashes in rows]
+    return [(key, hashes) for key, hashes in entries if len(hashes) == page_count]
+
+
+def save_extraction(key, extractor, result, image_hashes=None, max_entries=500):
+    """Store an extraction result, then drop the least recently used entries beyond max_entries."""
+    now = datetime.now().isoformat()
+    conn = get_shared_connection()
+    c = conn.cursor()
+    c.execute(
+        """
+        INSERT INTO extraction_cache (key, extractor, image_hashes, result, created_at, used_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(key) DO UPDATE SET result = excluded.result, used_at = excluded.used_at
+        """,
+        (key, extractor, json.dumps(image_hashes) if image_hashes is not None else None, json.dumps(result), now, now),
+    )
+    c.execute(
+        "DELETE FROM extraction_cache WHERE key NOT IN (SELECT key FROM extraction_cache ORDER BY used_at DESC LIMIT ?)",
+        (max_entries,),
+    )
     conn.commit()
     conn.close()
-    return True
@@ -0,0 +1,86 @@
+"""Content-addressed cache of recipe extractions.
+
+Uploading the same photo or PDF again (a retry after a failed save, or another
+household with the same recipe card) returns the stored extraction instead of
+making a model call, and so uses no AI quota. Entries are keyed on a hash of the
+extractor (model and prompt) plus the normalized input: decoded pixels for
+images, so metadata and orientation tags don't matter, and raw bytes for PDFs.
+Images that differ only by re-encoding or resizing are matched by a perceptual
+difference hash (dHash). The cache keeps the EXTRACTION_CACHE_MAX_ENTRIES most
+recently used entries.
+"""
+import hashlib
+import io
+from database import get_cached_extraction, get_extraction_image_hashes, save_extraction
+from gemini_client import MODEL_NAME, RECIPE_EXTRACTION_PROMPT
+
+EXTRACTION_CACHE_MAX_ENTRIES = 500
+# Out of 1024 bits. A card re-saved at lower size and quality measures about 6; a different recipe
+# printed on the same card template about 23. Edits that small (one amount) can't be told apart,
+# which the review form before saving covers.
+PERCEPTUAL_MAX_DISTANCE = 10
+_DHASH_SIZE = 32
+
+EXTRACTOR = hashlib.sha256(f"{MODEL_NAME}\n{RECIPE_EXTRACTION_PROMPT}".encode()).hexdigest()[:16]
+
+
+class Fingerprint:
+    """The cache key of one extraction input, plus per-image perceptual hashes (None for a PDF)."""
+
+    def __init__(self, key, image_hashes=None):
+        self.key = key
+        self.image_hashes = image_hashes
+
+
+def _dhash(image):
+    """1024-bit difference hash: is each pixel brighter than its right neighbour, on a 33×32 greyscale thumbnail."""
+    from PIL import Image
+    small = image.convert("L").resize((_DHASH_SIZE + 1, _DHASH_SIZE), Image.Resampling.LANCZOS)
+    pixels = small.tobytes()
+    bits = 0
+    for row in range(_DHASH_SIZE):
+        offset = row * (_DHASH_SIZE + 1)
+        for col in range(_DHASH_SIZE):
+            bits = bits << 1 | (pixels[offset + col] > pixels[offset + col + 1])
+    return bits
+
+
+def fingerprint_images(image_bytes_list):
+    from PIL import Image, ImageOps  # deferred: Pillow is slow to import
+    digest = hashlib.sha256(f"{EXTRACTOR}:images".encode())
+    hashes = []
+    for data in image_bytes_list:
+        image = ImageOps.exif_transpose(Image.open(io.BytesIO(data))).convert("RGB")
+        digest.update(f"{image.size}".encode())
+        digest.update(image.tobytes())
+        hashes.append(f"{_dhash(image):0{_DHASH_SIZE * _DHASH_SIZE // 4}x}")
+    return Fingerprint(digest.hexdigest(), hashes)
+
+
+def fingerprint_pdf(pdf_bytes):
+    digest = hashlib.sha256(f"{EXTRACTOR}:pdf".encode())
+    digest.update(pdf_bytes)
+    return Fingerprint(digest.hexdigest())
+
+
+def _distance(hashes, other):
+    return max(bin(int(a, 16) ^ int(b, 16)).count("1") for a, b in zip(hashes, other))
+
+
+def get(fingerprint):
+    """Return the cached extraction for an input, or None. Exact matches first, then perceptually close images."""
+    result = get_cached_extraction(fingerprint.key)
+    if result is not None or fingerprint.image_hashes is None:
+        return result
+    candidates = [
+        (_distance(fingerprint.image_hashes, hashes), key)
+        for key, hashes in get_extraction_image_hashes(EXTRACTOR, len(fingerprint.image_hashes))
+    ]
+    close = [candidate for candidate in candidates if candidate[0] <= PERCEPTUAL_MAX_DISTANCE]
+    if not close:
+        return None
+    return get_cached_extraction(min(close)[1])
+
+
+def put(fingerprint, result):
+    save_extraction(fingerprint.key, EXTRACTOR, result, fingerprint.image_hashes, EXTRACTION_CACHE_MAX_ENTRIES)
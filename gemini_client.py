@@ -1,17 +1,17 @@
 import os
 import io
 import time
-from google import genai
-from google.genai import types
-from PIL import Image
-from dotenv import load_dotenv
 
-load_dotenv()
+# google-genai (~0.7 s to import), Pillow and dotenv are imported on first use, so pages only
+# pay for them when an AI feature actually runs
 
 MODEL_NAME = "gemini-2.5-flash"
 
 
 def _get_client():
+    from dotenv import load_dotenv
+    from google import genai
+    load_dotenv()
     api_key = os.getenv("GEMINI_API_KEY")
     if not api_key:
         raise ValueError("GEMINI_API_KEY not found. Check your .env file or Streamlit secrets.")
@@ -44,6 +44,7 @@ RECIPE_EXTRACTION_PROMPT = """
     {
         "name": "recipe name",
         "cooking_time": "total cooking time as a string (e.g. '30 minutes')",
+        "servings": number_of_servings_the_recipe_makes,
         "ingredients": [
             {"name": "ingredient name", "amount": numeric_value, "unit": "unit of measurement"}
         ],
@@ -61,6 +62,7 @@ RECIPE_EXTRACTION_PROMPT = """
 
     If you cannot determine an amount, use null.
     If you cannot determine a unit, use null.
+    If the recipe does not say how many it serves, use null for servings.
 """
 
 
@@ -76,6 +78,7 @@ def _parse_gemini_json(text):
 
 def extract_recipe_from_images(image_bytes_list):
     """Extract recipe from one or more images (e.g. front and back of a recipe card)."""
+    from PIL import Image
     client = _get_client()
     images = [Image.open(io.BytesIO(b)) for b in image_bytes_list]
     response = _generate_with_retry(client,
@@ -97,6 +100,16 @@ def extract_recipe_from_pdf(pdf_bytes):
     return _parse_gemini_json(response.text)
 
 
+def extract_recipe_from_text(text):
+    """Extract recipe from text already pulled out of a document (e.g. a PDF's text layer)."""
+    client = _get_client()
+    response = _generate_with_retry(client,
+        model=MODEL_NAME,
+        contents=[RECIPE_EXTRACTION_PROMPT, f"Recipe text:\n{text}"],
+    )
+    return _parse_gemini_json(response.text)
+
+
 def estimate_expiry_dates(ingredients):
     """Estimate shelf life in days for a list of ingredients given their storage location.
 
@@ -313,45 +326,27 @@ def suggest_calendar_meals(recipes, unplanned_dates, current_week_plan, expiring
     return _parse_gemini_json(response.text)
 
 
-def generate_weekly_shopping_list(meal_plan, planned_recipes, fridge_ingredients):
-    """Generate a consolidated shopping list for a week's planned meals."""
+def generate_weekly_shopping_list(rows):
+    """
+    Phrase a consolidated shopping list as a friendly note.
+
+    rows: output of shopping.consolidate_shopping_list(). Quantities are already final —
+    the model only words them, it does not recompute anything.
+    """
     client = _get_client()
 
-    fridge_list = (
-        "\n".join([f"- {i['name']}: {i['amount']} {i['unit']}" for i in fridge_ingredients])
-        if fridge_ingredients
-        else "Fridge is empty."
+    items_str = "\n".join(
+        f"- [{r['category']}] {r['name']}: {r['package_label'] or str(r['buy_amount']) + ' ' + r['buy_unit']} "
+        f"(for {', '.join(r['recipes'])})"
+        for r in rows
     )
 
-    meals_str = "\n".join([f"- {d}: {v}" for d, v in sorted(meal_plan.items())])
-
-    # Aggregate ingredients across all planned meals
-    ingredient_lines = []
-    for recipe in planned_recipes:
-        times = list(meal_plan.values()).count(recipe["name"])
-        for ing in recipe["ingredients"]:
-            total = ing["amount"] * times
-            suffix = f" ×{times}" if times > 1 else ""
-            ingredient_lines.append(
-                f"- {ing['name']}: {total} {ing['unit']} (for {recipe['name']}{suffix})"
-            )
-    ingredients_str = "\n".join(ingredient_lines) if ingredient_lines else "No ingredients."
-
     prompt = f"""
-    My meal plan for the week:
-    {meals_str}
-
-    Total ingredients needed across all planned meals:
-    {ingredients_str}
-
-    What I currently have in my fridge:
-    {fridge_list}
-
-    Create a consolidated weekly shopping list. Group items by category (Produce, Proteins, Dairy, Pantry, etc.).
-    Account for what I already have — only list what I still need to buy.
-    If I need more of something than I have, note how much extra to buy.
+    Here is my shopping list for the week, already grouped by category with final quantities:
+    {items_str}
 
-    Format clearly with category headers and bullet points.
+    Rewrite it as a short, friendly shopping note with category headers and bullet points.
+    Keep every item and every quantity exactly as given — do not add, remove or change anything.
     """
 
     response = _generate_with_retry(client,model=MODEL_NAME, contents=prompt)
@@ -0,0 +1,164 @@
+"""Background generation of the Home page AI insight.
+
+The insight is regenerated off the request path whenever the pantry or recipe
+data changes, and stored with the data version it was computed for. Home reads
+the stored copy instantly and only shows a stale marker while a refresh runs.
+Each household has its own insight and at most one refresh worker. A refresh
+that fails or is refused by the daily quota stores nothing: its message is kept
+in memory until a retry time, after which the next request tries again.
+"""
+import threading
+import time
+from datetime import date, datetime, timedelta
+from constants import AI_DAILY_LIMIT
+from database import (
+    current_household,
+    set_household,
+    get_data_version,
+    get_insight,
+    save_insight,
+    get_ingredients,
+    get_recipes,
+    get_cookable_recipes,
+    get_forgotten_ingredients,
+    check_and_increment_quota,
+)
+from gemini_client import generate_home_insight
+
+HOME_INSIGHT = "home"
+HOME_INSIGHT_SCOPES = ("pantry", "recipes")
+DEBOUNCE_SECONDS = 5
+RETRY_SECONDS = 60  # after a failed model call
+
+_lock = threading.Lock()  # guards the four dicts below, shared by page runs and refresh workers
+_workers = {}  # {household_id: refresh thread}
+_force_pending = set()  # household ids with a forced refresh requested
+_stored = {}  # {household_id: (insights data version, stored Home insight)}
+_failed = {}  # {household_id: (data version, message, retry time)} for the last refresh that stored nothing
+
+
+def get_home_insight():
+    """
+    Return the stored Home insight without calling the model.
+
+    Returns {"content": str | None, "stale": bool, "refreshing": bool, "error": str | None,
+    "retry_at": float | None}. "stale" is True when the pantry or recipes changed since the
+    insight was generated (or none exists yet). "error" is set when the last refresh for the
+    current data failed; no refresh is started again before "retry_at" (a time.time() value).
+    """
+    household_id = current_household()
+    version = get_data_version(*HOME_INSIGHT_SCOPES)
+    insights_version = get_data_version("insights")
+    with _lock:
+        stored_version, stored = _stored.get(household_id, (None, None))
+    if stored_version != insights_version:
+        stored = get_insight(HOME_INSIGHT)
+        with _lock:
+            _stored[household_id] = (insights_version, stored)
+    stale = stored is None or stored["data_version"] != version
+    with _lock:
+        failed_version, error, retry_at = _failed.get(household_id, (None, None, None))
+    if not stale or failed_version != version:
+        error, retry_at = None, None
+    return {
+        "content": stored["content"] if stored else None,
+        "stale": stale,
+        "refreshing": is_refreshing(),
+        "error": error,
+        "retry_at": retry_at,
+    }
+
+
+def is_refreshing():
+    """Return True while a background refresh for the current household is scheduled or running in this process."""
+    with _lock:
+        return current_household() in _workers
+
+
+def request_home_insight_refresh(force=False):
+    """
+    Schedule a background refresh of the Home insight.
+
+    Repeated requests while a refresh is pending collapse into the running one. Without
+    force, nothing is regenerated if the stored insight already matches the data version,
+    nor before the retry time of a failed refresh for the same data.
+    """
+    household_id = current_household()
+    version = get_data_version(*HOME_INSIGHT_SCOPES)
+    with _lock:
+        failed_version, _, retry_at = _failed.get(household_id, (None, None, None))
+        if not force and failed_version == version and time.time() < retry_at:
+            return
+        if force:
+            _force_pending.add(household_id)
+        if household_id in _workers:
+            return
+        worker = _workers[household_id] = threading.Thread(
+            target=_run_refresh, args=(household_id,), name=f"home-insight-refresh-{household_id}", daemon=True
+        )
+        worker.start()
+
+
+def _wait_for_quiet_version(household_id):
+    """Wait until the data version stops changing for DEBOUNCE_SECONDS, then return it.
+    A forced refresh skips the wait."""
+    version = get_data_version(*HOME_INSIGHT_SCOPES)
+    while True:
+        with _lock:
+            if household_id in _force_pending:
+                return version
+        time.sleep(DEBOUNCE_SECONDS)
+        latest = get_data_version(*HOME_INSIGHT_SCOPES)
+        if latest == version:
+            return version
+        version = latest
+
+
+def _run_refresh(household_id):
+    set_household(household_id)
+    try:
+        while True:
+            version = _wait_for_quiet_version(household_id)
+            with _lock:
+                force = household_id in _force_pending
+                _force_pending.discard(household_id)
+            stored = get_insight(HOME_INSIGHT)
+            if force or stored is None or stored["data_version"] != version:
+                content, retry_at = _build_home_insight()
+                # Store and clear the failure together, so a page run never sees one without the other
+                with _lock:
+                    if retry_at is None:
+                        save_insight(HOME_INSIGHT, content, version)
+                        _failed.pop(household_id, None)
+                    else:
+                        _failed[household_id] = (version, content, retry_at)
+            with _lock:
+                if household_id not in _force_pending and get_data_version(*HOME_INSIGHT_SCOPES) == version:
+                    del _workers[household_id]
+                    return
+    finally:
+        with _lock:
+            if _workers.get(household_id) is threading.current_thread():
+                del _workers[household_id]
+
+
+def _build_home_insight():
+    """
+    Generate the insight text for the current pantry. Returns (text, retry_at): retry_at is None
+    when the text is the insight to store, else the text is an error message to show until then.
+    """
+    ingredients = get_ingredients()
+    recipes = get_recipes()
+    if not ingredients:
+        return "Add some ingredients to your pantry to get personalised insights.", None
+    if not recipes:
+        return "Add some recipes to get personalised insights based on your pantry.", None
+    if not check_and_increment_quota(AI_DAILY_LIMIT):
+        tomorrow = datetime.combine(date.today() + timedelta(days=1), datetime.min.time())
+        return "⚠️ **Daily AI limit reached.** Insights will be available again tomorrow.", tomorrow.timestamp()
+    try:
+        cookable = get_cookable_recipes()
+        forgotten = get_forgotten_ingredients()
+        return generate_home_insight(ingredients, recipes, cookable, forgotten), None
+    except Exception as e:
+        return f"Could not generate insight: {e}", time.time() + RETRY_SECONDS
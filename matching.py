@@ -0,0 +1,118 @@
+"""Fuzzy reconciliation of ingredient names.
+
+Recipe ingredients and pantry items only match on exact lowercase names, so
+"Tomato" vs "Tomatoes" or "Cheddar" vs "Cheddar Cheese" read as missing. A
+trigram index over pantry names proposes aliases for unmatched recipe
+ingredients; suggestions are stored in the ingredient_aliases table and only
+confirmed ones are used, through plain dictionary lookups (see
+database.canonical_name). Suggestions are recomputed only when the pantry or
+recipes change.
+"""
+import re
+from database import (
+    get_data_version,
+    get_ingredients,
+    get_recipes,
+    get_ingredient_aliases,
+    get_known_alias_names,
+    suggest_ingredient_aliases,
+    canonical_name,
+    get_setting,
+    set_setting,
+)
+
+MIN_SIMILARITY = 0.6
+ALIAS_SCOPES = ("pantry", "recipes")
+
+_checked_version = None  # last version this process already checked, to skip the settings lookup
+
+
+def _normalize(name):
+    return " ".join(re.findall(r"[a-z0-9]+", name.lower()))
+
+
+def trigrams(name):
+    """Return the set of character trigrams of a normalized, space-padded name."""
+    text = f"  {_normalize(name)} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """
+    Inverted index from trigram to the names containing it.
+
+    similar() only scores names that share at least one trigram with the query, so a lookup
+    costs the size of the query's posting lists rather than a string distance per name.
+    """
+
+    def __init__(self, names):
+        self._names = []
+        self._sizes = []
+        self._postings = {}
+        for name in dict.fromkeys(names):
+            grams = trigrams(name)
+            if not grams:
+                continue
+            name_id = len(self._names)
+            self._names.append(name)
+            self._sizes.append(len(grams))
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(name_id)
+
+    def similar(self, name, limit=3, threshold=MIN_SIMILARITY):
+        """Return [(name, score)] with Dice similarity >= threshold, best first."""
+        grams = trigrams(name)
+        shared = {}
+        for gram in grams:
+            for name_id in self._postings.get(gram, ()):
+                shared[name_id] = shared.get(name_id, 0) + 1
+        scored = [
+            (self._names[name_id], 2 * count / (len(grams) + self._sizes[name_id]))
+            for name_id, count in shared.items()
+        ]
+        scored = [(n, round(score, 3)) for n, score in scored if score >= threshold]
+        scored.sort(key=lambda pair: (-pair[1], pair[0]))
+        return scored[:limit]
+
+
+def find_alias_candidates(recipe_names, pantry_names, aliases=None, known=()):
+    """
+    Propose (alias, canonical, score) for recipe ingredient names with no exact pantry match.
+
+    Names that already resolve to a pantry item, and names in `known` (already suggested,
+    confirmed or rejected), are skipped.
+    """
+    pantry_keys = {canonical_name(n, aliases) for n in pantry_names}
+    index = TrigramIndex(sorted(pantry_keys))
+    candidates = []
+    for name in sorted({n.strip().lower() for n in recipe_names}):
+        if name in known or canonical_name(name, aliases) in pantry_keys:
+            continue
+        matches = index.similar(name, limit=1)
+        if matches:
+            candidates.append((name, matches[0][0], matches[0][1]))
+    return candidates
+
+
+def refresh_alias_suggestions(force=False):
+    """
+    Recompute alias suggestions if the pantry or recipes changed since the last run.
+
+    Returns the number of new suggestions stored.
+    """
+    global _checked_version
+    version = get_data_version(*ALIAS_SCOPES)
+    if not force and (_checked_version == version or get_setting("alias_suggestions_version") == version):
+        _checked_version = version
+        return 0
+
+    recipe_names = [ing["name"] for r in get_recipes() for ing in r["ingredients"]]
+    pantry_names = [i["name"] for i in get_ingredients()]
+    candidates = find_alias_candidates(recipe_names, pantry_names, get_ingredient_aliases(), get_known_alias_names())
+    if candidates:
+        suggest_ingredient_aliases(candidates)
+
+    # A marker only: bumping "settings" would drop every cache keyed on it (coverage index, ranking, dashboard)
+    set_setting("alias_suggestions_version", version, scope=None)
+    _checked_version = version
+    return len(candidates)
@@ -1,6 +1,8 @@
 import streamlit as st
-from datetime import datetime, date, timedelta
-from database import initialize_db, get_ingredients, get_ingredient_by_name, add_ingredient, delete_ingredient, update_ingredient, update_ingredient_expiry, clear_all_ingredients, check_and_increment_quota
+from datetime import date, timedelta
+from database import get_ingredient_by_name, add_ingredient, apply_ingredient_changes, update_ingredient_expiry, clear_all_ingredients, check_and_increment_quota, set_ingredient_alias_status, get_data_version
+from data_cache import initialize_db, get_ingredient_lots, get_ingredient_lot_page, count_ingredient_lots, get_alias_suggestions
+from matching import refresh_alias_suggestions
 from constants import UNITS, AI_DAILY_LIMIT
 from utils import apply_sidebar_style, show_ai_limit_message
 from gemini_client import suggest_storage_locations_bulk, estimate_expiry_dates
@@ -28,7 +30,6 @@ st.markdown("Track all the ingredients you have at home — fridge, freezer, and
 st.divider()
 
 LOCATIONS = ["Fridge", "Freezer", "Pantry", "Other"]
-LOCATION_ICONS = {"Fridge": "🧊", "Freezer": "❄️", "Pantry": "🥫", "Other": "📦"}
 
 # ---------------------------------------------------------------------------
 # Add ingredients — multi-row, no form, session-state driven
@@ -92,59 +93,6 @@ def _clear_add_rows():
     st.session_state["add_row_counter"] = counter + 10
 
 
-@st.dialog("Duplicate Ingredients Found")
-def confirm_duplicates():
-    conflicts = st.session_state.get("pending_conflicts", [])
-    clean_rows = st.session_state.get("pending_clean_rows", [])
-
-    st.write("The following ingredient(s) already exist in your pantry:")
-    for c in conflicts:
-        existing, new = c["existing"], c["new"]
-        if existing["unit"] == new["unit"]:
-            total = existing["amount"] + new["amount"]
-            st.markdown(
-                f"**{existing['name']}** — currently {existing['amount']} {existing['unit']}, "
-                f"adding {new['amount']} {new['unit']} → **{total} {existing['unit']}** total"
-            )
-        else:
-            st.markdown(
-                f"**{existing['name']}** — currently {existing['amount']} {existing['unit']}, "
-                f"adding {new['amount']} {new['unit']} *(different units — will be added as a separate entry)*"
-            )
-
-    st.write("")
-    col_combine, col_separate = st.columns(2)
-    with col_combine:
-        if st.button("Combine amounts", type="primary", width="stretch"):
-            saved = []
-            for row in clean_rows:
-                add_ingredient(row["name"], row["amount"], row["unit"], row["location"], row.get("expiry_date"))
-                saved.append(row["name"])
-            for c in conflicts:
-                existing, new = c["existing"], c["new"]
-                if existing["unit"] == new["unit"]:
-                    update_ingredient(existing["id"], existing["amount"] + new["amount"], new["location"])
-                else:
-                    add_ingredient(new["name"], new["amount"], new["unit"], new["location"])
-                saved.append(existing["name"])
-            for key in ["pending_clean_rows", "pending_conflicts"]:
-                st.session_state.pop(key, None)
-            _clear_add_rows()
-            st.session_state["add_success"] = f"Saved: {', '.join(saved)}"
-            st.rerun(scope="app")
-    with col_separate:
-        if st.button("Add as separate entries", width="stretch"):
-            saved = []
-            for row in clean_rows + [c["new"] for c in conflicts]:
-                add_ingredient(row["name"], row["amount"], row["unit"], row["location"], row.get("expiry_date"))
-                saved.append(row["name"])
-            for key in ["pending_clean_rows", "pending_conflicts"]:
-                st.session_state.pop(key, None)
-            _clear_add_rows()
-            st.session_state["add_success"] = f"Added: {', '.join(saved)}"
-            st.rerun(scope="app")
-
-
 # Action row
 btn_add_row, btn_suggest, btn_expiry, btn_save, _ = st.columns([1.5, 2, 2, 1.5, 2])
 with btn_add_row:
@@ -237,25 +185,17 @@ with btn_save:
                 except Exception:
                     pass  # estimation failed silently — save without expiry
 
-            conflicts, clean_rows = [], []
+            # Every save is a new lot with its own expiry; existing stock is never merged into
+            restocked = [r["name"] for r in rows_to_save if get_ingredient_by_name(r["name"])]
             for row in rows_to_save:
-                existing = get_ingredient_by_name(row["name"])
-                if existing:
-                    conflicts.append({"existing": existing, "new": row})
-                else:
-                    clean_rows.append(row)
-
-            if conflicts:
-                st.session_state["pending_clean_rows"] = clean_rows
-                st.session_state["pending_conflicts"] = conflicts
-                confirm_duplicates()
-            else:
-                for row in clean_rows:
-                    add_ingredient(row["name"], row["amount"], row["unit"], row["location"],
-                                   row.get("expiry_date"), row.get("expiry_estimated", False))
-                _clear_add_rows()
-                st.session_state["add_success"] = f"Added: {', '.join(r['name'] for r in clean_rows)}"
-                st.rerun()
+                add_ingredient(row["name"], row["amount"], row["unit"], row["location"],
+                               row.get("expiry_date"), row.get("expiry_estimated", False))
+            _clear_add_rows()
+            message = f"Added: {', '.join(r['name'] for r in rows_to_save)}"
+            if restocked:
+                message += f" · {', '.join(restocked)} added as a new lot alongside existing stock"
+            st.session_state["add_success"] = message
+            st.rerun()
 
 if "add_success" in st.session_state:
     st.success(f"✅ {st.session_state.pop('add_success')}")
@@ -263,6 +203,29 @@ if "add_success" in st.session_state:
 st.divider()
 
 
+# ---------------------------------------------------------------------------
+# Name matches — recipe ingredient names that look like a pantry item
+# ---------------------------------------------------------------------------
+refresh_alias_suggestions()
+alias_suggestions = get_alias_suggestions()
+if alias_suggestions:
+    with st.expander(f"🔗 Possible name matches ({len(alias_suggestions)})"):
+        st.caption("Recipes use these names for things already in your pantry. Confirm a match so recipes count your stock.")
+        for suggestion in alias_suggestions:
+            col_text, col_yes, col_no = st.columns([4, 1, 1])
+            with col_text:
+                st.write(f"**{suggestion['alias'].title()}** → {suggestion['canonical'].title()}")
+            with col_yes:
+                if st.button("Same thing", key=f"alias_yes_{suggestion['alias']}", width="stretch"):
+                    set_ingredient_alias_status(suggestion["alias"], "confirmed")
+                    st.rerun()
+            with col_no:
+                if st.button("Different", key=f"alias_no_{suggestion['alias']}", width="stretch"):
+                    set_ingredient_alias_status(suggestion["alias"], "rejected")
+                    st.rerun()
+    st.divider()
+
+
 # ---------------------------------------------------------------------------
 # Clear all dialog
 # ---------------------------------------------------------------------------
@@ -288,7 +251,7 @@ with head_col:
 with btn_est_col:
     st.write("")
     if st.button("📅 Estimate Missing Expiry", width="stretch", type="secondary"):
-        ingredients_now = get_ingredients()
+        ingredients_now = get_ingredient_lots()
         missing = [i for i in ingredients_now if not i.get("expiry_date")]
         if not missing:
             st.toast("All ingredients already have an expiry date.", icon="✅")
@@ -316,112 +279,152 @@ with btn_col:
     if st.button("🗑️ Clear All", width="stretch", type="secondary"):
         confirm_clear_pantry()
 
-ingredients = get_ingredients()
-
-
-def format_dates(added_str, updated_str=None):
-    def rel(dt):
-        delta = datetime.now() - dt
-        if delta.days == 0:
-            return "today"
-        elif delta.days == 1:
-            return "yesterday"
-        elif delta.days < 7:
-            return f"{delta.days}d ago"
-        else:
-            return dt.strftime("%b %d")
-    try:
-        added = datetime.fromisoformat(added_str)
-        return f"Added {rel(added)}"
-    except Exception:
-        return ""
+LOTS_PER_PAGE = 50
+EXPIRY_FILTERS = {"Any expiry": None, "Expired": -1, "Within 3 days": 3, "Within 7 days": 7}
 
+today_day = date.today().toordinal()
 
-def format_expiry(expiry_str, estimated=False):
-    est_badge = ' <span style="color:#9ca3af;font-size:0.8em;font-weight:400;">est.</span>' if estimated else ""
-    if not expiry_str:
-        return '<span style="color:#9ca3af;">—</span>'
-    try:
-        expiry = date.fromisoformat(expiry_str)
-        days_left = (expiry - date.today()).days
-        if days_left < 0:
-            return f'<span style="color:#ef4444;font-weight:600;">Expired {abs(days_left)}d ago</span>{est_badge}'
-        elif days_left == 0:
-            return f'<span style="color:#ef4444;font-weight:600;">Today</span>{est_badge}'
-        elif days_left == 1:
-            return f'<span style="color:#f97316;font-weight:600;">Tomorrow</span>{est_badge}'
-        elif days_left <= 3:
-            return f'<span style="color:#f59e0b;font-weight:600;">In {days_left}d</span>{est_badge}'
-        else:
-            return expiry.strftime("%b %d") + est_badge
-    except Exception:
-        return "—"
 
+def format_added(added_day):
+    if added_day is None:
+        return ""
+    days_ago = today_day - added_day
+    if days_ago == 0:
+        return "today"
+    elif days_ago == 1:
+        return "yesterday"
+    elif days_ago < 7:
+        return f"{days_ago}d ago"
+    return date.fromordinal(added_day).strftime("%b %d")
+
+
+def expiry_status(expiry_day, estimated=False):
+    if expiry_day is None:
+        return ""
+    est = " (est.)" if estimated else ""
+    days_left = expiry_day - today_day
+    if days_left < 0:
+        return f"🔴 Expired {abs(days_left)}d ago{est}"
+    elif days_left == 0:
+        return f"🔴 Today{est}"
+    elif days_left == 1:
+        return f"🟠 Tomorrow{est}"
+    elif days_left <= 3:
+        return f"🟡 In {days_left}d{est}"
+    return f"In {days_left}d{est}"
+
+
+def _reset_pantry_page():
+    st.session_state["pantry_page"] = 0
+
+
+filter_name, filter_location, filter_expiry = st.columns([3, 1.5, 1.5])
+with filter_name:
+    name_query = st.text_input(
+        "Filter by name", key="pantry_filter_name", placeholder="🔍 Filter by name",
+        label_visibility="collapsed", on_change=_reset_pantry_page,
+    )
+with filter_location:
+    location_filter = st.selectbox(
+        "Location", ["All locations"] + LOCATIONS, key="pantry_filter_location",
+        label_visibility="collapsed", on_change=_reset_pantry_page,
+    )
+with filter_expiry:
+    expiry_filter = st.selectbox(
+        "Expiry", list(EXPIRY_FILTERS), key="pantry_filter_expiry",
+        label_visibility="collapsed", on_change=_reset_pantry_page,
+    )
+
+filters = {
+    "name": name_query,
+    "location": None if location_filter == "All locations" else location_filter,
+    "expiring_within": EXPIRY_FILTERS[expiry_filter],
+}
+total_lots = count_ingredient_lots(**filters)
+page_count = max(1, -(-total_lots // LOTS_PER_PAGE))
+page = min(st.session_state.get("pantry_page", 0), page_count - 1)
+# One row per lot, earliest-expiring first within each ingredient
+ingredients = get_ingredient_lot_page(**filters, limit=LOTS_PER_PAGE, offset=page * LOTS_PER_PAGE)
 
 if not ingredients:
-    st.info("Your pantry is empty. Add some ingredients above.")
+    if any(filters.values()):
+        st.info("No ingredients match these filters.")
+    else:
+        st.info("Your pantry is empty. Add some ingredients above.")
 else:
-    hcol1, hcol2, hcol3, hcol4, hcol5, hcol6, hcol7 = st.columns([2.0, 1.5, 1.5, 1.5, 1.5, 1.0, 1.0])
-    with hcol1: st.markdown("**Ingredient**")
-    with hcol2: st.markdown("**Amount**")
-    with hcol3: st.markdown("**Location**")
-    with hcol4: st.markdown("**Added Date**")
-    with hcol5: st.markdown("**Expiry**")
-    st.divider()
-
+    rows = []
+    previous_name = None
     for ingredient in ingredients:
-        col1, col2, col3, col4, col5, col6, col7 = st.columns([2.0, 1.5, 1.5, 1.5, 1.5, 1.0, 1.0])
-        loc = ingredient.get("location") or "Fridge"
-        with col1:
-            st.write(f"**{ingredient['name']}**")
-        with col2:
-            st.write(f"{ingredient['amount']} {ingredient['unit']}")
-        with col3:
-            icon = LOCATION_ICONS.get(loc, "📦")
-            st.write(f"{icon} {loc}")
-        with col4:
-            st.caption(format_dates(ingredient["added_date"], ingredient.get("updated_date")))
-        with col5:
-            st.markdown(format_expiry(ingredient.get("expiry_date"), ingredient.get("expiry_estimated", False)), unsafe_allow_html=True)
-        with col6:
-            if st.button("Edit", key=f"edit_btn_{ingredient['id']}"):
-                st.session_state["editing_id"] = ingredient["id"]
-        with col7:
-            if st.button("Remove", key=f"del_{ingredient['id']}"):
-                delete_ingredient(ingredient["id"])
-                if st.session_state.get("editing_id") == ingredient["id"]:
-                    del st.session_state["editing_id"]
-                st.rerun()
-
-        if st.session_state.get("editing_id") == ingredient["id"]:
-            with st.form(f"edit_form_{ingredient['id']}"):
-                edit_col1, edit_col2, edit_col3 = st.columns(3)
-                with edit_col1:
-                    new_amount = st.number_input(
-                        f"Amount",
-                        min_value=0.1,
-                        value=float(ingredient["amount"]),
-                        step=0.5,
-                    )
-                with edit_col2:
-                    current_loc = ingredient.get("location") or "Fridge"
-                    loc_idx = LOCATIONS.index(current_loc) if current_loc in LOCATIONS else 0
-                    new_location = st.selectbox("Location", LOCATIONS, index=loc_idx)
-                with edit_col3:
-                    current_expiry = ingredient.get("expiry_date")
-                    expiry_value = date.fromisoformat(current_expiry) if current_expiry else None
-                    new_expiry = st.date_input("Expiry date (optional)", value=expiry_value)
-                col_save, col_cancel = st.columns(2)
-                with col_save:
-                    if st.form_submit_button("Save", width="stretch"):
-                        expiry_str = new_expiry.isoformat() if new_expiry else None
-                        # Manually setting a date clears the estimated flag
-                        was_estimated = ingredient.get("expiry_estimated", False)
-                        is_still_estimated = was_estimated and (expiry_str == ingredient.get("expiry_date"))
-                        update_ingredient(ingredient["id"], new_amount, new_location, expiry_str, is_still_estimated)
-                        del st.session_state["editing_id"]
-                        st.rerun()
-                with col_cancel:
-                    if st.form_submit_button("Cancel", width="stretch"):
-                        del st.session_state["editing_id"]
-                        st.rerun()
+        repeat = ingredient["name"].lower() == previous_name
+        previous_name = ingredient["name"].lower()
+        rows.append({
+            "id": ingredient["id"],
+            "Ingredient": f"↳ {ingredient['name']}" if repeat else ingredient["name"],
+            "Amount": ingredient["amount"],
+            "Unit": ingredient["unit"],
+            "Location": ingredient.get("location") or "Fridge",
+            "Added": format_added(ingredient["added_day"]),
+            "Expiry": date.fromordinal(ingredient["expiry_day"]) if ingredient["expiry_day"] else None,
+            "Status": expiry_status(ingredient["expiry_day"], ingredient.get("expiry_estimated", False)),
+            "Remove": False,
+        })
+
+    # Keyed on the page, filters and pantry version so saved or stale edits never carry over
+    editor_key = f"pantry_grid_{page}_{name_query}_{location_filter}_{expiry_filter}_{get_data_version('pantry')}"
+    edited = st.data_editor(
+        rows,
+        key=editor_key,
+        hide_index=True,
+        width="stretch",
+        num_rows="fixed",
+        disabled=["Ingredient", "Unit", "Added", "Status"],
+        column_config={
+            "id": None,
+            "Amount": st.column_config.NumberColumn(min_value=0.1, step=0.5),
+            "Location": st.column_config.SelectboxColumn(options=LOCATIONS, required=True),
+            "Added": st.column_config.TextColumn(width="small"),
+            "Expiry": st.column_config.DateColumn(format="MMM D, YYYY"),
+            "Remove": st.column_config.CheckboxColumn(width="small"),
+        },
+    )
+
+    # Diff the grid against what was loaded; everything is written in one call
+    by_id = {ingredient["id"]: ingredient for ingredient in ingredients}
+    updates, deleted_ids = [], []
+    for original, row in zip(rows, edited):
+        if row["Remove"]:
+            deleted_ids.append(row["id"])
+            continue
+        if isinstance(row["Expiry"], str):  # a column with no dates yet hands edits back as text
+            row["Expiry"] = date.fromisoformat(row["Expiry"][:10])
+        if (row["Amount"], row["Location"], row["Expiry"]) == (original["Amount"], original["Location"], original["Expiry"]):
+            continue
+        lot = by_id[row["id"]]
+        # Manually changing the date clears the estimated flag
+        updates.append({
+            "id": row["id"],
+            "amount": row["Amount"] or original["Amount"],
+            "location": row["Location"] or original["Location"],
+            "expiry_date": row["Expiry"].isoformat() if row["Expiry"] else None,
+            "expiry_estimated": lot.get("expiry_estimated", False) and row["Expiry"] == original["Expiry"],
+        })
+
+    col_prev, col_info, col_save, col_next = st.columns([1, 3, 2, 1])
+    with col_prev:
+        if st.button("← Prev", disabled=page == 0, width="stretch", key="pantry_prev"):
+            st.session_state["pantry_page"] = page - 1
+            st.rerun()
+    with col_info:
+        first = page * LOTS_PER_PAGE + 1
+        st.caption(f"Showing {first}–{first + len(rows) - 1} of {total_lots} lots · page {page + 1} of {page_count}")
+    with col_save:
+        pending = len(updates) + len(deleted_ids)
+        label = f"💾 Save {pending} change{'s' if pending != 1 else ''}" if pending else "💾 Save changes"
+        if st.button(label, disabled=not pending, type="primary", width="stretch", key="pantry_save"):
+            apply_ingredient_changes(updates, deleted_ids)
+            st.toast(f"Saved {pending} change{'s' if pending != 1 else ''}.", icon="✅")
+            st.rerun()
+    with col_next:
+        if st.button("Next →", disabled=page >= page_count - 1, width="stretch", key="pantry_next"):
+            st.session_state["pantry_page"] = page + 1
+            st.rerun()
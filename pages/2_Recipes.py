@@ -2,19 +2,85 @@ import streamlit as st
 from utils import apply_sidebar_style, show_ai_limit_message
 from database import check_and_increment_quota
 from constants import AI_DAILY_LIMIT
-from database import get_recipes, add_recipe, update_recipe, delete_recipe, log_recipe_cooked, deduct_recipe_ingredients, get_recipe_pantry_status
-from gemini_client import extract_recipe_from_images, extract_recipe_from_pdf
+from database import add_recipe, update_recipe, delete_recipe, log_recipe_cooked, deduct_recipe_ingredients, get_pantry_status_for_recipes
+from data_cache import initialize_db, get_recipe, search_recipes, count_recipe_matches, get_household_size
+from gemini_client import extract_recipe_from_images, extract_recipe_from_pdf, extract_recipe_from_text
 from constants import UNITS
+import blob_store
+import extraction_cache
+import recipe_parser
+from recipe_import import import_html_documents
+
+initialize_db()
 
 st.set_page_config(page_title="CoPantry · Recipes", page_icon="📖", layout="wide")
 apply_sidebar_style()
 
 st.title("📖 Recipes")
 
+
+def _stored_files(handles):
+    """The stored bytes for each handle, or None if any have expired from the blob store."""
+    files = [blob_store.get(h) for h in handles]
+    return None if any(f is None for f in files) else files
+
+
+def _extract_recipe(files, is_pdf=False):
+    """
+    Extract a recipe from the files, reusing a cached extraction of the same content without using
+    AI quota. A PDF with a text layer is parsed locally when its layout is recognised, and otherwise
+    only its text goes to the model. Returns the recipe dict, or None after showing why it couldn't
+    be extracted.
+    """
+    try:
+        # Decoding the images for their fingerprint fails on a file Pillow can't read
+        fingerprint = extraction_cache.fingerprint_pdf(files[0]) if is_pdf else extraction_cache.fingerprint_images(files)
+    except Exception as e:
+        st.error(f"Could not extract recipe: {e}")
+        return None
+    result = extraction_cache.get(fingerprint)
+    if result is not None:
+        st.toast("Recognised this recipe — reused the earlier extraction.", icon="♻️")
+        return result
+    text = recipe_parser.pdf_text(files[0]) if is_pdf else None
+    result = recipe_parser.parse_recipe_text(text) if text else None
+    if result is not None:
+        extraction_cache.put(fingerprint, result)
+        return result
+    if not check_and_increment_quota(AI_DAILY_LIMIT):
+        show_ai_limit_message()
+        return None
+    with st.spinner("Analyzing your recipe..."):
+        try:
+            if text:
+                result = extract_recipe_from_text(text)
+            elif is_pdf:
+                result = extract_recipe_from_pdf(files[0])
+            else:
+                result = extract_recipe_from_images(files)
+        except Exception as e:
+            st.error(f"Could not extract recipe: {e}")
+            return None
+    extraction_cache.put(fingerprint, result)
+    return result
+
+
+def _show_preview(handle, caption):
+    try:
+        preview = blob_store.thumbnail(handle)
+    except Exception:
+        st.warning(f"{caption}: this file can't be read as an image.")
+        return
+    if preview is None:
+        st.warning(f"{caption}: photo expired, please add it again.")
+    else:
+        st.image(preview, caption=caption, width="stretch")
+
+
 st.divider()
 
 # Add recipe section
-tab1, tab2, tab3 = st.tabs(["📱 Upload or Take Photo", "💻 Webcam (Laptop)", "✏️ Add Manually"])
+tab1, tab2, tab3, tab4 = st.tabs(["📱 Upload or Take Photo", "💻 Webcam (Laptop)", "✏️ Add Manually", "🌐 Import Web Pages"])
 
 with tab1:
     st.subheader("Upload a Recipe Photo or PDF")
@@ -25,39 +91,56 @@ with tab1:
         "For recipe cards with a front and back (e.g. HelloFresh), upload both sides together — the AI will combine them."
     )
 
-    uploaded_files = st.file_uploader(
-        "Choose a recipe photo or PDF (up to 2 images for front and back)",
-        type=["jpg", "jpeg", "png", "webp", "pdf"],
-        accept_multiple_files=True,
-    )
+    # Accepted files move into the blob store and the uploader is reset (new key), so the session
+    # keeps only [(file name, handle)] rather than the uploaded bytes
+    if "upload_blobs" not in st.session_state:
+        st.session_state["upload_blobs"] = []
+        st.session_state["upload_key"] = 0
+
+    if not st.session_state["upload_blobs"]:
+        uploaded_files = st.file_uploader(
+            "Choose a recipe photo or PDF (up to 2 images for front and back)",
+            type=["jpg", "jpeg", "png", "webp", "pdf"],
+            accept_multiple_files=True,
+            key=f"recipe_upload_{st.session_state['upload_key']}",
+        )
 
-    if uploaded_files:
-        is_pdf = any(f.name.lower().endswith(".pdf") for f in uploaded_files)
-
-        if is_pdf and len(uploaded_files) > 1:
-            st.error("Please upload only one PDF at a time.")
-        elif not is_pdf and len(uploaded_files) > 2:
-            st.error("Please upload a maximum of 2 images (front and back of a recipe card).")
-        else:
-            for f in uploaded_files:
-                if not f.name.lower().endswith(".pdf"):
-                    st.image(f, caption=f.name, width="stretch")
-                else:
-                    st.markdown(f"📄 **{f.name}** ready to extract.")
+        if uploaded_files:
+            is_pdf = any(f.name.lower().endswith(".pdf") for f in uploaded_files)
 
+            if is_pdf and len(uploaded_files) > 1:
+                st.error("Please upload only one PDF at a time.")
+            elif not is_pdf and len(uploaded_files) > 2:
+                st.error("Please upload a maximum of 2 images (front and back of a recipe card).")
+            else:
+                st.session_state["upload_blobs"] = [(f.name, blob_store.put(f.getvalue())) for f in uploaded_files]
+                st.session_state["upload_key"] += 1
+                st.rerun()
+
+    upload_blobs = st.session_state["upload_blobs"]
+    if upload_blobs:
+        is_pdf = upload_blobs[0][0].lower().endswith(".pdf")
+        for name, handle in upload_blobs:
+            if not is_pdf:
+                _show_preview(handle, name)
+            else:
+                st.markdown(f"📄 **{name}** ready to extract.")
+
+        col_change, col_extract = st.columns(2)
+        with col_change:
+            if st.button("🔄 Choose Different Files", width="stretch", key="change_upload"):
+                st.session_state["upload_blobs"] = []
+                st.rerun()
+        with col_extract:
             if st.button("Extract Recipe with AI", key="extract_upload", width="stretch"):
-                if not check_and_increment_quota(AI_DAILY_LIMIT):
-                    show_ai_limit_message()
+                files = _stored_files([handle for _, handle in upload_blobs])
+                if files is None:
+                    st.error("These files have expired. Please choose them again.")
                 else:
-                    with st.spinner("Analyzing your recipe..."):
-                        try:
-                            if is_pdf:
-                                result = extract_recipe_from_pdf(uploaded_files[0].getvalue())
-                            else:
-                                result = extract_recipe_from_images([f.getvalue() for f in uploaded_files])
-                            st.session_state["extracted_recipe"] = result
-                        except Exception as e:
-                            st.error(f"Could not extract recipe: {e}")
+                    result = _extract_recipe(files, is_pdf)
+                    if result is not None:
+                        st.session_state["extracted_recipe"] = result
+                        st.session_state["upload_blobs"] = []
 
 with tab2:
     st.subheader("Use Your Laptop Webcam")
@@ -82,7 +165,8 @@ with tab2:
         st.caption(f"Taking photo of: **{side} of card**")
         camera_photo = st.camera_input("Take a photo", label_visibility="collapsed")
         if camera_photo:
-            st.session_state["webcam_photos"].append(camera_photo.getvalue())
+            # Only the handle stays in the session; the bytes go to the blob store
+            st.session_state["webcam_photos"].append(blob_store.put(camera_photo.getvalue()))
             st.session_state["webcam_active"] = False
             st.rerun()
 
@@ -91,7 +175,7 @@ with tab2:
         photos = st.session_state["webcam_photos"]
 
         if len(photos) == 1:
-            st.image(photos[0], caption="Front", width="stretch")
+            _show_preview(photos[0], "Front")
             col_retake, col_add_back, col_extract = st.columns(3)
             with col_retake:
                 if st.button("🔄 Retake", width="stretch", key="retake_front"):
@@ -104,23 +188,21 @@ with tab2:
                     st.rerun()
             with col_extract:
                 if st.button("Extract Recipe with AI", key="extract_webcam_1", width="stretch"):
-                    if not check_and_increment_quota(AI_DAILY_LIMIT):
-                        show_ai_limit_message()
+                    images = _stored_files(photos)
+                    if images is None:
+                        st.error("These photos have expired. Please take them again.")
                     else:
-                        with st.spinner("Analyzing your recipe..."):
-                            try:
-                                result = extract_recipe_from_images(photos)
-                                st.session_state["extracted_recipe"] = result
-                                st.session_state["webcam_photos"] = []
-                            except Exception as e:
-                                st.error(f"Could not extract recipe: {e}")
+                        result = _extract_recipe(images)
+                        if result is not None:
+                            st.session_state["extracted_recipe"] = result
+                            st.session_state["webcam_photos"] = []
 
         elif len(photos) == 2:
             col_front, col_back = st.columns(2)
             with col_front:
-                st.image(photos[0], caption="Front", width="stretch")
+                _show_preview(photos[0], "Front")
             with col_back:
-                st.image(photos[1], caption="Back", width="stretch")
+                _show_preview(photos[1], "Back")
             col_retake_back, col_extract2 = st.columns(2)
             with col_retake_back:
                 if st.button("🔄 Retake Back", width="stretch", key="retake_back"):
@@ -129,16 +211,14 @@ with tab2:
                     st.rerun()
             with col_extract2:
                 if st.button("Extract Recipe with AI", key="extract_webcam_2", width="stretch"):
-                    if not check_and_increment_quota(AI_DAILY_LIMIT):
-                        show_ai_limit_message()
+                    images = _stored_files(photos)
+                    if images is None:
+                        st.error("These photos have expired. Please take them again.")
                     else:
-                        with st.spinner("Analyzing your recipe..."):
-                            try:
-                                result = extract_recipe_from_images(photos)
-                                st.session_state["extracted_recipe"] = result
-                                st.session_state["webcam_photos"] = []
-                            except Exception as e:
-                                st.error(f"Could not extract recipe: {e}")
+                        result = _extract_recipe(images)
+                        if result is not None:
+                            st.session_state["extracted_recipe"] = result
+                            st.session_state["webcam_photos"] = []
 
 # Extracted recipe review form — shown after either upload or webcam extraction
 if "extracted_recipe" in st.session_state:
@@ -149,6 +229,11 @@ if "extracted_recipe" in st.session_state:
     with st.form("save_extracted_recipe"):
         name = st.text_input("Recipe Name", value=recipe.get("name", ""))
         cooking_time = st.text_input("Cooking Time", value=recipe.get("cooking_time", ""))
+        try:
+            extracted_servings = max(1, int(float(recipe.get("servings"))))
+        except (TypeError, ValueError):
+            extracted_servings = None
+        servings = st.number_input("Servings (optional)", min_value=1, step=1, value=extracted_servings)
         instructions = st.text_area("Instructions", value=recipe.get("instructions", ""), height=150)
 
         st.markdown("**Ingredients** — review fields marked with ⚠️")
@@ -215,7 +300,7 @@ if "extracted_recipe" in st.session_state:
                 for err in errors:
                     st.error(err)
             else:
-                add_recipe(name, cooking_time, edited_ingredients, instructions)
+                add_recipe(name, cooking_time, edited_ingredients, instructions, servings)
                 del st.session_state["extracted_recipe"]
                 st.success(f"'{name}' saved!")
                 st.rerun()
@@ -225,6 +310,7 @@ with tab3:
     with st.form("manual_recipe_form", clear_on_submit=True):
         name = st.text_input("Recipe Name")
         cooking_time = st.text_input("Cooking Time", placeholder="e.g. 30 minutes")
+        servings = st.number_input("Servings (optional)", min_value=1, step=1, value=None, placeholder="e.g. 4")
         instructions = st.text_area("Instructions", placeholder="Step by step instructions...", height=150)
 
         st.markdown("**Ingredients** — one per line in the format: `Name, Amount, Unit`")
@@ -250,23 +336,78 @@ with tab3:
                                 })
                             except ValueError:
                                 pass
-                add_recipe(name.strip(), cooking_time.strip(), ingredients, instructions.strip())
+                add_recipe(name.strip(), cooking_time.strip(), ingredients, instructions.strip(), servings)
                 st.success(f"'{name}' saved!")
                 st.rerun()
             else:
                 st.error("Please enter a recipe name.")
 
+with tab4:
+    st.subheader("Import Saved Web Pages")
+    st.markdown(
+        "Most recipe sites embed the recipe in the page itself. Save the page (**File → Save Page As…**) "
+        "and upload the `.html` file — it is read directly, with no AI call. You can import many pages at once."
+    )
+    with st.form("import_pages_form", clear_on_submit=True):
+        saved_pages = st.file_uploader("Saved recipe pages", type=["html", "htm"], accept_multiple_files=True)
+        if st.form_submit_button("Import Recipes", width="stretch"):
+            if saved_pages:
+                result = import_html_documents([(f.name, f.getvalue().decode("utf-8", errors="replace")) for f in saved_pages])
+                if result["imported"]:
+                    st.success(f"Imported {result['imported']} recipe(s).")
+                if result["skipped"]:
+                    st.info(f"Skipped {result['skipped']} recipe(s) that are already saved.")
+                if result["unmeasured"]:
+                    st.info(
+                        f"Some ingredients had no amount and are listed in the instructions instead: "
+                        f"{', '.join(result['unmeasured'])}. Edit these recipes to add them."
+                    )
+                if result["without_recipe"]:
+                    st.warning(f"No recipe found in: {', '.join(result['without_recipe'])}")
+            else:
+                st.error("Please choose at least one saved page.")
+
 st.divider()
 
-# Saved recipes list
+# Saved recipes list — searched and paginated so large libraries don't render in full
 st.subheader("Saved Recipes")
-recipes = get_recipes()
+RECIPES_PER_PAGE = 20
+
+
+def _reset_recipe_page():
+    st.session_state["recipe_page"] = 0
+
+
+query = st.text_input(
+    "Search recipes",
+    key="recipe_search",
+    placeholder="🔍 Search by name, ingredient or instructions",
+    label_visibility="collapsed",
+    on_change=_reset_recipe_page,
+)
+total_matches = count_recipe_matches(query)
+page_count = max(1, -(-total_matches // RECIPES_PER_PAGE))
+page = min(st.session_state.get("recipe_page", 0), page_count - 1)
+recipes = search_recipes(query, RECIPES_PER_PAGE, page * RECIPES_PER_PAGE)
+
+household_size = get_household_size()
 
 if not recipes:
-    st.info("No recipes saved yet. Add one above.")
+    if query.strip():
+        st.info(f"No recipes match “{query.strip()}”.")
+    else:
+        st.info("No recipes saved yet. Add one above.")
 else:
+    # Only open recipes render their body; their pantry status comes from one batched lookup
+    open_ids = [r["id"] for r in recipes if st.session_state.get(f"recipe_open_{r['id']}")]
+    pantry_statuses = get_pantry_status_for_recipes(open_ids)
+
     for recipe in recipes:
-        with st.expander(f"**{recipe['name']}** — {recipe['cooking_time']}"):
+        serves = f" · serves {recipe['servings']}" if recipe["servings"] else ""
+        # A toggle rather than an expander: its state is readable before the body renders
+        with st.container(border=True):
+            if not st.toggle(f"**{recipe['name']}** — {recipe['cooking_time']}{serves}", key=f"recipe_open_{recipe['id']}"):
+                continue
             col1, col2 = st.columns([5, 1])
             with col1:
                 st.markdown("**Ingredients:**")
@@ -276,9 +417,15 @@ else:
                     st.markdown("**Instructions:**")
                     st.write(recipe["instructions"])
             with col2:
+                cooked_servings = None
+                if recipe["servings"]:
+                    cooked_servings = st.number_input(
+                        "Servings", min_value=1, step=1,
+                        value=household_size or recipe["servings"], key=f"cook_servings_{recipe['id']}",
+                    )
                 if st.button("✅ Cooked", key=f"cooked_{recipe['id']}"):
                     log_recipe_cooked(recipe["id"])
-                    deduct_recipe_ingredients(recipe["id"])
+                    deduct_recipe_ingredients(recipe["id"], cooked_servings)
                     st.success("Logged! Pantry updated.")
                 if st.button("✏️ Edit", key=f"edit_recipe_{recipe['id']}"):
                     st.session_state["editing_recipe_id"] = recipe["id"]
@@ -290,7 +437,9 @@ else:
                     st.rerun()
 
             # Pantry status for this recipe
-            pantry_status = get_recipe_pantry_status(recipe)
+            pantry_status = pantry_statuses.get(recipe["id"])
+            if pantry_status is None:
+                pantry_status = get_pantry_status_for_recipes([recipe["id"]]).get(recipe["id"], [])
             missing = [s for s in pantry_status if s["status"] == "missing"]
             short = [s for s in pantry_status if s["status"] == "short"]
             if missing or short:
@@ -302,10 +451,24 @@ else:
             else:
                 st.success("✅ You have everything for this recipe")
 
+    if page_count > 1:
+        col_prev, col_info, col_next = st.columns([1, 4, 1])
+        with col_prev:
+            if st.button("← Prev", disabled=page == 0, width="stretch", key="recipes_prev"):
+                st.session_state["recipe_page"] = page - 1
+                st.rerun()
+        with col_info:
+            first = page * RECIPES_PER_PAGE + 1
+            st.caption(f"Showing {first}–{first + len(recipes) - 1} of {total_matches} recipes · page {page + 1} of {page_count}")
+        with col_next:
+            if st.button("Next →", disabled=page >= page_count - 1, width="stretch", key="recipes_next"):
+                st.session_state["recipe_page"] = page + 1
+                st.rerun()
+
     # Inline edit form — appears below the list when a recipe is being edited
     editing_id = st.session_state.get("editing_recipe_id")
     if editing_id:
-        recipe_to_edit = next((r for r in recipes if r["id"] == editing_id), None)
+        recipe_to_edit = get_recipe(editing_id)
         if recipe_to_edit:
             st.divider()
             st.subheader(f"✏️ Editing: {recipe_to_edit['name']}")
@@ -313,6 +476,7 @@ else:
             with st.form("edit_recipe_form"):
                 edit_name = st.text_input("Recipe Name", value=recipe_to_edit["name"])
                 edit_cooking_time = st.text_input("Cooking Time", value=recipe_to_edit["cooking_time"] or "")
+                edit_servings = st.number_input("Servings (optional)", min_value=1, step=1, value=recipe_to_edit["servings"])
                 edit_instructions = st.text_area("Instructions", value=recipe_to_edit["instructions"] or "", height=150)
 
                 st.markdown("**Existing Ingredients** — edit below (clear a name to remove it)")
@@ -354,7 +518,7 @@ else:
                     elif not edited_ingredients:
                         st.error("At least one ingredient is required.")
                     else:
-                        update_recipe(editing_id, edit_name.strip(), edit_cooking_time.strip(), edited_ingredients, edit_instructions.strip())
+                        update_recipe(editing_id, edit_name.strip(), edit_cooking_time.strip(), edited_ingredients, edit_instructions.strip(), edit_servings)
                         del st.session_state["editing_recipe_id"]
                         st.success(f"'{edit_name}' updated!")
                         st.rerun()
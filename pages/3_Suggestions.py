@@ -1,10 +1,12 @@
 import streamlit as st
-from database import get_ingredients, get_recipes, get_cookable_recipes
+from data_cache import initialize_db, get_ingredients, get_recipes, rank_recipes_now
 from gemini_client import suggest_recipes
 from utils import apply_sidebar_style, show_ai_limit_message
 from database import check_and_increment_quota
 from constants import AI_DAILY_LIMIT
 
+initialize_db()
+
 st.set_page_config(page_title="CoPantry · Suggestions", page_icon="💡", layout="wide")
 apply_sidebar_style()
 
@@ -20,14 +22,30 @@ if not ingredients:
     st.warning("Your pantry is empty — add some ingredients to get suggestions.")
     st.page_link("pages/1_Pantry.py", label="Go to Pantry →")
 else:
-    # Section 1: Can cook right now
+    # Section 1: Ranked locally — every fully covered recipe, then the closest of the rest
+    ready = rank_recipes_now(k=None, cookable=True)
+    almost = rank_recipes_now(k=10, cookable=False)
+
     st.subheader("✅ Recipes You Can Make Right Now")
-    cookable = get_cookable_recipes()
-    if not cookable:
+    if not ready:
         st.info("None of your saved recipes are fully covered by your current pantry.")
     else:
-        for recipe in cookable:
-            st.write(f"- **{recipe['name']}** ({recipe['cooking_time']})")
+        for entry in ready:
+            recipe = entry["recipe"]
+            uses = f" · uses expiring {', '.join(entry['expiring'])}" if entry["expiring"] else ""
+            st.write(f"- **{recipe['name']}** ({recipe['cooking_time']}){uses}")
+
+    if almost:
+        st.subheader("🧺 Almost There")
+        st.caption("Your closest recipes, ranked by how much of each your pantry already covers.")
+        for entry in almost:
+            recipe = entry["recipe"]
+            gaps = []
+            if entry["missing"]:
+                gaps.append(f"missing {', '.join(entry['missing'])}")
+            if entry["short"]:
+                gaps.append(f"low on {', '.join(entry['short'])}")
+            st.write(f"- **{recipe['name']}** — {entry['coverage']:.0%} covered · {'; '.join(gaps)}")
 
     st.divider()
 
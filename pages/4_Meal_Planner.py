@@ -1,16 +1,24 @@
 import streamlit as st
 from datetime import date, timedelta
 from database import (
+    save_meal_entry,
+    get_data_version,
+    set_household_size,
+    set_meal_servings,
+)
+from data_cache import (
     initialize_db,
     get_recipes,
+    get_recipe_names_by_cook_count,
     get_ingredients,
-    get_recipe_cook_counts,
     get_meal_entries,
-    save_meal_entry,
-    get_shopping_plan,
     get_expiring_soon_ingredients,
+    get_household_size,
+    get_slot_servings,
+    get_ingredient_aliases,
 )
-from gemini_client import suggest_calendar_meals, reschedule_around_grocery_date
+from gemini_client import suggest_calendar_meals
+from planner import suggest_local_meals, reschedule_locally, IncrementalShoppingPlan
 from utils import apply_sidebar_style, get_local_date, show_ai_limit_message
 from database import check_and_increment_quota
 from constants import AI_DAILY_LIMIT
@@ -25,16 +33,12 @@ st.markdown("Plan your meals for the week. Changes are saved automatically.")
 
 st.divider()
 
-recipes = get_recipes()
+recipe_names = get_recipe_names_by_cook_count()
 
-if not recipes:
+if not recipe_names:
     st.warning("No saved recipes yet — add some recipes to start planning.")
     st.page_link("pages/2_Recipes.py", label="Add a Recipe →")
 else:
-    # Sort recipes by most-cooked so frequent meals appear first
-    cook_counts = get_recipe_cook_counts()
-    recipes_sorted = sorted(recipes, key=lambda r: cook_counts.get(r["name"], 0), reverse=True)
-
     # Week navigation state
     if "week_offset" not in st.session_state:
         st.session_state["week_offset"] = 0
@@ -73,8 +77,9 @@ else:
     MEAL_TYPES = ["Breakfast", "Lunch", "Dinner"]
     GROCERY_ITEM_THRESHOLD = 5
 
-    recipe_names = [r["name"] for r in recipes_sorted]
+    # Most-cooked first; the list is cached per recipes/cook-history version
     all_options = SPECIAL + recipe_names
+    option_set = set(all_options)
 
     # Load from DB on page open (only fill keys not already in session state)
     db_entries = get_meal_entries(week_dates[0].isoformat(), week_dates[-1].isoformat())
@@ -85,44 +90,63 @@ else:
             if sk not in st.session_state:
                 st.session_state[sk] = day_meals.get(meal_type, UNPLANNED)
 
+    def _week_values():
+        return {
+            (d.isoformat(), mt): st.session_state.get(f"meal_{d.isoformat()}_{mt}", UNPLANNED)
+            for d in week_dates
+            for mt in MEAL_TYPES
+        }
+
+    def _home_meals():
+        return {f"{d}_{mt}": v for (d, mt), v in _week_values().items() if v not in SPECIAL}
+
+    def _shop_by_date(plan):
+        if plan["fully_covered"] or len(plan["items"]) < GROCERY_ITEM_THRESHOLD:
+            return None
+        return date.fromisoformat(plan["shop_by"])
+
+    def _show_plan_diff():
+        diff = st.session_state.pop("shopping_plan_diff", None)
+        if not diff:
+            return
+        # An ingredient on both sides is still short, just for a different amount or meal
+        new_names = list(dict.fromkeys(s["name"] for s in diff["new_shortages"]))
+        resolved_names = list(dict.fromkeys(s["name"] for s in diff["resolved_shortages"]))
+        new_names, resolved_names = (
+            [n for n in new_names if n not in resolved_names],
+            [n for n in resolved_names if n not in new_names],
+        )
+        if new_names:
+            st.toast(f"🛒 Now short on: {', '.join(new_names)}")
+        if resolved_names:
+            st.toast(f"✅ No longer short on: {', '.join(resolved_names)}")
+
     def _save_meal(date_key, meal_type):
         val = st.session_state.get(f"meal_{date_key}_{meal_type}", UNPLANNED)
         save_meal_entry(date_key, meal_type, val)
-
-    day_labels = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
-
-    # Table header
-    h_day, h_breakfast, h_lunch, h_dinner = st.columns([1.5, 2.5, 2.5, 2.5])
-    with h_day:
-        st.markdown("**Day**")
-    with h_breakfast:
-        st.markdown("**🌅 Breakfast**")
-    with h_lunch:
-        st.markdown("**☀️ Lunch**")
-    with h_dinner:
-        st.markdown("**🌙 Dinner**")
-
-    st.caption("Tip: type in a dropdown to search recipes")
-
-    # Compute grocery day to annotate the calendar
-    home_meals_flat = {}
-    for d in week_dates:
-        for mt in MEAL_TYPES:
-            val = st.session_state.get(f"meal_{d.isoformat()}_{mt}", UNPLANNED)
-            if val not in SPECIAL:
-                home_meals_flat[f"{d.isoformat()}_{mt}"] = val
-
-    shop_by_date = None
-    if home_meals_flat:
-        plan = get_shopping_plan(home_meals_flat, recipes)
-        if not plan["fully_covered"] and len(plan["items"]) >= GROCERY_ITEM_THRESHOLD:
-            shop_by_date = date.fromisoformat(plan["shop_by"])
-
-    # Calendar rows
-    for day_date, day_label in zip(week_dates, day_labels):
+        # Rerun the edited row and the panels that read the slots, not the whole page
+        targets = [f"planner_row_{date_key}", "planner_servings", "planner_summary", "planner_grocery"]
+        # Update the shopping plan for just this slot and remember what changed for a toast
+        state = st.session_state.get("shopping_plan_state")
+        if state:
+            slot_key = f"{date_key}_{meal_type}"
+            old_shop_day = _shop_by_date(state["plan"].as_plan())
+            st.session_state["shopping_plan_diff"] = state["plan"].set_meal(
+                slot_key,
+                None if val in SPECIAL else val,
+                get_slot_servings({slot_key: val}).get(slot_key),
+            )
+            # The 🛒 badge moves between rows when the recommended shopping day does
+            new_shop_day = _shop_by_date(state["plan"].as_plan())
+            if new_shop_day != old_shop_day:
+                targets += [f"planner_row_{d.isoformat()}" for d in (old_shop_day, new_shop_day) if d in week_dates]
+        st.rerun(list(dict.fromkeys(targets)))
+
+    def _day_row(day_date, day_label):
+        """One calendar row, rendered as its own fragment (key planner_row_<date>)."""
         date_key = day_date.isoformat()
         is_today = day_date == today
-        is_shop_day = shop_by_date and day_date == shop_by_date
+        is_shop_day = day_date == _shop_by_date(st.session_state["shopping_plan_state"]["plan"].as_plan())
 
         col_day, col_breakfast, col_lunch, col_dinner = st.columns([1.5, 2.5, 2.5, 2.5])
 
@@ -142,7 +166,7 @@ else:
             with col:
                 sk = f"meal_{date_key}_{meal_type}"
                 current = st.session_state.get(sk, UNPLANNED)
-                if current not in all_options:
+                if current not in option_set:
                     current = UNPLANNED
                     st.session_state[sk] = current
                 st.selectbox(
@@ -155,31 +179,126 @@ else:
                     args=(date_key, meal_type),
                 )
 
+    day_labels = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+    # Table header
+    h_day, h_breakfast, h_lunch, h_dinner = st.columns([1.5, 2.5, 2.5, 2.5])
+    with h_day:
+        st.markdown("**Day**")
+    with h_breakfast:
+        st.markdown("**🌅 Breakfast**")
+    with h_lunch:
+        st.markdown("**☀️ Lunch**")
+    with h_dinner:
+        st.markdown("**🌙 Dinner**")
+
+    household_size = get_household_size()
+
+    def _save_household_size():
+        size = st.session_state["household_size"]
+        set_household_size(size or None)
+
+    tip_col, household_col = st.columns([5, 2])
+    with tip_col:
+        st.caption("Tip: type in a dropdown to search recipes")
+    with household_col:
+        st.number_input(
+            "👥 Household size",
+            min_value=0,
+            step=1,
+            value=household_size or 0,
+            key="household_size",
+            on_change=_save_household_size,
+            help="Recipes with a servings count are scaled to this many people. 0 cooks recipes as written.",
+        )
+
+    # Compute grocery day to annotate the calendar
+    home_meals_flat = _home_meals()
+
+    # Keep one incremental shopping plan per week; rebuild only when pantry or recipes change
+    slot_servings = get_slot_servings(home_meals_flat)
+    plan_token = (week_dates[0].isoformat(), get_data_version("pantry", "recipes"))
+    state = st.session_state.get("shopping_plan_state")
+    if not state or state["token"] != plan_token:
+        state = {
+            "token": plan_token,
+            "plan": IncrementalShoppingPlan(
+                home_meals_flat, get_recipes(), get_ingredients(), slot_servings, get_ingredient_aliases()
+            ),
+        }
+        st.session_state["shopping_plan_state"] = state
+        st.session_state.pop("shopping_plan_diff", None)
+    else:
+        state["plan"].sync(home_meals_flat, slot_servings)
+
+    # Calendar rows
+    for day_date, day_label in zip(week_dates, day_labels):
+        st.fragment(_day_row, key=f"planner_row_{day_date.isoformat()}")(day_date, day_label)
+
+    # The panels below are fragments that read the slots from session state, so a slot edit
+    # reruns them (see _save_meal) without rerunning the page
+
+    # Per-meal servings override the household size, e.g. when guests come for dinner
+    @st.fragment(key="planner_servings")
+    def _servings_panel():
+        home_meals = _home_meals()
+        if not home_meals:
+            return
+        with st.container(border=True):
+            if st.toggle("👥 Servings per meal", key="servings_open"):
+                slot_servings = get_slot_servings(home_meals)
+                slot_labels = {
+                    key: f"{date.fromisoformat(key[:10]).strftime('%a %b %-d')} · {key[11:]} — {meal}"
+                    for key, meal in home_meals.items()
+                }
+                serv_slot_col, serv_count_col, serv_btn_col = st.columns([4, 1.5, 1.5])
+                with serv_slot_col:
+                    servings_slot = st.selectbox("Meal", list(slot_labels), format_func=slot_labels.get)
+                with serv_count_col:
+                    servings_count = st.number_input(
+                        "Servings", min_value=1, step=1, value=slot_servings.get(servings_slot) or household_size or 1
+                    )
+                with serv_btn_col:
+                    st.write("")
+                    if st.button("Save", width="stretch", key="save_slot_servings"):
+                        set_meal_servings(servings_slot[:10], servings_slot[11:], int(servings_count))
+                        st.rerun()
+                st.caption(
+                    "Only recipes with a servings count are scaled. "
+                    + (f"Other meals use the household size ({household_size})." if household_size else "")
+                )
+
+    _servings_panel()
+
     st.divider()
 
     # Week summary metrics
-    all_week_values = {
-        (d.isoformat(), mt): st.session_state.get(f"meal_{d.isoformat()}_{mt}", UNPLANNED)
-        for d in week_dates
-        for mt in MEAL_TYPES
-    }
-
-    home_count = sum(1 for v in all_week_values.values() if v not in SPECIAL)
-    eating_out_count = sum(1 for v in all_week_values.values() if v == EATING_OUT)
-    vacation_count = sum(1 for v in all_week_values.values() if v == VACATION)
-    unplanned_count = sum(1 for v in all_week_values.values() if v == UNPLANNED)
-
-    c1, c2, c3, c4 = st.columns(4)
-    c1.metric("Home Meals", home_count)
-    c2.metric("Eating Out", eating_out_count)
-    c3.metric("Vacation / Skip", vacation_count)
-    c4.metric("Unplanned", unplanned_count)
+    @st.fragment(key="planner_summary")
+    def _week_summary():
+        all_week_values = _week_values()
+
+        home_count = sum(1 for v in all_week_values.values() if v not in SPECIAL)
+        eating_out_count = sum(1 for v in all_week_values.values() if v == EATING_OUT)
+        vacation_count = sum(1 for v in all_week_values.values() if v == VACATION)
+        unplanned_count = sum(1 for v in all_week_values.values() if v == UNPLANNED)
+
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Home Meals", home_count)
+        c2.metric("Eating Out", eating_out_count)
+        c3.metric("Vacation / Skip", vacation_count)
+        c4.metric("Unplanned", unplanned_count)
+
+    _week_summary()
 
     # ---------------------------------------------------------------------------
     # Grocery recommendation
     # ---------------------------------------------------------------------------
-    if home_meals_flat:
-        plan = get_shopping_plan(home_meals_flat, recipes)
+    @st.fragment(key="planner_grocery")
+    def _grocery_panel():
+        _show_plan_diff()
+        if not _home_meals():
+            return
+        plan = st.session_state["shopping_plan_state"]["plan"].as_plan()
         item_count = len(plan["items"])
 
         if plan["fully_covered"]:
@@ -234,61 +353,58 @@ else:
                 )
             with col_btn:
                 reschedule_clicked = st.button(
-                    "✨ Reschedule with AI",
+                    "🔁 Reschedule",
                     width="stretch",
                     key="reschedule_btn",
                 )
 
             if reschedule_clicked:
-                if not check_and_increment_quota(AI_DAILY_LIMIT):
-                    show_ai_limit_message()
-                else:
-                    current_meal_plan = {}
-                    for d in week_dates:
-                        date_str = d.isoformat()
-                        day_meals = {}
-                        for mt in MEAL_TYPES:
-                            val = st.session_state.get(f"meal_{date_str}_{mt}", UNPLANNED)
-                            if val != UNPLANNED:
-                                day_meals[mt] = val
-                        if day_meals:
-                            current_meal_plan[date_str] = day_meals
-
-                    pantry = get_ingredients()
-                    with st.spinner("Reworking your meal plan around your grocery date..."):
-                        try:
-                            result = reschedule_around_grocery_date(
-                                current_meal_plan,
-                                recipes,
-                                pantry,
-                                alt_date.isoformat(),
-                            )
-                            new_plan = result.get("plan", {})
-                            feasible = result.get("feasible", True)
-                            note = result.get("note", "")
-
-                            # Apply new plan to session state and DB
-                            for date_str, meals in new_plan.items():
-                                for mt, meal_name in meals.items():
-                                    if meal_name in all_options:
-                                        sk = f"meal_{date_str}_{mt}"
-                                        st.session_state[sk] = meal_name
-                                        save_meal_entry(date_str, mt, meal_name)
-
-                            if not feasible:
-                                st.error(
-                                    f"⚠️ {note}\n\nSome meals before your grocery date couldn't be covered "
-                                    f"from your current pantry. Consider urgently picking up a few essentials: "
-                                    f"{', '.join(item['name'] for item in plan['items'][:5])}."
-                                )
-                            else:
-                                if note:
-                                    st.success(f"✅ Meal plan rescheduled. {note}")
-                                else:
-                                    st.success("✅ Meal plan rescheduled around your grocery date.")
-                            st.rerun()
-                        except Exception as e:
-                            st.error(f"Could not reschedule: {e}")
+                # Unplanned slots are included so meals displaced from before the trip can move into them
+                current_meal_plan = {
+                    d.isoformat(): {mt: st.session_state.get(f"meal_{d.isoformat()}_{mt}", UNPLANNED) for mt in MEAL_TYPES}
+                    for d in week_dates
+                }
+
+                # Scaled per slot, as in the shopping plan: guests' servings, else the household size
+                result = reschedule_locally(
+                    current_meal_plan,
+                    get_recipes(),
+                    get_ingredients(),
+                    alt_date.isoformat(),
+                    get_ingredient_aliases(),
+                    get_slot_servings({
+                        f"{date_str}_{mt}": meal for date_str, meals in current_meal_plan.items() for mt, meal in meals.items()
+                    }),
+                )
+
+                # Apply new plan to the DB; drop rendered widget keys so they reload from it
+                for date_str, meals in result["plan"].items():
+                    for mt, meal_name in meals.items():
+                        if meal_name in all_options and meal_name != current_meal_plan.get(date_str, {}).get(mt):
+                            save_meal_entry(date_str, mt, meal_name)
+                            st.session_state.pop(f"meal_{date_str}_{mt}", None)
+
+                st.session_state["reschedule_result"] = {
+                    "feasible": result["feasible"],
+                    "best_effort": result.get("best_effort", False),
+                    "note": result["note"],
+                    "essentials": list(dict.fromkeys(item["name"] for item in plan["items"]))[:5],
+                }
+                st.rerun()
+
+    _grocery_panel()
+
+    reschedule_result = st.session_state.pop("reschedule_result", None)
+    if reschedule_result and reschedule_result["best_effort"]:
+        st.warning(f"⚠️ {reschedule_result['note']}")
+    elif reschedule_result and not reschedule_result["feasible"]:
+        st.error(
+            f"⚠️ {reschedule_result['note']}\n\nSome meals before your grocery date couldn't be covered "
+            f"from your current pantry. Consider urgently picking up a few essentials: "
+            f"{', '.join(reschedule_result['essentials'])}."
+        )
+    elif reschedule_result:
+        st.success(f"✅ Meal plan rescheduled. {reschedule_result['note']}")
 
     st.divider()
 
@@ -306,8 +422,38 @@ else:
     col_ai, col_shop = st.columns(2)
 
     with col_ai:
-        if st.button("✨ Fill Unplanned Days with AI", width="stretch"):
-            if not check_and_increment_quota(AI_DAILY_LIMIT):
+        fill_types = st.multiselect(
+            "Meals to fill",
+            MEAL_TYPES,
+            default=MEAL_TYPES,
+            key="fill_meal_types",
+        )
+        creative = st.toggle(
+            "✨ Creative mode (AI)",
+            key="fill_creative",
+            help="Ask Gemini instead of the local planner. Uses AI quota and only fills Dinner on fully unplanned days.",
+        )
+        if st.button("🪄 Fill Unplanned Slots", width="stretch"):
+            if not creative:
+                slots = [
+                    (d.isoformat(), mt)
+                    for d in week_dates
+                    for mt in fill_types
+                    if st.session_state.get(f"meal_{d.isoformat()}_{mt}", UNPLANNED) == UNPLANNED
+                ]
+                if not fill_types:
+                    st.info("Pick at least one meal type to fill.")
+                elif not slots:
+                    st.info("No unplanned slots for the selected meals this week.")
+                else:
+                    suggestions = suggest_local_meals(slots, home_meals_flat)
+                    for slot_key, recipe_name in suggestions.items():
+                        date_str, mt = slot_key.split("_", 1)
+                        save_meal_entry(date_str, mt, recipe_name)
+                        # Widgets are already rendered — drop the key so it reloads from the DB
+                        st.session_state.pop(f"meal_{date_str}_{mt}", None)
+                    st.rerun()
+            elif not check_and_increment_quota(AI_DAILY_LIMIT):
                 show_ai_limit_message()
             else:
                 unplanned_dates = []
@@ -326,12 +472,11 @@ else:
                     with st.spinner("Suggesting meals for unplanned days..."):
                         try:
                             expiring = get_expiring_soon_ingredients(days=7)
-                            suggestions = suggest_calendar_meals(recipes, unplanned_dates, day_primary_map, expiring_ingredients=expiring or None)
+                            suggestions = suggest_calendar_meals(get_recipes(), unplanned_dates, day_primary_map, expiring_ingredients=expiring or None)
                             for date_str, recipe_name in suggestions.items():
-                                if recipe_name in recipe_names:
-                                    sk = f"meal_{date_str}_Dinner"
-                                    st.session_state[sk] = recipe_name
+                                if recipe_name in option_set:
                                     save_meal_entry(date_str, "Dinner", recipe_name)
+                                    st.session_state.pop(f"meal_{date_str}_Dinner", None)
                             st.rerun()
                         except Exception as e:
                             st.error(f"Could not suggest meals: {e}")
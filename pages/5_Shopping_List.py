@@ -1,19 +1,27 @@
+import time
 import streamlit as st
 from datetime import date, timedelta
-from utils import apply_sidebar_style, get_local_date
+from utils import apply_sidebar_style, get_local_date, show_ai_limit_message
 from database import (
+    check_and_increment_quota,
+    add_shopping_list_item,
+)
+from data_cache import (
     initialize_db,
+    flush_shopping_changes,
     get_recipes,
+    get_ingredients,
     get_shopping_plan,
+    get_slot_servings,
+    get_ingredient_aliases,
     get_meal_entries,
     get_shopping_list_items,
-    add_shopping_list_item,
-    toggle_shopping_list_item,
-    delete_shopping_list_item,
-    clear_checked_shopping_items,
 )
+from shopping import consolidate_shopping_list, group_by_category, shopping_list_text, shopping_list_csv
+from gemini_client import generate_weekly_shopping_list
+from constants import AI_DAILY_LIMIT
 
-initialize_db()
+initialize_db(keep_shopping_changes=True)
 
 st.set_page_config(page_title="CoPantry · Shopping List", page_icon="🛒", layout="wide")
 apply_sidebar_style()
@@ -48,7 +56,8 @@ elif not recipes:
     st.info("No recipes saved yet.")
     st.page_link("pages/2_Recipes.py", label="Add a Recipe →")
 else:
-    plan = get_shopping_plan(home_meals_flat, recipes)
+    slot_servings = get_slot_servings(home_meals_flat)
+    plan = get_shopping_plan(home_meals_flat, slot_servings)
 
     if plan["fully_covered"]:
         st.success("✅ Your pantry covers all planned meals this week — nothing to buy.")
@@ -62,32 +71,55 @@ else:
         else:
             st.info(f"🗓️ Shop by **{shop_by.strftime('%A, %b %-d')}**")
 
-        # Display as a table
-        rows = []
-        for item in plan["items"]:
-            rows.append({
-                "Ingredient": item["name"],
-                "Need": f"{item['need_amount']} {item['need_unit']}",
-                "Have": f"{item['have_amount']} {item['have_unit']}",
-                "Runs out": date.fromisoformat(item["runs_out_on"]).strftime("%a %b %-d"),
-                "For": item["recipe"],
-            })
-        st.table(rows)
-
-        # Download
-        lines = [f"Shopping List — shop by {shop_by.strftime('%A, %b %-d')}", ""]
-        for item in plan["items"]:
-            lines.append(
-                f"- {item['name']}: need {item['need_amount']} {item['need_unit']} "
-                f"(have {item['have_amount']} {item['have_unit']}) "
-                f"for {item['recipe']}"
-            )
-        st.download_button(
-            label="Download Shopping List",
-            data="\n".join(lines),
-            file_name="shopping_list.txt",
-            mime="text/plain",
+        # Consolidated list: whole-week demand netted against the pantry, rounded to packages
+        rows = consolidate_shopping_list(
+            home_meals_flat, recipes, get_ingredients(), slot_servings, get_ingredient_aliases()
         )
+        for category, items in group_by_category(rows):
+            st.markdown(f"**{category}**")
+            st.table([
+                {
+                    "Ingredient": row["name"],
+                    "Buy": row["package_label"] or f"{row['buy_amount']} {row['buy_unit']}",
+                    "Need": f"{row['need_amount']} {row['need_unit']}",
+                    "Have": f"{row['have_amount']} {row['have_unit']}",
+                    "First needed": date.fromisoformat(row["first_needed"]).strftime("%a %b %-d"),
+                    "For": ", ".join(row["recipes"]),
+                }
+                for row in items
+            ])
+
+        title = f"Shopping List — shop by {shop_by.strftime('%A, %b %-d')}"
+        col_txt, col_csv, col_ai = st.columns(3)
+        with col_txt:
+            st.download_button(
+                label="Download Shopping List",
+                data=shopping_list_text(rows, title),
+                file_name="shopping_list.txt",
+                mime="text/plain",
+                width="stretch",
+            )
+        with col_csv:
+            st.download_button(
+                label="Download CSV",
+                data=shopping_list_csv(rows),
+                file_name="shopping_list.csv",
+                mime="text/csv",
+                width="stretch",
+            )
+        with col_ai:
+            if st.button("✨ Write as a note (AI)", width="stretch", disabled=not rows):
+                if not check_and_increment_quota(AI_DAILY_LIMIT):
+                    show_ai_limit_message()
+                else:
+                    with st.spinner("Writing your shopping note..."):
+                        try:
+                            st.session_state["shopping_note"] = generate_weekly_shopping_list(rows)
+                        except Exception as e:
+                            st.error(f"Could not write the note: {e}")
+        if st.session_state.get("shopping_note"):
+            with st.expander("✨ Shopping note", expanded=True):
+                st.markdown(st.session_state["shopping_note"])
 
 st.divider()
 
@@ -97,49 +129,116 @@ st.divider()
 st.subheader("📝 My List")
 st.caption("Add anything else you need — household items, extras, or ingredients not in your meal plan.")
 
-# Add item form
-with st.form("add_item_form", clear_on_submit=True):
-    col_input, col_btn = st.columns([4, 1])
-    with col_input:
-        new_item = st.text_input("Item", placeholder="e.g. Paper towels", label_visibility="collapsed")
-    with col_btn:
-        add_submitted = st.form_submit_button("Add", width="stretch")
-    if add_submitted and new_item.strip():
-        add_shopping_list_item(new_item.strip())
-        st.rerun()
-
-# Display checklist
-items = get_shopping_list_items()
-
-if not items:
-    st.caption("No items yet — add something above.")
-else:
-    checked_count = sum(1 for i in items if i["checked"])
-
-    for item in items:
-        col_check, col_name, col_del = st.columns([0.5, 5, 0.5])
-        with col_check:
-            new_state = st.checkbox(
-                "",
-                value=item["checked"],
-                key=f"check_{item['id']}",
-                label_visibility="collapsed",
+# Checkbox toggles and removals are applied to the list straight away. The first edit after
+# SYNC_SECONDS without any is written at once; edits that follow it in quick succession are written
+# in one batch once nothing has changed for SYNC_SECONDS (or on "Sync now", or on the next run of
+# any other page). The checklist only polls while edits are waiting, and says so.
+SYNC_SECONDS = 3
+
+
+def _pending():
+    return st.session_state.setdefault("shopping_pending", {"checked": {}, "deleted": set()})
+
+
+def _edited():
+    """Note an edit just buffered, writing it at once if the list had been idle for SYNC_SECONDS."""
+    now = time.monotonic()
+    idle = now - st.session_state.get("shopping_edited_at", 0.0) >= SYNC_SECONDS
+    st.session_state["shopping_edited_at"] = now
+    if idle:
+        flush_shopping_changes()
+
+
+def _toggle_item(item_id):
+    _pending()["checked"][item_id] = st.session_state[f"check_{item_id}"]
+    _edited()
+
+
+def _remove_item(item_id):
+    pending = _pending()
+    pending["checked"].pop(item_id, None)
+    pending["deleted"].add(item_id)
+    _edited()
+
+
+def _clear_checked(checked_ids):
+    _pending()["deleted"].update(checked_ids)
+    flush_shopping_changes()
+
+
+def _pending_count():
+    """Number of buffered edits, after writing them if nothing has changed for SYNC_SECONDS."""
+    pending = _pending()
+    if time.monotonic() - st.session_state.get("shopping_edited_at", 0.0) >= SYNC_SECONDS:
+        flush_shopping_changes()
+        pending = _pending()
+    return len(pending["checked"]) + len(pending["deleted"])
+
+
+def _checklist(polling):
+    pending_count = _pending_count()
+    if bool(pending_count) != polling:
+        st.rerun()  # edits started or finished waiting — rerun the page to start or stop polling
+    pending = _pending()
+
+    # Add item form
+    with st.form("add_item_form", clear_on_submit=True):
+        col_input, col_btn = st.columns([4, 1])
+        with col_input:
+            new_item = st.text_input("Item", placeholder="e.g. Paper towels", label_visibility="collapsed")
+        with col_btn:
+            add_submitted = st.form_submit_button("Add", width="stretch")
+        if add_submitted and new_item.strip():
+            add_shopping_list_item(new_item.strip())
+
+    # Display checklist: saved items with the unsynced edits laid over them
+    items = [
+        dict(item, checked=pending["checked"].get(item["id"], item["checked"]))
+        for item in get_shopping_list_items()
+        if item["id"] not in pending["deleted"]
+    ]
+
+    if not items:
+        st.caption("No items yet — add something above.")
+    else:
+        checked_ids = [i["id"] for i in items if i["checked"]]
+
+        for item in items:
+            col_check, col_name, col_del = st.columns([0.5, 5, 0.5])
+            with col_check:
+                st.checkbox(
+                    "",
+                    value=item["checked"],
+                    key=f"check_{item['id']}",
+                    label_visibility="collapsed",
+                    on_change=_toggle_item,
+                    args=(item["id"],),
+                )
+            with col_name:
+                if item["checked"]:
+                    st.markdown(f"~~{item['name']}~~")
+                else:
+                    st.write(item["name"])
+            with col_del:
+                st.button("✕", key=f"del_{item['id']}", help="Remove", on_click=_remove_item, args=(item["id"],))
+
+        if checked_ids:
+            st.write("")
+            checked_count = len(checked_ids)
+            st.button(
+                f"Clear {checked_count} checked item{'s' if checked_count > 1 else ''}",
+                type="secondary",
+                on_click=_clear_checked,
+                args=(checked_ids,),
             )
-            if new_state != item["checked"]:
-                toggle_shopping_list_item(item["id"], new_state)
-                st.rerun()
-        with col_name:
-            if item["checked"]:
-                st.markdown(f"~~{item['name']}~~")
-            else:
-                st.write(item["name"])
-        with col_del:
-            if st.button("✕", key=f"del_{item['id']}", help="Remove"):
-                delete_shopping_list_item(item["id"])
-                st.rerun()
-
-    if checked_count > 0:
-        st.write("")
-        if st.button(f"Clear {checked_count} checked item{'s' if checked_count > 1 else ''}", type="secondary"):
-            clear_checked_shopping_items()
-            st.rerun()
+
+    if pending_count:
+        col_status, col_sync = st.columns([5, 1])
+        with col_status:
+            st.caption(f"🔄 {pending_count} change{'s' if pending_count > 1 else ''} not synced yet")
+        with col_sync:
+            st.button("Sync now", key="shopping_sync", width="stretch", on_click=flush_shopping_changes)
+
+
+shopping_edits_waiting = _pending_count() > 0
+st.fragment(_checklist, run_every=SYNC_SECONDS if shopping_edits_waiting else None)(shopping_edits_waiting)
@@ -1,6 +1,9 @@
 import streamlit as st
+from data_cache import initialize_db
 from utils import apply_sidebar_style
 
+initialize_db()
+
 st.set_page_config(page_title="CoPantry · Feedback", page_icon="💬", layout="wide")
 apply_sidebar_style()
 
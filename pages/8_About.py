@@ -1,5 +1,5 @@
 import streamlit as st
-from database import initialize_db
+from data_cache import initialize_db
 from utils import apply_sidebar_style
 
 initialize_db()
@@ -0,0 +1,155 @@
+"""Shared recipe × pantry coverage index.
+
+Every canonical ingredient name gets a bit position. Each recipe is stored as a
+bitmask of the ingredients it needs plus its base-unit amounts, and the pantry
+as a bitmask of what is stocked plus an array of base amounts. Cookability,
+forgotten ingredients, per-recipe status and freezer checks then reduce to
+integer mask operations on one structure, which is rebuilt only when the
+pantry/recipes data version, aliases or household size change.
+"""
+from array import array
+from database import (
+    _to_base,
+    current_household,
+    get_data_version,
+    get_recipes,
+    get_ingredients,
+    get_household_size,
+    get_ingredient_aliases,
+    canonical_name,
+    canonical_pantry,
+    scaled_ingredients,
+)
+
+
+def _bit_positions(mask):
+    """Yield the positions of the set bits in mask, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class CoverageIndex:
+    """
+    Coverage of saved recipes by the current pantry.
+
+    recipes:  full recipe list from get_recipes()
+    pantry:   ingredient list from get_ingredients()
+    servings: people to cook for (scales recipes that have a servings count)
+    aliases:  {alias: canonical} from get_ingredient_aliases()
+    """
+
+    def __init__(self, recipes, pantry, servings=None, aliases=None):
+        self._aliases = aliases or {}
+        self._bit = {}
+        self.keys = []
+
+        # Pantry: stocked mask, freezer mask, base amounts and units by bit
+        self.stock = array("d")
+        self.stock_units = []
+        self.pantry_items = {}
+        self.pantry_mask = 0
+        self.freezer_mask = 0
+        self._pantry = [(self._bit_for(item["name"]), item) for item in pantry]
+        # Stock under an alias and its canonical name is summed, as in get_recipe_pantry_status()
+        for key, item in canonical_pantry(pantry, self._aliases).items():
+            self.pantry_items[self._bit[key]] = item
+        for bit, item in self.pantry_items.items():
+            self.stock[bit], self.stock_units[bit] = _to_base(item["amount"], item["unit"])
+            self.pantry_mask |= 1 << bit
+        for bit, item in self._pantry:
+            if (item.get("location") or "Fridge") == "Freezer":
+                self.freezer_mask |= 1 << bit
+
+        # Recipes: requirement mask, satisfied mask and (bit, base amount, base unit, ingredient) list
+        self.recipes = {}
+        self.used_mask = 0
+        for recipe in recipes:
+            mask = short_mask = 0
+            requirements = []
+            for ing in scaled_ingredients(recipe, servings):
+                bit = self._bit_for(ing["name"])
+                need, unit = _to_base(ing["amount"], ing["unit"])
+                requirements.append((bit, need, unit, ing))
+                mask |= 1 << bit
+                if not self._covers(bit, need, unit):
+                    short_mask |= 1 << bit
+            ok_mask = mask & ~short_mask
+            self.recipes[recipe["id"]] = {
+                "recipe": recipe, "mask": mask, "ok_mask": ok_mask, "requirements": requirements,
+            }
+            self.used_mask |= mask
+
+    def _bit_for(self, name):
+        key = canonical_name(name, self._aliases)
+        bit = self._bit.get(key)
+        if bit is None:
+            bit = self._bit[key] = len(self.keys)
+            self.keys.append(key)
+            self.stock.append(0.0)
+            self.stock_units.append(None)
+        return bit
+
+    def _covers(self, bit, need, unit):
+        if not self.pantry_mask >> bit & 1:
+            return False
+        if self.stock_units[bit] != unit:
+            return True  # incomparable units — don't block
+        return self.stock[bit] >= need
+
+    def cookable_recipes(self):
+        """Recipes whose every ingredient is stocked in sufficient quantity."""
+        return [entry["recipe"] for entry in self.recipes.values() if entry["ok_mask"] == entry["mask"]]
+
+    def forgotten_ingredients(self):
+        """Pantry items not used by any saved recipe."""
+        unused = self.pantry_mask & ~self.used_mask
+        return [item for bit, item in self._pantry if unused >> bit & 1]
+
+    def has_recipe(self, recipe):
+        entry = self.recipes.get(recipe.get("id"))
+        return entry is not None and entry["recipe"].get("updated_at") == recipe.get("updated_at")
+
+    def recipe_status(self, recipe_id):
+        """Per-ingredient status in get_recipe_pantry_status() form."""
+        result = []
+        for bit, need, unit, ing in self.recipes[recipe_id]["requirements"]:
+            item = self.pantry_items.get(bit)
+            if item is None:
+                result.append({
+                    "name": ing["name"], "amount": ing["amount"], "unit": ing["unit"],
+                    "status": "missing", "have_amount": 0, "have_unit": ing["unit"],
+                })
+                continue
+            result.append({
+                "name": ing["name"], "amount": ing["amount"], "unit": ing["unit"],
+                "status": "ok" if self._covers(bit, need, unit) else "short",
+                "have_amount": item["amount"], "have_unit": item["unit"],
+            })
+        return result
+
+    def freezer_ingredients(self, recipe):
+        """Display names of the recipe's ingredients that are stocked in the freezer."""
+        entry = self.recipes.get(recipe.get("id"))
+        if entry is None:
+            return []
+        return [self.pantry_items[bit]["name"] for bit in _bit_positions(entry["mask"] & self.freezer_mask)]
+
+
+MAX_CACHED_HOUSEHOLDS = 16
+_cached = {}  # {household_id: (token, CoverageIndex)}, least recently used first
+
+
+def get_coverage_index():
+    """Return the household's index, rebuilding it only when pantry, recipes, aliases or settings (household size) changed."""
+    household_id = current_household()
+    token = get_data_version("pantry", "recipes", "settings")
+    cached = _cached.pop(household_id, None)
+    if cached is None or cached[0] != token:
+        index = CoverageIndex(get_recipes(), get_ingredients(), get_household_size(), get_ingredient_aliases())
+        cached = (token, index)
+    _cached[household_id] = cached
+    while len(_cached) > MAX_CACHED_HOUSEHOLDS:
+        del _cached[next(iter(_cached))]
+    return cached[1]
@@ -0,0 +1,687 @@
+"""Local meal planning engine.
+
+Fills meal slots from saved recipes without calling the model. Candidates are
+scored against a simulated pantry (the same inventory projection used by
+get_shopping_plan), expiring ingredients, cook history and variety, and slots
+are filled greedily in date order so later picks see what earlier picks used.
+
+Also hosts the grocery-date rescheduler, which solves "which meals can I still
+make before I shop?" exactly instead of asking the model, the incremental
+shopping plan used by the Meal Planner, and the "almost cookable" ranking used
+by the Suggestions page.
+"""
+import bisect
+import heapq
+import math
+from collections import Counter
+from datetime import date, timedelta
+from database import (
+    _to_base,
+    get_recipes,
+    get_ingredients,
+    get_expiring_soon_ingredients,
+    get_recipe_cook_counts,
+    get_recipe_meal_type_counts,
+    build_inventory,
+    consume_from_inventory,
+    recipe_base_demand,
+    make_shortage,
+    get_household_size,
+    scale_recipes,
+    scaled_ingredients,
+    get_ingredient_aliases,
+    canonical_name,
+)
+
+MEAL_TYPES = ["Breakfast", "Lunch", "Dinner"]
+UNPLANNED = "— Unplanned —"
+SPECIAL_MEALS = {UNPLANNED, "🍽️ Eating Out", "🏖️ Vacation / Skip"}
+
+# Score weights — coverage dominates so the planner prefers meals the pantry can actually make
+COVERAGE_WEIGHT = 4.0
+EXPIRING_WEIGHT = 2.0
+COOK_COUNT_WEIGHT = 1.0
+MEAL_TYPE_WEIGHT = 1.5
+SAME_DAY_PENALTY = 3.0
+ADJACENT_DAY_PENALTY = 1.5
+REPEAT_PENALTY = 0.75
+
+
+def _slot_key(date_str, meal_type):
+    return f"{date_str}_{meal_type}"
+
+
+def _slot_sort_key(date_str, meal_type):
+    return date_str, MEAL_TYPES.index(meal_type) if meal_type in MEAL_TYPES else len(MEAL_TYPES)
+
+
+def plan_meals(slots, current_plan, recipes, pantry, expiring=None, cook_counts=None, meal_type_counts=None, aliases=None):
+    """
+    Choose a saved recipe for each slot.
+
+    slots:        list of (date_str, meal_type) to fill
+    current_plan: {"YYYY-MM-DD_MealType": recipe_name} of home meals already planned
+    recipes:      full recipe list from get_recipes()
+    pantry:       ingredient list from get_ingredients()
+    expiring:     list from get_expiring_soon_ingredients()
+    cook_counts:  {recipe_name: count} from get_recipe_cook_counts()
+    meal_type_counts: {recipe_name: {meal_type: count}} from get_recipe_meal_type_counts()
+    aliases:      {alias: canonical} from get_ingredient_aliases()
+
+    Returns {"YYYY-MM-DD_MealType": recipe_name} for every slot that could be filled.
+    """
+    if not recipes or not slots:
+        return {}
+
+    expiring = expiring or []
+    cook_counts = cook_counts or {}
+    meal_type_counts = meal_type_counts or {}
+    recipe_map = {r["name"]: r for r in recipes}
+
+    # Project the existing plan first so new picks only see what will be left over
+    inventory = build_inventory(pantry, aliases)
+    for key in sorted(current_plan):
+        recipe = recipe_map.get(current_plan[key])
+        if recipe:
+            for ing in recipe["ingredients"]:
+                consume_from_inventory(inventory, ing)
+
+    expiry_by_name = {}
+    for item in expiring:
+        key = canonical_name(item["name"], aliases)
+        if key not in expiry_by_name or item["expiry_date"] < expiry_by_name[key]:
+            expiry_by_name[key] = item["expiry_date"]
+
+    max_log_count = math.log1p(max(cook_counts.values(), default=0)) or 1.0
+
+    # Track which days each recipe lands on, for the variety penalties
+    days_by_recipe = {}
+    for key, name in current_plan.items():
+        days_by_recipe.setdefault(name, []).append(date.fromisoformat(key[:10]))
+
+    chosen = {}
+    for date_str, meal_type in sorted(slots, key=lambda s: _slot_sort_key(*s)):
+        slot_day = date.fromisoformat(date_str)
+        best_name, best_score = None, None
+        for recipe in recipes:
+            name = recipe["name"]
+            ingredients = recipe["ingredients"]
+
+            covered = 0
+            expiring_hits = 0
+            for ing in ingredients:
+                status, _ = consume_from_inventory(inventory, ing, dry_run=True)
+                if status in ("ok", "incomparable"):
+                    covered += 1
+                    expires = expiry_by_name.get(canonical_name(ing["name"], aliases))
+                    if expires and date_str <= expires:
+                        expiring_hits += 1
+            coverage = covered / len(ingredients) if ingredients else 1.0
+
+            type_counts = meal_type_counts.get(name, {})
+            total_typed = sum(type_counts.values())
+            type_fit = type_counts.get(meal_type, 0) / total_typed if total_typed else 0.5
+
+            score = (
+                COVERAGE_WEIGHT * coverage
+                + EXPIRING_WEIGHT * expiring_hits
+                + COOK_COUNT_WEIGHT * math.log1p(cook_counts.get(name, 0)) / max_log_count
+                + MEAL_TYPE_WEIGHT * type_fit
+            )
+            for day in days_by_recipe.get(name, []):
+                gap = abs((day - slot_day).days)
+                if gap == 0:
+                    score -= SAME_DAY_PENALTY
+                elif gap == 1:
+                    score -= ADJACENT_DAY_PENALTY
+                score -= REPEAT_PENALTY
+
+            # Ties go to the alphabetically first recipe so results are deterministic
+            if best_score is None or score > best_score or (score == best_score and name < best_name):
+                best_name, best_score = name, score
+
+        chosen[_slot_key(date_str, meal_type)] = best_name
+        days_by_recipe.setdefault(best_name, []).append(slot_day)
+        for ing in recipe_map[best_name]["ingredients"]:
+            consume_from_inventory(inventory, ing)
+
+    return chosen
+
+
+def suggest_local_meals(slots, current_plan):
+    """Fill slots using the local planner with live pantry, expiry and cook-history data.
+    Recipes are scored at the household size."""
+    return plan_meals(
+        slots,
+        current_plan,
+        scale_recipes(get_recipes(), get_household_size()),
+        get_ingredients(),
+        expiring=get_expiring_soon_ingredients(days=7),
+        cook_counts=get_recipe_cook_counts(),
+        meal_type_counts=get_recipe_meal_type_counts(),
+        aliases=get_ingredient_aliases(),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Grocery-date rescheduling
+# ---------------------------------------------------------------------------
+
+_EPSILON = 1e-9
+SEARCH_NODE_BUDGET = 5000  # per exact search; past it the plan is reported as a best effort
+
+
+class _SearchBudgetExceeded(Exception):
+    """Raised by _choose_pre_grocery_meals() when it gives up without proving either way."""
+
+
+def _greedy_pre_grocery_meals(slot_people, candidates, demands, residual, preferred_counts):
+    """
+    Fill slots in order, one recipe each: the first candidate (preferring those under their count in
+    preferred_counts) whose demand at that slot's servings still fits. Stops at the first slot nothing
+    fits. slot_people lists each slot's servings; demands is {servings: {name: demand}}. Returns
+    {servings: Counter}.
+    """
+    residual = dict(residual)
+    chosen, total = {}, Counter()
+    for people in slot_people:
+        demand = demands[people]
+        order = sorted(
+            range(len(candidates)),
+            key=lambda j: (total[candidates[j]] >= preferred_counts.get(candidates[j], 1), j),
+        )
+        name = next(
+            (candidates[j] for j in order if candidates[j] in demand
+             and all(residual[k] + _EPSILON >= need for k, need in demand[candidates[j]].items())),
+            None,
+        )
+        if name is None:
+            break
+        for k, need in demand[name].items():
+            residual[k] -= need
+        chosen.setdefault(people, Counter())[name] += 1
+        total[name] += 1
+    return chosen
+
+
+def _choose_pre_grocery_meals(groups, candidates, demands, residual, preferred_counts, node_budget=None):
+    """
+    Pick, for each (servings, slot_count) in groups, a multiset of slot_count recipes so that their
+    combined demand (demands: {servings: {name: demand}}) fits in residual.
+
+    Depth-first search over multisets (one slot per level, candidate indices non-decreasing within a
+    group) with failed states memoized. Branches are cut when an ingredient every remaining candidate
+    needs (in this group or, at least, in the groups after it) can't be covered. Candidates are tried in order, each preferred up to its
+    count in preferred_counts (default 1). Returns {servings: Counter}, or None if no choice exists.
+    Raises _SearchBudgetExceeded after node_budget (default SEARCH_NODE_BUDGET) search nodes.
+    """
+    node_budget = SEARCH_NODE_BUDGET if node_budget is None else node_budget
+    group_candidates = [[name for name in candidates if name in demands[people]] for people, _ in groups]
+    keys = sorted({k for people, _ in groups for demand in demands[people].values() for k in demand})
+    residual = dict(residual)
+    failed = set()
+    chosen = [Counter() for _ in groups]
+    total = Counter()
+    nodes = 0
+
+    # floor_needs[g][i]: {ingredient: smallest amount} over the ingredients every candidate from i on needs
+    floor_needs = []
+    for (people, _), names in zip(groups, group_candidates):
+        floors = [{}] * (len(names) + 1)
+        for i in range(len(names) - 1, -1, -1):
+            demand = demands[people][names[i]]
+            later = floors[i + 1] if i + 1 < len(names) else demand
+            floors[i] = {k: min(need, later[k]) for k, need in demand.items() if k in later}
+        floor_needs.append(floors)
+    # later_needs[g]: {ingredient: least the groups after g need of it between them}
+    later_needs = [{} for _ in groups]
+    for g in range(len(groups) - 2, -1, -1):
+        later_needs[g] = dict(later_needs[g + 1])
+        for k, need in floor_needs[g + 1][0].items():
+            later_needs[g][k] = later_needs[g].get(k, 0) + groups[g + 1][1] * need
+
+    def search(group, start, slots_left):
+        nonlocal nodes
+        if slots_left == 0:
+            return group + 1 == len(groups) or search(group + 1, 0, groups[group + 1][1])
+        floors, later = floor_needs[group][start], later_needs[group]
+        if any(residual[k] + _EPSILON < slots_left * floors.get(k, 0) + later.get(k, 0) for k in floors.keys() | later.keys()):
+            return False
+        state = (group, start, slots_left, tuple(round(residual[k], 6) for k in keys))
+        if state in failed:
+            return False
+        nodes += 1
+        if nodes > node_budget:
+            raise _SearchBudgetExceeded
+        names, demand = group_candidates[group], demands[groups[group][0]]
+        # Try recipes still under their preferred count first; every index >= start is still explored
+        order = sorted(
+            range(start, len(names)),
+            key=lambda j: (total[names[j]] >= preferred_counts.get(names[j], 1), j),
+        )
+        for j in order:
+            name = names[j]
+            if not all(residual[k] + _EPSILON >= need for k, need in demand[name].items()):
+                continue
+            for k, need in demand[name].items():
+                residual[k] -= need
+            chosen[group][name] += 1
+            total[name] += 1
+            if search(group, j, slots_left - 1):
+                return True
+            chosen[group][name] -= 1
+            total[name] -= 1
+            for k, need in demand[name].items():
+                residual[k] += need
+        failed.add(state)
+        return False
+
+    if groups and all(group_candidates) and search(0, 0, groups[0][1]):
+        return {people: +counts for (people, _), counts in zip(groups, chosen)}  # drop zero counts
+    return None
+
+
+def _arrange(slots, pool, current):
+    """
+    Assign meals from pool (a Counter) to slots in date order.
+
+    Slots keep their current meal when it is still in the pool; the rest take the next
+    pooled meal, avoiding a repeat of the previous slot's meal where possible.
+    """
+    assigned = {}
+    for slot in slots:
+        meal = current.get(slot)
+        if pool[meal] > 0:
+            assigned[slot] = meal
+            pool[meal] -= 1
+    previous = None
+    for slot in slots:
+        if slot in assigned:
+            previous = assigned[slot]
+            continue
+        remaining = [name for name, count in pool.items() if count > 0]
+        if not remaining:
+            break
+        meal = next((name for name in remaining if name != previous), remaining[0])
+        assigned[slot] = meal
+        pool[meal] -= 1
+        previous = meal
+    return assigned
+
+
+def reschedule_locally(meal_plan, recipes, pantry_ingredients, grocery_date_str, aliases=None, servings=None):
+    """
+    Rearrange a meal plan so that meals before grocery_date only use current pantry.
+
+    Same contract as gemini_client.reschedule_around_grocery_date():
+    meal_plan: {date_str: {meal_type: meal_name}}, where UNPLANNED marks an open slot; returns
+    {"feasible": bool, "note": str, "plan": {date_str: {meal_type: meal_name}}}, plus
+    "best_effort": True when a search ran out of nodes and the pantry may cover more than the plan fills.
+    aliases: {alias: canonical} from get_ingredient_aliases()
+    servings: {"YYYY-MM-DD_MealType": people}, as from get_slot_servings(); a meal placed before the
+              trip is scaled to its slot's servings (recipes as written where a slot has none)
+
+    Home meals are permuted across the week (pulling in other saved recipes if needed)
+    against a simulated depletion of the pantry; meals displaced from before the trip
+    move into later home or unplanned slots. The number of pre-grocery slots filled is
+    binary-searched from a greedy pick upward, with each exact search bounded by
+    SEARCH_NODE_BUDGET, so an infeasible week returns in milliseconds. A search that hits the
+    budget counts as "not found" for the binary search but marks the result as a best effort.
+    """
+    current = {}
+    for date_str, meals in meal_plan.items():
+        for meal_type, meal_name in meals.items():
+            if meal_name not in SPECIAL_MEALS:
+                current[(date_str, meal_type)] = meal_name
+
+    home_slots = sorted(current, key=lambda s: _slot_sort_key(*s))
+    pre_slots = [s for s in home_slots if s[0] < grocery_date_str]
+    open_slots = [
+        (date_str, meal_type) for date_str, meals in meal_plan.items() for meal_type, meal_name in meals.items()
+        if meal_name == UNPLANNED and date_str >= grocery_date_str
+    ]
+    post_slots = sorted(
+        [s for s in home_slots if s[0] >= grocery_date_str] + open_slots, key=lambda s: _slot_sort_key(*s)
+    )
+    plan = {date_str: dict(meals) for date_str, meals in meal_plan.items()}
+
+    if not pre_slots:
+        return {"feasible": True, "best_effort": False, "note": "No home meals fall before your grocery date.", "plan": plan}
+
+    inventory = build_inventory(pantry_ingredients, aliases)
+    residual = {k: item["base_amount"] for k, item in inventory.items()}
+    planned_counts = Counter(current[s] for s in home_slots)
+
+    # Demand depends on the slot's servings, so it is kept per servings count: {people: {name: demand}}.
+    # Only recipes that need nothing missing from the pantry can be cooked before shopping.
+    # Smaller meals are filled first: demand grows with servings, so whatever fits n slots also fits
+    # the n smallest, and the slots left unplanned are the biggest (at equal servings, the latest)
+    servings = servings or {}
+    people_of = {slot: servings.get(f"{slot[0]}_{slot[1]}") for slot in pre_slots}
+    fill_order = sorted(pre_slots, key=lambda slot: (people_of[slot] is not None, people_of[slot] or 0))
+    slot_people = [people_of[slot] for slot in fill_order]
+    demands = {people: {} for people in slot_people}
+    for recipe in recipes:
+        for people, fitting in demands.items():
+            demand, missing = recipe_base_demand(dict(recipe, ingredients=scaled_ingredients(recipe, people)), inventory)
+            if not missing and all(residual[k] + _EPSILON >= need for k, need in demand.items()):
+                fitting[recipe["name"]] = demand
+    first_demand = {}  # each recipe's demand at the first servings count it fits, for ordering
+    for people in dict.fromkeys(slot_people):
+        for name, demand in demands[people].items():
+            first_demand.setdefault(name, demand)
+    # Prefer keeping what is already planned before the trip, then pulling meals forward from after it
+    pre_counts = Counter(current[s] for s in pre_slots)
+    first_slot = {}
+    for slot in home_slots:
+        first_slot.setdefault(current[slot], slot)
+    planned = sorted(
+        (name for name in planned_counts if name in first_demand),
+        key=lambda name: (name not in pre_counts, _slot_sort_key(*first_slot[name])),
+    )
+    pulled = sorted(
+        (name for name in first_demand if name not in planned_counts),
+        key=lambda name: (sum(first_demand[name][k] / residual[k] for k in first_demand[name] if residual[k]), name),
+    )
+    candidates = planned + pulled
+
+    # Fill as many pre-grocery slots as the pantry allows: a fit for n slots leaves a fit for fewer,
+    # so binary-search the count between the greedy pick and all of them. The first n slots of fill_order
+    # are filled, and slots with the same servings are interchangeable, so each count is searched as one
+    # group per servings.
+    chosen = _greedy_pre_grocery_meals(slot_people, candidates, demands, residual, pre_counts)
+    low, high = sum(sum(counts.values()) for counts in chosen.values()) + 1, len(pre_slots)
+    best_effort = False
+    while low <= high:
+        middle = (low + high) // 2
+        try:
+            groups = list(Counter(slot_people[:middle]).items())
+            found = _choose_pre_grocery_meals(groups, candidates, demands, residual, pre_counts)
+        except _SearchBudgetExceeded:
+            found, best_effort = None, True
+        if found is None:
+            high = middle - 1
+        else:
+            chosen, low = found, middle + 1
+    fill_count = sum(sum(counts.values()) for counts in chosen.values())
+
+    pre_assigned = {}
+    for people, counts in chosen.items():
+        group_slots = [slot for slot in pre_slots if slot in fill_order[:fill_count] and people_of[slot] == people]
+        pre_assigned.update(_arrange(group_slots, Counter(counts), current))
+    chosen = sum(chosen.values(), Counter())
+    leftover = planned_counts - Counter({name: count for name, count in chosen.items() if name in planned_counts})
+    post_assigned = _arrange(post_slots, Counter(leftover), current)
+
+    for date_str, meal_type in pre_slots + post_slots:
+        plan[date_str][meal_type] = (
+            pre_assigned.get((date_str, meal_type)) or post_assigned.get((date_str, meal_type)) or UNPLANNED
+        )
+
+    dropped = Counter(leftover) - Counter(post_assigned.values())
+    moved = (pre_counts - chosen) - dropped
+    added = sorted(name for name in chosen if name not in planned_counts)
+
+    notes = []
+    if moved:
+        notes.append(f"Moved {', '.join(sorted(moved))} to after your grocery trip.")
+    if added:
+        notes.append(f"Added {', '.join(added)} from your saved recipes to use what you already have.")
+    if dropped:
+        notes.append(f"No room left this week for {', '.join(sorted(dropped.elements()))}.")
+
+    feasible = fill_count == len(pre_slots)
+    if not feasible and best_effort:
+        unfilled = len(pre_slots) - fill_count
+        notes.insert(0, (
+            f"This is a best-effort plan: it covers {fill_count} of the {len(pre_slots)} home meals before "
+            f"{grocery_date_str} from your pantry, but there were too many recipe combinations to check them "
+            f"all, so the other {unfilled} may be coverable with a different choice of meals."
+        ))
+    elif not feasible:
+        unfilled = len(pre_slots) - fill_count
+        notes.insert(0, (
+            f"Your pantry only covers {fill_count} of the {len(pre_slots)} home meals before "
+            f"{grocery_date_str}, so {unfilled} slot{'s' if unfilled != 1 else ''} "
+            f"{'are' if unfilled != 1 else 'is'} left unplanned."
+        ))
+    elif not notes:
+        notes.append("Your current plan already works with what's in your pantry.")
+
+    return {"feasible": feasible, "best_effort": best_effort and not feasible, "note": " ".join(notes), "plan": plan}
+
+
+# ---------------------------------------------------------------------------
+# Incremental shopping plan
+# ---------------------------------------------------------------------------
+
+class IncrementalShoppingPlan:
+    """
+    A shopping plan that can be updated one slot at a time.
+
+    Produces the same result as get_shopping_plan(), but keeps, per ingredient, the
+    slot-ordered list of demands together with the running balance after each one.
+    Swapping the meal in one slot replays only the ingredients of the old and new
+    recipe, and only from that slot onward.
+
+    meal_plan: {"YYYY-MM-DD_MealType": recipe_name} of home meals
+    recipes:   full recipe list from get_recipes()
+    fridge:    ingredient list from get_ingredients()
+    servings:  {"YYYY-MM-DD_MealType": people}, as from get_slot_servings()
+    aliases:   {alias: canonical} from get_ingredient_aliases()
+    """
+
+    def __init__(self, meal_plan, recipes, fridge, servings=None, aliases=None):
+        self._recipe_map = {r["name"]: r for r in recipes}
+        self._aliases = aliases or {}
+        self._stock = build_inventory(fridge, self._aliases)
+        self._meals = {}
+        self._servings = {}
+        self._events = {}      # ingredient key -> [event, ...] sorted by order = (slot_key, position)
+        self._shortages = {}   # order -> shortage dict, as in get_shopping_plan()["items"]
+        servings = servings or {}
+        for key, name in meal_plan.items():
+            self._add_events(key, name, servings.get(key))
+        for ing_key in self._events:
+            self._replay(ing_key, 0)
+
+    def _ingredient_keys(self, name):
+        recipe = self._recipe_map.get(name)
+        return {canonical_name(ing["name"], self._aliases) for ing in recipe["ingredients"]} if recipe else set()
+
+    def _add_events(self, key, name, servings):
+        recipe = self._recipe_map.get(name)
+        if not recipe:
+            return
+        self._meals[key] = name
+        self._servings[key] = servings
+        for position, ing in enumerate(scaled_ingredients(recipe, servings)):
+            events = self._events.setdefault(canonical_name(ing["name"], self._aliases), [])
+            event = {"order": (key, position), "ing": ing, "recipe": name, "after": None}
+            events.insert(bisect.bisect_left(events, event["order"], key=lambda e: e["order"]), event)
+
+    def _remove_events(self, key):
+        name = self._meals.pop(key, None)
+        if name is None:
+            return
+        self._servings.pop(key, None)
+        for position, ing in enumerate(self._recipe_map[name]["ingredients"]):
+            ing_key = canonical_name(ing["name"], self._aliases)
+            self._events[ing_key] = [e for e in self._events[ing_key] if e["order"] != (key, position)]
+            self._shortages.pop((key, position), None)
+
+    def _replay(self, ing_key, start):
+        """Recompute balances and shortages for one ingredient from events[start] onward."""
+        events = self._events.get(ing_key, [])
+        stock = self._stock.get(ing_key)
+        if stock is not None:
+            balance = events[start - 1]["after"] if start > 0 else stock["base_amount"]
+
+        for event in events[start:]:
+            slot_key = event["order"][0]
+            # The event may name the ingredient by an alias, so key the one-item inventory by that name
+            lookup = event["ing"]["name"].lower()
+            inventory = {lookup: dict(stock, base_amount=balance)} if stock is not None else {}
+            status, before = consume_from_inventory(inventory, event["ing"])
+            if stock is not None:
+                balance = event["after"] = inventory[lookup]["base_amount"]
+            if status in ("missing", "short"):
+                self._shortages[event["order"]] = make_shortage(
+                    event["ing"], status, before, stock, slot_key[:10], event["recipe"]
+                )
+            else:
+                self._shortages.pop(event["order"], None)
+
+    def _shortages_from(self, key, ing_keys):
+        """Return {order: shortage} for the given ingredients at or after slot key."""
+        found = {}
+        for ing_key in ing_keys:
+            for event in self._events.get(ing_key, []):
+                if event["order"] >= (key, 0) and event["order"] in self._shortages:
+                    found[event["order"]] = self._shortages[event["order"]]
+        return found
+
+    def set_meal(self, key, recipe_name, servings=None):
+        """
+        Put recipe_name, cooked for `servings` people, in slot key (None clears it).
+
+        Returns {"new_shortages": [...], "resolved_shortages": [...]}, each a list of
+        shortage dicts as in get_shopping_plan()["items"].
+        """
+        if self._meals.get(key) == recipe_name and self._servings.get(key) == servings:
+            return {"new_shortages": [], "resolved_shortages": []}
+
+        touched = self._ingredient_keys(self._meals.get(key)) | self._ingredient_keys(recipe_name)
+        before = self._shortages_from(key, touched)
+
+        self._remove_events(key)
+        if recipe_name:
+            self._add_events(key, recipe_name, servings)
+        for ing_key in touched:
+            events = self._events.get(ing_key, [])
+            self._replay(ing_key, bisect.bisect_left(events, (key, 0), key=lambda e: e["order"]))
+
+        before = [before[o] for o in sorted(before)]
+        after = [s for _, s in sorted(self._shortages_from(key, touched).items())]
+        return {
+            "new_shortages": [s for s in after if s not in before],
+            "resolved_shortages": [s for s in before if s not in after],
+        }
+
+    def sync(self, meal_plan, servings=None):
+        """Bring the structure in line with meal_plan and servings, touching only slots that differ."""
+        servings = servings or {}
+        for key in list(self._meals):
+            if key not in meal_plan:
+                self.set_meal(key, None)
+        for key, name in meal_plan.items():
+            self.set_meal(key, name, servings.get(key))
+
+    def as_plan(self):
+        """Return the current plan in get_shopping_plan()'s shape."""
+        if not self._shortages:
+            return {"fully_covered": True, "shop_by": None, "items": []}
+        shortages = [self._shortages[order] for order in sorted(self._shortages)]
+        earliest = min(s["runs_out_on"] for s in shortages)
+        shop_by = (date.fromisoformat(earliest) - timedelta(days=1)).isoformat()
+        return {"fully_covered": False, "shop_by": shop_by, "items": shortages}
+
+
+# ---------------------------------------------------------------------------
+# "What can I cook now?" ranking
+# ---------------------------------------------------------------------------
+
+_requirements = {}
+_REQUIREMENTS_CACHE_SIZE = 20000
+
+
+def _requirement_vector(recipe, servings, aliases, alias_token):
+    """
+    Return the recipe's requirements as a tuple of (key, base_amount, base_unit, display_name),
+    scaled to servings and keyed by canonical name. Memoized per (recipe id, updated_at, servings,
+    aliases), so ranking a library re-parses nothing while recipes and aliases are unchanged.
+    """
+    cache_key = (recipe.get("id"), recipe.get("updated_at"), servings, alias_token)
+    vector = _requirements.get(cache_key)
+    if vector is None:
+        if len(_requirements) >= _REQUIREMENTS_CACHE_SIZE:
+            _requirements.clear()
+        vector = tuple(
+            (canonical_name(ing["name"], aliases), *_to_base(ing["amount"], ing["unit"]), ing["name"])
+            for ing in scaled_ingredients(recipe, servings)
+        )
+        _requirements[cache_key] = vector
+    return vector
+
+
+def rank_recipes(recipes, pantry, k=10, expiring=None, servings=None, aliases=None, cookable=None):
+    """
+    Return the top k recipes (all of them when k is None) by how much of them the pantry already covers.
+
+    recipes:  full recipe list from get_recipes()
+    pantry:   ingredient list from get_ingredients()
+    expiring: list from get_expiring_soon_ingredients(); using these ranks a recipe higher
+    servings: people to cook for (scales recipes that have a servings count)
+    aliases:  {alias: canonical} from get_ingredient_aliases()
+    cookable: True or False to rank only the recipes that are, or are not, fully covered
+
+    Recipes are ordered by fraction of demand covered, then fewest missing ingredients, then
+    most expiring ingredients used. One pass over the library with a k-sized heap.
+    Returns [{"recipe", "coverage", "cookable", "missing": [name], "short": [name], "expiring": [name]}].
+    """
+    inventory = build_inventory(pantry, aliases)
+    expiring_keys = {canonical_name(item["name"], aliases) for item in (expiring or [])}
+    alias_token = frozenset((aliases or {}).items())
+
+    def _score(recipe):
+        vector = _requirement_vector(recipe, servings, aliases, alias_token)
+        covered, missing, short, using_expiring = 0.0, [], [], []
+        for key, need, unit, name in vector:
+            item = inventory.get(key)
+            if item is None:
+                missing.append(name)
+                continue
+            if key in expiring_keys:
+                using_expiring.append(name)
+            if item["base_unit"] != unit or need <= 0:
+                covered += 1  # incomparable units — don't penalize, as in get_cookable_recipes
+            elif item["base_amount"] + _EPSILON >= need:
+                covered += 1
+            else:
+                covered += item["base_amount"] / need
+                short.append(name)
+        coverage = covered / len(vector) if vector else 1.0
+        return coverage, missing, short, using_expiring
+
+    scored = ((_score(recipe), index, recipe) for index, recipe in enumerate(recipes))
+    if cookable is not None:
+        scored = (entry for entry in scored if (not entry[0][1] and not entry[0][2]) == cookable)
+
+    def rank(entry):
+        return -entry[0][0], len(entry[0][1]), -len(entry[0][3]), entry[1]
+
+    top = sorted(scored, key=rank) if k is None else heapq.nsmallest(k, scored, key=rank)
+    return [
+        {
+            "recipe": recipe,
+            "coverage": round(coverage, 3),
+            "cookable": not missing and not short,
+            "missing": missing,
+            "short": short,
+            "expiring": using_expiring,
+        }
+        for (coverage, missing, short, using_expiring), _, recipe in top
+    ]
+
+
+def rank_recipes_now(k=10, cookable=None):
+    """Rank saved recipes against the live pantry at the household size."""
+    return rank_recipes(
+        get_recipes(),
+        get_ingredients(),
+        k=k,
+        cookable=cookable,
+        expiring=get_expiring_soon_ingredients(days=3),
+        servings=get_household_size(),
+        aliases=get_ingredient_aliases(),
+    )
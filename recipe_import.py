@@ -0,0 +1,289 @@
+"""Offline import of recipes from saved web pages.
+
+Most recipe sites embed a schema.org Recipe in their pages, either as JSON-LD
+(<script type="application/ld+json">) or as microdata (itemscope/itemprop
+attributes). recipes_from_html() pulls JSON-LD out with a regex and only walks
+the page with the standard library's HTML parser when it has to fall back to
+microdata; ingredient lines go through recipe_parser.parse_ingredient(), so
+importing needs no model calls. There is no review step, so lines without a
+readable amount ("Salt to taste") are listed at the top of the instructions
+rather than saved as ingredients the pantry and shopping math can't use.
+import_html_files() and import_html_documents() insert a whole batch with a
+single database.add_recipes() transaction.
+"""
+import html
+import json
+import os
+import re
+from html.parser import HTMLParser
+from database import add_recipes, get_recipes
+from recipe_parser import parse_ingredient
+
+HTML_EXTENSIONS = (".html", ".htm")
+
+# Elements that never have a closing tag, and elements whose start/end separates lines of text
+_VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+_BLOCK_TAGS = {"br", "p", "li", "div", "h1", "h2", "h3", "h4", "h5", "h6", "tr", "section"}
+# Elements whose end tag is optional: a new sibling closes an open one ("<li>a<li>b")
+_IMPLIED_END_TAGS = {"li", "p", "dt", "dd", "tr", "td", "th", "option"}
+_MICRODATA_PROPS = {
+    "name", "recipeIngredient", "ingredients", "recipeInstructions",
+    "recipeYield", "totalTime", "cookTime", "prepTime",
+}
+_JSON_LD = re.compile(r"<script[^>]*\bld\+json[^>]*>(.*?)</script\s*>", re.IGNORECASE | re.DOTALL)
+_MICRODATA_RECIPE = re.compile(r"schema\.org/Recipe\b")
+_FEED_CHUNK = 16384
+_TAG = re.compile(r"<[^>]+>")
+_DURATION = re.compile(r"^P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:[\d.]+S)?)?$", re.IGNORECASE)
+
+
+class _MicrodataParser(HTMLParser):
+    """Collects the properties of each microdata Recipe in a page."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.recipes = []  # one {property: [values]} per Recipe itemscope
+        self.open_recipes = 0  # Recipe scopes whose element hasn't closed yet
+        self._stack = []  # one entry per open element
+
+    def _scope(self):
+        """The properties dict of the innermost item scope if it is a Recipe, else None."""
+        for entry in reversed(self._stack):
+            if "scope" in entry:
+                return entry["scope"]
+        return None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag in _IMPLIED_END_TAGS and self._stack and self._stack[-1]["tag"] == tag:
+            self._finish(self._stack.pop())
+        if tag in _BLOCK_TAGS:
+            self._add_text("\n")
+        if tag in _VOID_TAGS and "itemprop" not in attrs:
+            return
+
+        entry = {"tag": tag}
+        scope = self._scope()
+        props = [p for p in (attrs.get("itemprop") or "").split() if p in _MICRODATA_PROPS]
+        if scope is not None and props:
+            value = attrs.get("content") or attrs.get("datetime")
+            if value is not None:
+                for prop in props:
+                    scope.setdefault(prop, []).append(value)
+            elif tag not in _VOID_TAGS:
+                entry["props"], entry["text"], entry["recipe"] = props, [], scope
+        if "itemscope" in attrs:
+            itemtype = attrs.get("itemtype") or ""
+            entry["scope"] = {} if _MICRODATA_RECIPE.search(itemtype) else None
+            if entry["scope"] is not None:
+                self.recipes.append(entry["scope"])
+                self.open_recipes += 1
+        if tag not in _VOID_TAGS:
+            self._stack.append(entry)
+
+    def handle_endtag(self, tag):
+        if tag in _BLOCK_TAGS:
+            self._add_text("\n")
+        # Pop up to the matching element; unclosed children (<li>, <p>) close with it
+        for depth in range(len(self._stack) - 1, -1, -1):
+            if self._stack[depth]["tag"] == tag:
+                while len(self._stack) > depth:
+                    self._finish(self._stack.pop())
+                return
+
+    def handle_data(self, data):
+        self._add_text(data)
+
+    def close(self):
+        super().close()
+        while self._stack:
+            self._finish(self._stack.pop())
+
+    def _add_text(self, text):
+        for entry in self._stack:
+            if "text" in entry:
+                entry["text"].append(text)
+
+    def _finish(self, entry):
+        if entry.get("scope") is not None:
+            self.open_recipes -= 1
+        if "props" in entry:
+            value = "".join(entry["text"])
+            for prop in entry["props"]:
+                entry["recipe"].setdefault(prop, []).append(value)
+
+
+def _clean(value):
+    """Plain single-line text from a JSON-LD or microdata value (which may contain markup or entities)."""
+    if value is None:
+        return ""
+    return " ".join(html.unescape(_TAG.sub(" ", str(value))).split())
+
+
+def _lines(value):
+    """Non-empty cleaned lines of a text value, keeping its line breaks."""
+    text = html.unescape(_TAG.sub("\n", str(value)))
+    return [" ".join(line.split()) for line in text.splitlines() if line.strip()]
+
+
+def _instructions(value):
+    """Instruction lines from a string, a list of strings, HowToStep or HowToSection values."""
+    if isinstance(value, list):
+        return [line for item in value for line in _instructions(item)]
+    if isinstance(value, dict):
+        if "itemListElement" in value:
+            return _instructions(value["itemListElement"])
+        return _lines(value.get("text") or value.get("name") or "")
+    return _lines(value or "")
+
+
+def _servings(value):
+    for item in value if isinstance(value, list) else [value]:
+        match = re.search(r"\d+", str(item or ""))
+        if match:
+            return int(match[0])
+    return None
+
+
+def _duration(value):
+    """'PT1H30M' -> '1 hour 30 minutes'; other text is returned cleaned."""
+    text = _clean(value)
+    match = _DURATION.match(text)
+    if not match or not any(match.groups()):
+        return text or None
+    minutes = int(match[1] or 0) * 24 * 60 + int(match[2] or 0) * 60 + int(match[3] or 0)
+    hours, minutes = divmod(minutes, 60)
+    parts = []
+    if hours:
+        parts.append(f"{hours} hour{'s' if hours != 1 else ''}")
+    if minutes or not hours:
+        parts.append(f"{minutes} minute{'s' if minutes != 1 else ''}")
+    return " ".join(parts)
+
+
+def _json_ld_recipes(node):
+    """Yield every Recipe object in a JSON-LD document (top level, lists, @graph or nested entities)."""
+    if isinstance(node, list):
+        for item in node:
+            yield from _json_ld_recipes(item)
+    elif isinstance(node, dict):
+        types = node.get("@type")
+        if "Recipe" in (types if isinstance(types, list) else [types]):
+            yield node
+            return
+        for key in ("@graph", "mainEntity", "mainEntityOfPage", "itemListElement", "item"):
+            if key in node:
+                yield from _json_ld_recipes(node[key])
+
+
+def _first(value):
+    return value[0] if isinstance(value, list) and value else value
+
+
+def _to_recipe(node):
+    """
+    A schema.org Recipe (JSON-LD object or microdata properties) in add_recipe() form, or None if unusable.
+    "unmeasured" lists the ingredient lines moved to the instructions for want of an amount.
+    """
+    name = _clean(_first(node.get("name")))
+    ingredient_lines = node.get("recipeIngredient") or node.get("ingredients") or []
+    if isinstance(ingredient_lines, str):
+        ingredient_lines = [ingredient_lines]
+    parsed = [parse_ingredient(_clean(line)) for line in ingredient_lines if _clean(line)]
+    ingredients = [ing for ing in parsed if ing["amount"] is not None]
+    unmeasured = [ing["name"] for ing in parsed if ing["amount"] is None]
+    if not name or not ingredients:
+        return None
+    time = next((node[key] for key in ("totalTime", "cookTime", "prepTime") if node.get(key)), None)
+    instructions = _instructions(node.get("recipeInstructions"))
+    if unmeasured:
+        instructions.insert(0, f"Also needed: {'; '.join(unmeasured)}")
+    return {
+        "name": name,
+        "cooking_time": _duration(_first(time)) if time else None,
+        "servings": _servings(node.get("recipeYield")),
+        "ingredients": ingredients,
+        "instructions": "\n".join(instructions),
+        "unmeasured": unmeasured,
+    }
+
+
+def recipes_from_html(page):
+    """Return the recipes embedded in an HTML page as add_recipe() dicts (JSON-LD first, else microdata)."""
+    nodes = []
+    for script in _JSON_LD.findall(page):
+        try:
+            nodes += _json_ld_recipes(json.loads(script))
+        except json.JSONDecodeError:
+            continue  # sites do ship broken JSON-LD; microdata may still be there
+    match = None if nodes else _MICRODATA_RECIPE.search(page)
+    if match:
+        # Properties only exist inside a Recipe scope, so parse from its element until the last one closes
+        parser = _MicrodataParser()
+        offset = page.rfind("<", 0, match.start())
+        while offset < len(page):
+            parser.feed(page[offset:offset + _FEED_CHUNK])
+            offset += _FEED_CHUNK
+            if parser.open_recipes == 0 and not _MICRODATA_RECIPE.search(page, offset):
+                break
+        parser.close()
+        nodes = parser.recipes
+    recipes = {}
+    for node in nodes:
+        recipe = _to_recipe(node)
+        if recipe is not None:
+            recipes.setdefault(recipe["name"].lower(), recipe)
+    return list(recipes.values())
+
+
+def import_html_documents(documents, skip_existing=True):
+    """
+    Import the recipes found in [(source name, html text)] with one add_recipes() transaction.
+
+    Recipes whose name matches a saved recipe or an earlier one in the batch are skipped unless
+    skip_existing is False. Returns {"imported": int, "skipped": int, "without_recipe": [source name],
+    "unmeasured": [imported recipe name]}, the last listing recipes with ingredient lines moved to
+    their instructions.
+    """
+    seen = {r["name"].lower() for r in get_recipes()} if skip_existing else set()
+    batch, skipped, without_recipe = [], 0, []
+    for source, page in documents:
+        recipes = recipes_from_html(page)
+        if not recipes:
+            without_recipe.append(source)
+        for recipe in recipes:
+            key = recipe["name"].lower()
+            if key in seen:
+                skipped += 1
+                continue
+            if skip_existing:
+                seen.add(key)
+            batch.append(recipe)
+    add_recipes(batch)
+    return {
+        "imported": len(batch),
+        "skipped": skipped,
+        "without_recipe": without_recipe,
+        "unmeasured": [recipe["name"] for recipe in batch if recipe["unmeasured"]],
+    }
+
+
+def html_files(paths):
+    """Expand files and directories (searched recursively) into the HTML files they contain."""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                for name in sorted(names):
+                    if name.lower().endswith(HTML_EXTENSIONS):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def import_html_files(paths, skip_existing=True):
+    """import_html_documents() for saved pages on disk; paths may include directories."""
+    documents = []
+    for path in html_files(paths):
+        with open(path, encoding="utf-8", errors="replace") as f:
+            documents.append((path, f.read()))
+    return import_html_documents(documents, skip_existing)
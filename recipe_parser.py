@@ -0,0 +1,219 @@
+"""Local recipe extraction from a PDF's text layer.
+
+Digitally generated PDFs carry their text, so most recipe PDFs don't need the
+multimodal model to read them. pdf_text() pulls the text layer (None for scanned
+pages, unreadable text, or when the optional pypdf package isn't installed), and
+parse_recipe_text() turns the common "title / servings / Ingredients /
+Instructions" layout into the same dict the model returns. When the layout
+isn't recognised, the compact text can still go to the model instead of the
+whole file.
+"""
+import io
+import re
+from constants import UNITS
+from database import UNIT_TO_GRAMS, UNIT_TO_ML
+
+MIN_PAGE_CHARS = 20  # letters and digits; a page with less text but with images is a scan
+MIN_LETTER_RATIO = 0.6  # share of letters among non-space characters in a usable text layer
+
+UNIT_SYNONYMS = {
+    "g": "grams", "gram": "grams", "gr": "grams",
+    "kilogram": "kg", "kilograms": "kg", "kgs": "kg",
+    "ounce": "oz", "ounces": "oz",
+    "lb": "lbs", "pound": "lbs", "pounds": "lbs",
+    "milliliter": "ml", "milliliters": "ml", "millilitre": "ml", "millilitres": "ml",
+    "l": "liters", "liter": "liters", "litre": "liters", "litres": "liters",
+    "cup": "cups", "c": "cups",
+    "tbsp": "tablespoons", "tbs": "tablespoons", "tablespoon": "tablespoons", "T": "tablespoons",
+    "tsp": "teaspoons", "teaspoon": "teaspoons", "t": "teaspoons",
+    "cloves": "clove", "heads": "head", "bunches": "bunch", "stalks": "stalk", "sprigs": "sprig",
+    "leaves": "leaf", "slices": "slice", "cans": "can", "tin": "can", "tins": "can", "jars": "jar",
+    "bags": "bag", "boxes": "box", "packages": "package", "pack": "package", "packs": "package",
+    "pieces": "piece", "pcs": "piece",
+}
+UNICODE_FRACTIONS = {"½": 0.5, "⅓": 1 / 3, "⅔": 2 / 3, "¼": 0.25, "¾": 0.75, "⅛": 0.125}
+CONTAINER_UNITS = {"can", "jar", "bag", "box", "package"}
+
+_INGREDIENTS_HEADER = re.compile(r"^(ingredients|what you('|’)?ll need)\b", re.IGNORECASE)
+_INSTRUCTIONS_HEADER = re.compile(r"^(instructions|directions|method|steps|preparation|how to make it)\b", re.IGNORECASE)
+_SERVINGS = re.compile(r"\b(?:serves|servings|yield|makes)\b\s*:?\s*(\d+)", re.IGNORECASE)
+_TIME = re.compile(r"\b(total time|ready in|cook(?:ing)? time|prep time)\b\s*:?\s*(.+)", re.IGNORECASE)
+_STEP = re.compile(r"^(\d+[.)]|step\s+\d+\b)", re.IGNORECASE)
+_BULLET = re.compile(r"^[-•*·▪◦]\s*")
+_AMOUNT = re.compile(
+    rf"^(?P<whole>\d+(?:[.,]\d+)?(?![\d/]))?\s*(?P<fraction>\d+/\d+|[{''.join(UNICODE_FRACTIONS)}])?\s*(?P<rest>.*)$"
+)
+_RANGE_SEPARATOR = re.compile(r"^(?:-|–|—|to\b|or\b)\s*", re.IGNORECASE)
+_PARENTHETICAL = re.compile(r"^\((?P<inside>[^)]*)\)\s*")
+_MULTIPLIER = re.compile(r"^[x×](?=[\s\d])\s*", re.IGNORECASE)
+_PARENTHESES = re.compile(r"\s*\([^)]*\)")
+
+
+def pdf_text(pdf_bytes):
+    """Return the PDF's text layer, one cleaned line per text line, or None if it isn't usable."""
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        return None  # optional dependency: without it every PDF goes to the model whole
+    try:
+        reader = PdfReader(io.BytesIO(pdf_bytes))
+        pages = [(page.extract_text() or "", len(page.images)) for page in reader.pages]
+    except Exception:
+        return None  # encrypted or malformed — the model may still read it
+    lines = []
+    for text, image_count in pages:
+        if sum(ch.isalnum() for ch in text) < MIN_PAGE_CHARS and image_count:
+            return None  # scanned page
+        lines += [" ".join(line.split()) for line in text.splitlines() if line.strip()]
+    text = "\n".join(lines)
+    visible = [ch for ch in text if not ch.isspace()]
+    if len(visible) < MIN_PAGE_CHARS or sum(ch.isalpha() for ch in visible) < MIN_LETTER_RATIO * len(visible):
+        return None  # missing or garbled text layer (fonts without a Unicode mapping)
+    return text
+
+
+def _parse_amount(whole, fraction):
+    if whole is None and fraction is None:
+        return None
+    amount = float(whole.replace(",", ".")) if whole else 0.0
+    if fraction in UNICODE_FRACTIONS:
+        amount += UNICODE_FRACTIONS[fraction]
+    elif fraction:
+        numerator, denominator = fraction.split("/")
+        if int(denominator) == 0:
+            return None
+        amount += int(numerator) / int(denominator)
+    return amount
+
+
+def _leading_amount(text):
+    """(amount, rest) for a quantity at the start of text, or (None, text). A range ("2-3", "1 to 2") gives its upper end."""
+    match = _AMOUNT.match(text)
+    amount = _parse_amount(match["whole"], match["fraction"])
+    if amount is None:
+        return None, text
+    rest = match["rest"]
+    separator = _RANGE_SEPARATOR.match(rest)
+    if separator:
+        upper = _AMOUNT.match(rest[separator.end():])
+        upper_amount = _parse_amount(upper["whole"], upper["fraction"])
+        if upper_amount is not None:
+            amount, rest = max(amount, upper_amount), upper["rest"]
+    return amount, rest
+
+
+def _leading_unit(text):
+    """(unit, rest) for a unit word at the start of text, or (None, text)."""
+    word, _, after = text.partition(" ")
+    word_key = word.rstrip(".")
+    candidate = UNIT_SYNONYMS.get(word_key) or UNIT_SYNONYMS.get(word_key.lower()) or word_key.lower()
+    return (candidate, after) if candidate in UNITS else (None, text)
+
+
+def _measured_size(text):
+    """(amount, unit, rest) for a weight or volume at the start of text ("14 oz", "400g"), or None."""
+    amount, rest = _leading_amount(text)
+    if amount is None:
+        return None
+    unit, rest = _leading_unit(rest)
+    if unit in UNIT_TO_GRAMS or unit in UNIT_TO_ML:
+        return amount, unit, rest
+    return None
+
+
+def _capitalized(text):
+    return text[:1].upper() + text[1:]
+
+
+def parse_ingredient(line):
+    """
+    '2 tbsp olive oil, divided' -> {"name": "Olive oil", "amount": 2.0, "unit": "tablespoons"}.
+
+    Ranges take their upper end ("2-3 cloves garlic" -> 3 clove), and a pack size gives the
+    amount ("2 (14 oz) cans tomatoes", "2 x 14 oz cans" -> 28 oz). Lines without a quantity, or whose
+    name still doesn't start with a letter, keep the whole line as the name with amount and
+    unit None, so the review form flags them.
+    """
+    line = _BULLET.sub("", line).strip()
+    amount, rest = _leading_amount(line)
+    unit = None
+    if amount is not None:
+        pack = None
+        parenthetical, multiplier = _PARENTHETICAL.match(rest), _MULTIPLIER.match(rest)
+        if parenthetical:
+            rest = rest[parenthetical.end():]
+            pack = _measured_size(parenthetical["inside"])
+        elif multiplier:
+            rest = rest[multiplier.end():]
+            pack = _measured_size(rest)
+            if pack:
+                rest = pack[2]
+        if pack:
+            amount, unit = round(amount * pack[0], 3), pack[1]
+            container, after = _leading_unit(rest)
+            if container in CONTAINER_UNITS:
+                rest = after
+        if unit is None:
+            unit, rest = _leading_unit(rest)
+            unit = unit or "whole"  # a bare count: "2 onions"
+    name = re.sub(r"^of\s+", "", _PARENTHESES.sub("", rest).split(",")[0].strip())
+    if amount is None or not name[:1].isalpha():
+        return {"name": _capitalized(line), "amount": None, "unit": None}
+    return {"name": _capitalized(name), "amount": amount, "unit": unit}
+
+
+def parse_recipe_text(text):
+    """
+    Parse a recipe laid out as title, optional servings/time lines, an Ingredients section and an
+    Instructions section. Returns a dict in the model's extraction format, or None unless the
+    layout is recognised with enough parsed ingredients and instructions to be worth reviewing.
+    """
+    name, servings, cooking_time = None, None, None
+    times = {}
+    section, ingredient_lines, steps = None, [], []
+    for line in text.splitlines():
+        servings_match = _SERVINGS.search(line)
+        time_match = _TIME.search(line)
+        if servings_match and len(line) < 40:
+            servings = servings or int(servings_match[1])
+            continue
+        if time_match and len(line) < 60:
+            times.setdefault(time_match[1].lower(), time_match[2].strip())
+            continue
+        if len(line) < 40 and _INGREDIENTS_HEADER.match(line):
+            section = "ingredients"
+            continue
+        if len(line) < 40 and _INSTRUCTIONS_HEADER.match(line):
+            section = "instructions"
+            continue
+        if section == "ingredients":
+            if not line.endswith(":"):  # sub-headings such as "For the sauce:"
+                ingredient_lines.append(line)
+        elif section == "instructions":
+            # Wrapped lines continue the current step; numbered lines start a new one
+            if steps and not _STEP.match(line):
+                steps[-1] += " " + line
+            else:
+                steps.append(line)
+        elif name is None:
+            name = line
+
+    for label in ("total time", "ready in", "cook time", "cooking time", "prep time"):
+        if label in times:
+            cooking_time = times[label]
+            break
+    ingredients = [parse_ingredient(line) for line in ingredient_lines]
+    ingredients = [ing for ing in ingredients if ing["name"]]
+    instructions = "\n".join(steps)
+    with_amount = sum(ing["amount"] is not None for ing in ingredients)
+    if not name or len(name) > 80 or len(ingredients) < 2 or with_amount < 0.6 * len(ingredients) or len(instructions) < 40:
+        return None
+    if any(ing["amount"] is None and ing["name"][:1].isdigit() for ing in ingredients):
+        return None  # a quantity the parser couldn't read ("2 x 400g tins") — let the model read the text
+    return {
+        "name": name,
+        "cooking_time": cooking_time,
+        "servings": servings,
+        "ingredients": ingredients,
+        "instructions": instructions,
+    }
@@ -0,0 +1,88 @@
+"""Compare the Home page's old per-section reads with get_dashboard_snapshot().
+
+Counts SQL statements and wall time for one uncached Home render's worth of
+database work. Run from the repo root against a copy of a real database:
+
+    DB_PATH=/path/to/copy.db python scripts/benchmark_dashboard.py [runs]
+"""
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database as db
+import pantry_index
+
+UNPLANNED = "— Unplanned —"
+_statements = 0
+_connect = db.get_connection
+
+
+def _counting_connection():
+    def trace(statement):
+        global _statements
+        _statements += 1
+
+    conn = _connect()
+    conn.set_trace_callback(trace)
+    return conn
+
+
+def home_before(today):
+    """The reads Home.py made before the snapshot, in the same order."""
+    db.get_ingredients()
+    recipes = db.get_recipes()
+    recipe_map = {r["name"]: r for r in recipes}
+    db.get_meals_for_date(today.isoformat())
+    db.get_expiring_soon_ingredients(days=3)
+    pantry_index._cached.clear()  # the index is rebuilt whenever pantry or recipes change
+    coverage = pantry_index.get_coverage_index()
+    for days_ahead in [1, 2]:
+        for meal in db.get_meals_for_date((today + timedelta(days=days_ahead)).isoformat()).values():
+            if meal in recipe_map:
+                coverage.freezer_ingredients(recipe_map[meal])
+    week_end = (today + timedelta(days=6)).isoformat()
+    home_meals = {
+        f"{day}_{mt}": meal
+        for day, meals in db.get_meal_entries(today.isoformat(), week_end).items()
+        for mt, meal in meals.items()
+        if meal != UNPLANNED and not meal.startswith("🍽️") and not meal.startswith("🏖️")
+    }
+    if home_meals:
+        db.get_shopping_plan(home_meals, db.get_recipes())
+    db.get_meal_entries(today.isoformat(), week_end)
+    db.get_forgotten_ingredients()
+    db.get_most_cooked_recipes()
+    db.get_most_used_ingredients()
+
+
+def home_after(today):
+    db.get_dashboard_snapshot(today)
+
+
+def measure(fn, today, runs):
+    global _statements
+    fn(today)  # warm up imports and the scaled-ingredient memo
+    _statements = 0
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn(today)
+    elapsed = (time.perf_counter() - start) / runs
+    return _statements // runs, elapsed * 1000
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    db.get_connection = _counting_connection
+    today = date.today()
+    before = measure(home_before, today, runs)
+    after = measure(home_after, today, runs)
+    print(f"{'':<10}{'statements':>12}{'ms':>10}")
+    print(f"{'before':<10}{before[0]:>12}{before[1]:>10.1f}")
+    print(f"{'snapshot':<10}{after[0]:>12}{after[1]:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
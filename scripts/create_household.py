@@ -0,0 +1,28 @@
+"""Register a new household and print the id to open it with (?household=<id>).
+
+Households are only created here, never from a URL, so the app can't be made to
+create or seed databases by visiting made-up links. Ids are random, so a link
+can't be guessed from another one.
+
+    DB_PATH=recipes.db python scripts/create_household.py
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database as db
+
+
+def main():
+    argparse.ArgumentParser(description=__doc__.splitlines()[0]).parse_args()
+
+    household_id = db.create_household()
+    db.set_household(household_id)
+    db.initialize_db()
+    print(f"Created household '{household_id}'. Open the app with ?household={household_id}")
+
+
+if __name__ == "__main__":
+    main()
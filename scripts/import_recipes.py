@@ -0,0 +1,49 @@
+"""Import recipes from saved web pages (schema.org JSON-LD or microdata), without AI calls.
+
+Directories are searched recursively for .html/.htm files. Recipes whose name is
+already saved (or repeated in the batch) are skipped unless --allow-duplicates.
+
+    DB_PATH=recipes.db python scripts/import_recipes.py [--household ID] [--allow-duplicates] PATH [PATH ...]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database as db
+from recipe_import import import_html_files
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="HTML files or directories")
+    parser.add_argument("--household", default=db.DEFAULT_HOUSEHOLD)
+    parser.add_argument("--allow-duplicates", action="store_true", help="import recipes whose name already exists")
+    args = parser.parse_args()
+
+    db.initialize_shared_db()
+    if not db.household_exists(args.household):
+        parser.error(f"unknown household '{args.household}' (create one with scripts/create_household.py)")
+    db.set_household(args.household)
+    db.initialize_db()
+    start = time.perf_counter()
+    result = import_html_files(args.paths, skip_existing=not args.allow_duplicates)
+    elapsed = time.perf_counter() - start
+
+    print(f"Imported {result['imported']} recipe(s) into '{args.household}' in {elapsed:.2f} s.")
+    if result["skipped"]:
+        print(f"Skipped {result['skipped']} already saved.")
+    if result["unmeasured"]:
+        print(f"{len(result['unmeasured'])} recipe(s) have ingredients without an amount, listed in their instructions:")
+        for name in result["unmeasured"]:
+            print(f"  {name}")
+    if result["without_recipe"]:
+        print(f"No recipe found in {len(result['without_recipe'])} file(s):")
+        for path in result["without_recipe"]:
+            print(f"  {path}")
+
+
+if __name__ == "__main__":
+    main()
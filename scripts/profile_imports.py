@@ -0,0 +1,74 @@
+"""Cold-import profile for every page, failing when one exceeds its budget.
+
+Each page's module-level imports are run in a fresh interpreter with Streamlit
+already loaded (every page pays for Streamlit, and the server has it imported
+before the first page runs), so the time reported is what the page itself adds
+to a cold start. Exits with status 1 if any page is over budget.
+
+    python scripts/profile_imports.py [--budget-ms 150] [--repeat 3]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BUDGET_MS = 150
+
+_PROBE = """
+import ast, sys, time
+sys.path.insert(0, {root!r})
+import streamlit
+path = {path!r}
+with open(path) as f:
+    tree = ast.parse(f.read(), path)
+imports = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+code = compile(ast.Module(body=imports, type_ignores=[]), path, "exec")
+start = time.perf_counter()
+exec(code, {{"__name__": "__page__"}})
+elapsed = time.perf_counter() - start
+heavy = ",".join(name for name in ("google.genai", "PIL", "dotenv") if name in sys.modules)
+print("PROBE", elapsed * 1000, heavy)
+"""
+
+
+def page_paths():
+    pages = sorted(os.listdir(os.path.join(ROOT, "pages")))
+    return ["Home.py"] + [os.path.join("pages", name) for name in pages if name.endswith(".py")]
+
+
+def cold_import(page):
+    """Return (milliseconds, heavy optional modules loaded) for one page's imports in a fresh interpreter."""
+    probe = _PROBE.format(root=ROOT, path=os.path.join(ROOT, page))
+    result = subprocess.run(
+        [sys.executable, "-c", probe], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    line = [line for line in result.stdout.splitlines() if line.startswith("PROBE ")][-1]
+    _, elapsed, heavy = (line + " ").split(" ", 2)
+    return float(elapsed), heavy.strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--repeat", type=int, default=3, help="best of N cold runs per page")
+    args = parser.parse_args()
+
+    over = []
+    print(f"{'page':<32}{'ms':>8}  heavy modules loaded")
+    for page in page_paths():
+        runs = [cold_import(page) for _ in range(args.repeat)]
+        elapsed, heavy = min(runs)
+        flag = " over budget" if elapsed > args.budget_ms else ""
+        print(f"{page:<32}{elapsed:>8.1f}  {heavy or '-'}{flag}")
+        if flag:
+            over.append(page)
+
+    if over:
+        print(f"\n{len(over)} page(s) over the {args.budget_ms:g} ms budget: {', '.join(over)}")
+        sys.exit(1)
+    print(f"\nAll pages within the {args.budget_ms:g} ms budget.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""Local weekly shopping list consolidation.
+
+Sums every planned meal's (servings-scaled) ingredients in base units, nets the
+totals against pantry stock, rounds what is left up to purchasable package
+sizes and groups the lines by store category. Everything is computed locally;
+the model is only used, optionally, to phrase the finished list.
+"""
+import csv
+import io
+import math
+from database import _to_base, _from_base, build_inventory, scaled_ingredients, canonical_name
+
+CATEGORY_ORDER = ["Produce", "Meat & Seafood", "Dairy & Eggs", "Bakery", "Pantry", "Frozen", "Other"]
+
+# Exact ingredient -> category, checked before the keyword fallbacks below
+INGREDIENT_CATEGORIES = {
+    "eggs": "Dairy & Eggs",
+    "milk": "Dairy & Eggs",
+    "butter": "Dairy & Eggs",
+    "cheddar cheese": "Dairy & Eggs",
+    "parmesan": "Dairy & Eggs",
+    "yogurt": "Dairy & Eggs",
+    "cream": "Dairy & Eggs",
+    "avocado": "Produce",
+    "lemon": "Produce",
+    "lime": "Produce",
+    "lettuce": "Produce",
+    "tomatoes": "Produce",
+    "garlic": "Produce",
+    "onion": "Produce",
+    "banana": "Produce",
+    "potatoes": "Produce",
+    "carrots": "Produce",
+    "spinach": "Produce",
+    "bell pepper": "Produce",
+    "ginger": "Produce",
+    "chicken breast": "Meat & Seafood",
+    "salmon": "Meat & Seafood",
+    "bread": "Bakery",
+    "tortillas": "Bakery",
+    "pasta": "Pantry",
+    "rice": "Pantry",
+    "oats": "Pantry",
+    "olive oil": "Pantry",
+    "soy sauce": "Pantry",
+    "fish sauce": "Pantry",
+    "cornstarch": "Pantry",
+    "flour": "Pantry",
+    "sugar": "Pantry",
+    "honey": "Pantry",
+    "frozen peas": "Frozen",
+}
+
+CATEGORY_KEYWORDS = [
+    ("frozen", "Frozen"),
+    ("sauce", "Pantry"),
+    ("oil", "Pantry"),
+    ("vinegar", "Pantry"),
+    ("spice", "Pantry"),
+    ("powder", "Pantry"),
+    ("stock", "Pantry"),
+    ("broth", "Pantry"),
+    ("beans", "Pantry"),
+    ("chicken", "Meat & Seafood"),
+    ("beef", "Meat & Seafood"),
+    ("pork", "Meat & Seafood"),
+    ("turkey", "Meat & Seafood"),
+    ("bacon", "Meat & Seafood"),
+    ("sausage", "Meat & Seafood"),
+    ("fish", "Meat & Seafood"),
+    ("shrimp", "Meat & Seafood"),
+    ("tuna", "Meat & Seafood"),
+    ("cheese", "Dairy & Eggs"),
+    ("milk", "Dairy & Eggs"),
+    ("yogurt", "Dairy & Eggs"),
+    ("cream", "Dairy & Eggs"),
+    ("egg", "Dairy & Eggs"),
+    ("bread", "Bakery"),
+    ("bun", "Bakery"),
+    ("bagel", "Bakery"),
+    ("pepper", "Produce"),
+    ("apple", "Produce"),
+    ("berries", "Produce"),
+    ("herb", "Produce"),
+    ("basil", "Produce"),
+    ("parsley", "Produce"),
+    ("cilantro", "Produce"),
+    ("mushroom", "Produce"),
+    ("cucumber", "Produce"),
+    ("zucchini", "Produce"),
+]
+
+# Ingredient -> (amount, unit, package name) it is usually sold in
+PACKAGE_SIZES = {
+    "eggs": (12, "whole", "carton"),
+    "milk": (1, "liters", "carton"),
+    "butter": (250, "grams", "block"),
+    "cheddar cheese": (200, "grams", "block"),
+    "chicken breast": (500, "grams", "pack"),
+    "salmon": (400, "grams", "pack"),
+    "pasta": (500, "grams", "box"),
+    "rice": (1, "kg", "bag"),
+    "flour": (1, "kg", "bag"),
+    "sugar": (1, "kg", "bag"),
+    "olive oil": (500, "ml", "bottle"),
+    "soy sauce": (250, "ml", "bottle"),
+    "bread": (20, "slices", "loaf"),
+    "garlic": (10, "cloves", "bulb"),
+}
+
+# Units that are bought whole — fractional needs round up to the next one
+COUNTABLE_UNITS = {"whole", "slice", "slices", "clove", "cloves", "head", "bunch", "stalk", "can", "jar", "bag", "box", "package", "piece"}
+
+_EPSILON = 1e-9
+
+
+def categorize(name):
+    """Return the store category for an ingredient name."""
+    key = name.strip().lower()
+    if key in INGREDIENT_CATEGORIES:
+        return INGREDIENT_CATEGORIES[key]
+    for keyword, category in CATEGORY_KEYWORDS:
+        if keyword in key:
+            return category
+    return "Other"
+
+
+def _display_unit(base_amount, base_unit, units_seen):
+    """Pick the unit a consolidated amount is shown in: the recipes' unit if they agree, else a metric one."""
+    if len(units_seen) == 1:
+        return next(iter(units_seen))
+    if base_unit == "grams":
+        return "kg" if base_amount >= 1000 else "grams"
+    if base_unit == "ml":
+        return "liters" if base_amount >= 1000 else "ml"
+    return base_unit
+
+
+def _purchase(key, buy_base, base_unit, unit):
+    """Round a base-unit shortfall up to what can be bought. Returns (amount, unit, packages, package_label)."""
+    package = PACKAGE_SIZES.get(key)
+    if package:
+        pkg_amount, pkg_unit, pkg_name = package
+        pkg_base, pkg_base_unit = _to_base(pkg_amount, pkg_unit)
+        if pkg_base_unit == base_unit:
+            count = math.ceil(buy_base / pkg_base - _EPSILON)
+            label = f"{count} × {pkg_amount} {pkg_unit} {pkg_name}"
+            return round(count * pkg_amount, 3), pkg_unit, count, label
+    amount = _from_base(buy_base, unit)
+    if unit in COUNTABLE_UNITS:
+        amount = math.ceil(amount - _EPSILON)
+    return round(amount, 3), unit, None, None
+
+
+def consolidate_shopping_list(meal_plan, recipes, fridge, servings=None, aliases=None):
+    """
+    Build a consolidated shopping list for a meal plan.
+
+    meal_plan: {"YYYY-MM-DD_MealType": recipe_name} of home meals
+    recipes:   full recipe list from get_recipes()
+    fridge:    ingredient list from get_ingredients()
+    servings:  {"YYYY-MM-DD_MealType": people}, as from get_slot_servings()
+    aliases:   {alias: canonical} from get_ingredient_aliases()
+
+    Returns rows ordered by category then name:
+    {
+        "name", "category",
+        "need_amount", "need_unit",     # total across the plan
+        "have_amount", "have_unit",     # pantry stock counted against it
+        "buy_amount", "buy_unit",       # shortfall rounded up to what can be bought
+        "packages", "package_label",    # e.g. 2, "2 × 500 grams box" (None if no package size)
+        "first_needed", "recipes",
+    }
+    Ingredients whose pantry unit can't be compared with the recipe unit are assumed covered,
+    as in get_shopping_plan.
+    """
+    inventory = build_inventory(fridge, aliases)
+    recipe_map = {r["name"]: r for r in recipes}
+    servings = servings or {}
+
+    demand = {}
+    for slot in sorted(meal_plan):
+        recipe = recipe_map.get(meal_plan[slot])
+        if not recipe:
+            continue
+        for ing in scaled_ingredients(recipe, servings.get(slot)):
+            base_amount, base_unit = _to_base(ing["amount"], ing["unit"])
+            if base_amount is None:
+                continue  # no amount to buy
+            entry = demand.setdefault((canonical_name(ing["name"], aliases), base_unit), {
+                "name": ing["name"], "base_amount": 0, "units": set(),
+                "first_needed": slot[:10], "recipes": [],
+            })
+            entry["base_amount"] += base_amount
+            entry["units"].add(ing["unit"])
+            if recipe["name"] not in entry["recipes"]:
+                entry["recipes"].append(recipe["name"])
+
+    rows = []
+    for (key, base_unit), entry in demand.items():
+        item = inventory.get(key)
+        if item is not None and item["base_unit"] != base_unit:
+            continue  # e.g. grams vs cups — can't net, assume covered
+        have_base = item["base_amount"] if item else 0
+        buy_base = entry["base_amount"] - have_base
+        if buy_base <= _EPSILON:
+            continue
+
+        unit = _display_unit(entry["base_amount"], base_unit, entry["units"])
+        buy_amount, buy_unit, packages, package_label = _purchase(key, buy_base, base_unit, unit)
+        rows.append({
+            "name": item["display_name"] if item else entry["name"],
+            "category": categorize(key),
+            "need_amount": round(_from_base(entry["base_amount"], unit), 3),
+            "need_unit": unit,
+            "have_amount": round(_from_base(have_base, unit), 3),
+            "have_unit": unit,
+            "buy_amount": buy_amount,
+            "buy_unit": buy_unit,
+            "packages": packages,
+            "package_label": package_label,
+            "first_needed": entry["first_needed"],
+            "recipes": entry["recipes"],
+        })
+
+    rows.sort(key=lambda r: (CATEGORY_ORDER.index(r["category"]), r["name"].lower()))
+    return rows
+
+
+def group_by_category(rows):
+    """Return [(category, rows)] in CATEGORY_ORDER, skipping empty categories."""
+    groups = {}
+    for row in rows:
+        groups.setdefault(row["category"], []).append(row)
+    return [(category, groups[category]) for category in CATEGORY_ORDER if category in groups]
+
+
+def shopping_list_text(rows, title="Shopping List"):
+    """Plain-text export grouped by category."""
+    lines = [title, ""]
+    for category, items in group_by_category(rows):
+        lines.append(f"{category}:")
+        for row in items:
+            buy = row["package_label"] or f"{row['buy_amount']} {row['buy_unit']}"
+            lines.append(f"- {row['name']}: {buy} (for {', '.join(row['recipes'])})")
+        lines.append("")
+    return "\n".join(lines).rstrip() + "\n"
+
+
+def shopping_list_csv(rows):
+    """CSV export with one line per ingredient."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["Category", "Ingredient", "Buy", "Unit", "Packages", "Need", "Have", "First needed", "For"])
+    for row in rows:
+        writer.writerow([
+            row["category"], row["name"], row["buy_amount"], row["buy_unit"], row["package_label"] or "",
+            f"{row['need_amount']} {row['need_unit']}", f"{row['have_amount']} {row['have_unit']}",
+            row["first_needed"], "; ".join(row["recipes"]),
+        ])
+    return buffer.getvalue()
@@ -0,0 +1,28 @@
+import pytest
+import database as db
+
+
+@pytest.fixture
+def fresh_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "recipes.db"))
+    monkeypatch.setattr(db, "HOUSEHOLD_DB_DIR", None)
+    db.set_household(db.DEFAULT_HOUSEHOLD)
+    db.initialize_db()
+    yield
+    db.set_household(db.DEFAULT_HOUSEHOLD)
+
+
+def test_only_created_households_exist(fresh_db):
+    assert db.household_exists(db.DEFAULT_HOUSEHOLD)
+    assert not db.household_exists("guessed")
+    household_id = db.create_household()
+    assert db.household_exists(household_id)
+    assert household_id != db.create_household()
+
+
+def test_households_share_a_daily_ceiling(fresh_db):
+    assert [db.check_and_increment_quota(limit=2, global_limit=3) for _ in range(3)] == [True, True, False]
+    db.set_household(db.create_household())
+    assert [db.check_and_increment_quota(limit=2, global_limit=3) for _ in range(2)] == [True, False]
+    assert db.get_ai_usage_today_total() == 3
+    assert db.get_ai_usage_today() == 1
@@ -0,0 +1,33 @@
+import time
+import database as db
+import insights
+
+
+def _wait_for_worker():
+    deadline = time.monotonic() + 5
+    while insights.is_refreshing() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_a_failed_refresh_stores_nothing_until_a_retry_succeeds(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "recipes.db"))
+    monkeypatch.setattr(db, "HOUSEHOLD_DB_DIR", None)
+    db.set_household(db.DEFAULT_HOUSEHOLD)
+    db.initialize_db()
+    monkeypatch.setattr(insights, "_stored", {})
+    monkeypatch.setattr(insights, "_failed", {})
+
+    monkeypatch.setattr(insights, "_build_home_insight", lambda: ("Could not generate insight: timeout", time.time() + 60))
+    insights.request_home_insight_refresh(force=True)
+    _wait_for_worker()
+    insight = insights.get_home_insight()
+    assert insight["stale"] and insight["content"] is None
+    assert insight["error"] == "Could not generate insight: timeout"
+
+    monkeypatch.setattr(insights, "_build_home_insight", lambda: ("Use the spinach first.", None))
+    insights.request_home_insight_refresh()  # before the retry time: nothing runs
+    assert not insights.is_refreshing()
+    insights.request_home_insight_refresh(force=True)
+    _wait_for_worker()
+    insight = insights.get_home_insight()
+    assert insight == {"content": "Use the spinach first.", "stale": False, "refreshing": False, "error": None, "retry_at": None}
@@ -0,0 +1,15 @@
+import database as db
+from matching import refresh_alias_suggestions
+
+
+def test_alias_refresh_leaves_the_settings_version_alone(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "recipes.db"))
+    monkeypatch.setattr(db, "HOUSEHOLD_DB_DIR", None)
+    db.set_household(db.DEFAULT_HOUSEHOLD)
+    db.initialize_db()
+    db.add_ingredient("Plum Tomato", 4, "whole")
+
+    settings_version = db.get_data_version("settings")
+    refresh_alias_suggestions(force=True)
+    assert db.get_setting("alias_suggestions_version") == db.get_data_version("pantry", "recipes")
+    assert db.get_data_version("settings") == settings_version
@@ -0,0 +1,87 @@
+import time
+from datetime import date, timedelta
+import planner
+from planner import UNPLANNED, reschedule_locally
+
+MEAL_TYPES = ["Breakfast", "Lunch", "Dinner"]
+START = date(2026, 10, 19)
+
+
+def _week(meal_for_slot, days=7):
+    return {
+        (START + timedelta(days=d)).isoformat(): {mt: meal_for_slot(d, k) for k, mt in enumerate(MEAL_TYPES)}
+        for d in range(days)
+    }
+
+
+def _staple_recipes(count):
+    """Recipes that all need 20 ml of one shared oil plus one ingredient of their own."""
+    recipes = [
+        {"name": f"R{i}", "ingredients": [
+            {"name": "Oil", "amount": 20, "unit": "ml"},
+            {"name": f"X{i}", "amount": 1, "unit": "whole"},
+        ]}
+        for i in range(count)
+    ]
+    pantry = [{"name": "Oil", "amount": 100, "unit": "ml"}] + [
+        {"name": f"X{i}", "amount": 1, "unit": "whole"} for i in range(count)
+    ]
+    return recipes, pantry
+
+
+def test_infeasible_week_is_solved_in_milliseconds():
+    for count in (10, 30, 200):
+        recipes, pantry = _staple_recipes(count)
+        plan = _week(lambda d, k: f"R{(d * 3 + k) % count}")
+        start = time.perf_counter()
+        result = reschedule_locally(plan, recipes, pantry, (START + timedelta(days=5)).isoformat())
+        assert time.perf_counter() - start < 0.5
+        assert not result["feasible"]
+        assert "only covers 5 of the 15" in result["note"]
+
+
+def test_displaced_meals_move_into_unplanned_slots_after_the_trip():
+    recipes, pantry = _staple_recipes(4)
+    pantry[0]["amount"] = 40  # oil for two of the four meals planned before the trip
+    plan = _week(lambda d, k: f"R{d * 3 + k}" if d == 0 or (d == 1 and k == 0) else UNPLANNED, days=4)
+    result = reschedule_locally(plan, recipes, pantry, (START + timedelta(days=2)).isoformat())
+    after_trip = [meal for date_str, meals in result["plan"].items() if date_str >= "2026-10-21" for meal in meals.values()]
+    assert sorted(meal for meal in after_trip if meal != UNPLANNED) == ["R2", "R3"]
+    assert "No room left" not in result["note"]
+
+
+def test_feasible_week_past_the_node_budget_is_reported_as_best_effort(monkeypatch):
+    # Greedy keeps the planned R0, which uses all the oil; only R1 + R2 fill both slots before the trip
+    recipes = [
+        {"name": "R0", "ingredients": [{"name": "Oil", "amount": 40, "unit": "ml"}]},
+        {"name": "R1", "ingredients": [{"name": "Oil", "amount": 20, "unit": "ml"}]},
+        {"name": "R2", "ingredients": [{"name": "Oil", "amount": 20, "unit": "ml"}]},
+    ]
+    pantry = [{"name": "Oil", "amount": 40, "unit": "ml"}]
+    plan = _week(lambda d, k: ["R0", "R1", UNPLANNED][k], days=2)
+    grocery_date = (START + timedelta(days=1)).isoformat()
+
+    result = reschedule_locally(plan, recipes, pantry, grocery_date)
+    assert result["feasible"] and not result["best_effort"]
+
+    monkeypatch.setattr(planner, "SEARCH_NODE_BUDGET", 1)
+    result = reschedule_locally(plan, recipes, pantry, grocery_date)
+    assert not result["feasible"] and result["best_effort"]
+    assert "best-effort plan" in result["note"]
+    assert "only covers" not in result["note"]
+
+
+def test_meals_before_the_trip_are_scaled_to_their_slot_servings():
+    recipes = [{"name": "Stew", "servings": 2, "ingredients": [{"name": "Oil", "amount": 20, "unit": "ml"}]}]
+    pantry = [{"name": "Oil", "amount": 40, "unit": "ml"}]
+    plan = _week(lambda d, k: "Stew" if k == 2 else UNPLANNED, days=3)
+    grocery_date = (START + timedelta(days=2)).isoformat()
+
+    assert reschedule_locally(plan, recipes, pantry, grocery_date)["feasible"]
+
+    # Guests on the first night double that dinner, leaving oil for only one of the two; the bigger meal waits
+    result = reschedule_locally(plan, recipes, pantry, grocery_date, servings={f"{START.isoformat()}_Dinner": 4})
+    assert not result["feasible"]
+    assert "only covers 1 of the 2" in result["note"]
+    assert result["plan"][START.isoformat()]["Dinner"] == UNPLANNED
+    assert result["plan"][(START + timedelta(days=1)).isoformat()]["Dinner"] == "Stew"
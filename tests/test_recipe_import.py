@@ -0,0 +1,78 @@
+import json
+from database import scaled_ingredients
+from recipe_import import recipes_from_html
+
+JSON_LD_PAGE = """<html><head><title>Weeknight Chili | Example Kitchen</title>
+<script type="application/ld+json">{json}</script>
+</head><body><h1>Weeknight Chili</h1></body></html>"""
+
+CHILI = {
+    "@context": "https://schema.org",
+    "@graph": [
+        {"@type": "WebPage", "name": "Weeknight Chili | Example Kitchen"},
+        {
+            "@type": "Recipe",
+            "name": "Weeknight Chili",
+            "recipeYield": ["4", "4 servings"],
+            "totalTime": "PT1H15M",
+            "recipeIngredient": [
+                "1 lb ground beef",
+                "1 (28 oz) can crushed tomatoes",
+                "2 (15 oz) cans kidney beans, drained and rinsed",
+                "2-3 cloves garlic, minced",
+                "1 &frac12; tbsp chili powder",
+                "Salt and pepper to taste",
+                "Sour cream, for serving",
+            ],
+            "recipeInstructions": [
+                {"@type": "HowToSection", "name": "Cook", "itemListElement": [
+                    {"@type": "HowToStep", "text": "Brown the beef."},
+                    {"@type": "HowToStep", "text": "Add everything else and simmer for an hour."},
+                ]},
+            ],
+        },
+    ],
+}
+
+MICRODATA_PAGE = """<div itemscope itemtype="http://schema.org/Recipe">
+<h2 itemprop="name">Pancakes</h2>
+<meta itemprop="totalTime" content="PT20M">
+<ul><li itemprop="recipeIngredient">1 1/2 cups flour<li itemprop="recipeIngredient">2 eggs
+<li itemprop="recipeIngredient">Butter, for the pan</ul>
+<div itemprop="recipeInstructions"><p>Whisk.<p>Fry.</div></div>"""
+
+
+def test_json_ld_recipe_lines_are_all_measured():
+    [recipe] = recipes_from_html(JSON_LD_PAGE.format(json=json.dumps(CHILI)))
+    assert recipe["name"] == "Weeknight Chili"
+    assert recipe["servings"] == 4
+    assert recipe["cooking_time"] == "1 hour 15 minutes"
+    assert [(i["name"], i["amount"], i["unit"]) for i in recipe["ingredients"]] == [
+        ("Ground beef", 1.0, "lbs"),
+        ("Crushed tomatoes", 28.0, "oz"),
+        ("Kidney beans", 30.0, "oz"),
+        ("Garlic", 3.0, "clove"),
+        ("Chili powder", 1.5, "tablespoons"),
+    ]
+    assert recipe["unmeasured"] == ["Salt and pepper to taste", "Sour cream, for serving"]
+    assert recipe["instructions"] == (
+        "Also needed: Salt and pepper to taste; Sour cream, for serving\n"
+        "Brown the beef.\nAdd everything else and simmer for an hour."
+    )
+
+
+def test_microdata_recipe():
+    [recipe] = recipes_from_html(MICRODATA_PAGE)
+    assert [(i["name"], i["amount"], i["unit"]) for i in recipe["ingredients"]] == [
+        ("Flour", 1.5, "cups"), ("Eggs", 2.0, "whole"),
+    ]
+    assert recipe["unmeasured"] == ["Butter, for the pan"]
+    assert recipe["cooking_time"] == "20 minutes"
+
+
+def test_scaling_keeps_missing_amounts():
+    recipe = {"id": None, "servings": 4, "ingredients": [
+        {"name": "Salt to taste", "amount": None, "unit": None},
+        {"name": "Eggs", "amount": 2, "unit": "whole"},
+    ]}
+    assert [i["amount"] for i in scaled_ingredients(recipe, 2)] == [None, 1.0]
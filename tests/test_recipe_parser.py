@@ -0,0 +1,46 @@
+import pytest
+from recipe_parser import parse_ingredient, parse_recipe_text
+
+
+@pytest.mark.parametrize("line, expected", [
+    ("2 tbsp olive oil, divided", ("Olive oil", 2.0, "tablespoons")),
+    ("1/2 cup milk", ("Milk", 0.5, "cups")),
+    ("1½ cups flour (sifted)", ("Flour", 1.5, "cups")),
+    ("¼ tsp black pepper", ("Black pepper", 0.25, "teaspoons")),
+    ("500g beef mince", ("Beef mince", 500.0, "grams")),
+    ("2 cups of rice", ("Rice", 2.0, "cups")),
+    ("3 large eggs", ("Large eggs", 3.0, "whole")),
+    ("- 2-3 cloves garlic, minced", ("Garlic", 3.0, "clove")),
+    ("1 to 2 tsp salt", ("Salt", 2.0, "teaspoons")),
+    ("1 - 1 1/2 lbs chicken thighs", ("Chicken thighs", 1.5, "lbs")),
+    ("1 (28 oz) can crushed tomatoes", ("Crushed tomatoes", 28.0, "oz")),
+    ("2 (14 oz) cans black beans, drained", ("Black beans", 28.0, "oz")),
+    ("2 x 400g tins chickpeas", ("Chickpeas", 800.0, "grams")),
+    ("4 (6 inch) corn tortillas", ("Corn tortillas", 4.0, "whole")),
+    ("1 cup (240 ml) water", ("Water", 1.0, "cups")),
+])
+def test_parse_ingredient(line, expected):
+    ing = parse_ingredient(line)
+    assert (ing["name"], ing["amount"], ing["unit"]) == expected
+
+
+@pytest.mark.parametrize("line", ["Salt to taste", "Pinch of nutmeg", "Fresh parsley, to serve"])
+def test_lines_without_a_quantity_are_left_for_review(line):
+    assert parse_ingredient(line) == {"name": line, "amount": None, "unit": None}
+
+
+def test_unreadable_quantity_rejects_the_local_parse():
+    text = "\n".join([
+        "Chickpea Curry",
+        "Ingredients",
+        "2 tbsp oil",
+        "1 onion",
+        "3 ½ x 400 g tins chickpeas",
+        "Instructions",
+        "1. Fry the onion in the oil until soft, about ten minutes.",
+        "2. Add the chickpeas and simmer.",
+    ])
+    assert parse_ingredient("3 ½ x 400 g tins chickpeas")["amount"] == 1400.0
+    assert parse_recipe_text(text) is not None
+    assert parse_ingredient("2 400g tins chickpeas") == {"name": "2 400g tins chickpeas", "amount": None, "unit": None}
+    assert parse_recipe_text(text.replace("3 ½ x 400 g tins", "2 400g tins")) is None
@@ -1,7 +1,7 @@
 import streamlit as st
 from datetime import date
-from constants import AI_DAILY_LIMIT
-from database import get_ai_usage_today
+from constants import AI_DAILY_LIMIT, AI_GLOBAL_DAILY_LIMIT
+from database import get_cached_ai_usage_today
 
 
 def get_local_date():
@@ -14,8 +14,9 @@ def show_ai_limit_message():
     st.warning(
         "**Daily AI limit reached.** "
         "CoPantry uses Google Gemini AI to power features like recipe extraction, meal planning suggestions, and pantry insights. "
-        "To manage API costs, there is a shared daily limit across all visitors. "
-        "Today's limit has been reached. All AI features will be available again tomorrow. "
+        f"To manage API costs, each household can make {AI_DAILY_LIMIT} AI requests a day, "
+        f"and all households together can make {AI_GLOBAL_DAILY_LIMIT}. "
+        "One of these limits has been reached for today. All AI features will be available again tomorrow. "
         "If you are evaluating this app and would like a live demo, feel free to reach out directly."
     )
 
@@ -37,7 +38,8 @@ def apply_sidebar_style():
         unsafe_allow_html=True,
     )
 
-    usage = get_ai_usage_today()
+    # In-process counter: no database round trip on a normal rerun
+    usage = get_cached_ai_usage_today()
     remaining = AI_DAILY_LIMIT - usage
     if usage >= AI_DAILY_LIMIT:
         indicator = "🔴"